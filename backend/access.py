@@ -0,0 +1,86 @@
+"""
+Workspace access control.
+
+A user's role in a workspace is "owner" (Workspace.owner_id), the role on their
+WorkspaceMember row ("editor" / "viewer"), or None. Roles are resolved with one
+query and cached per (user_id, workspace_id) for `access_cache_ttl_seconds`;
+the member/workspace routes call invalidate_* after changing membership.
+"""
+import uuid
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import select, and_
+from sqlalchemy.orm import Session
+
+from auth import get_current_user
+from cache import TTLCache, MISSING
+from config import get_settings
+from database import get_db
+from models import User, Workspace, WorkspaceMember
+
+settings = get_settings()
+
+ROLE_RANK = {"viewer": 1, "editor": 2, "owner": 3}
+
+role_cache = TTLCache(maxsize=settings.access_cache_size, ttl=settings.access_cache_ttl_seconds)
+
+
+def resolve_role(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID) -> Optional[str]:
+    """Role of user_id in workspace_id (None if not a member). 404 if the workspace doesn't exist."""
+    key = (user_id, workspace_id)
+    role = role_cache.get(key)
+    if role is not MISSING:
+        return role
+
+    row = db.execute(
+        select(Workspace.owner_id, WorkspaceMember.role)
+        .outerjoin(WorkspaceMember, and_(
+            WorkspaceMember.workspace_id == Workspace.id,
+            WorkspaceMember.user_id == user_id
+        ))
+        .where(Workspace.id == workspace_id)
+        .limit(1)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+
+    owner_id, member_role = row
+    role = "owner" if owner_id == user_id else member_role
+    role_cache.set(key, role)
+    return role
+
+
+def check_workspace_access(db: Session, user: User, workspace_id: uuid.UUID,
+                           min_role: str = "viewer", detail: str = "Access denied") -> Optional[str]:
+    """Raise 403 unless `user` has at least `min_role`. Admins may always read."""
+    role = resolve_role(db, user.id, workspace_id)
+    if ROLE_RANK.get(role, 0) >= ROLE_RANK[min_role]:
+        return role
+    if min_role == "viewer" and user.is_admin:
+        return role
+    raise HTTPException(status_code=403, detail=detail)
+
+
+def require_workspace_role(min_role: str = "viewer", detail: str = "Access denied"):
+    """FastAPI dependency for routes with a {workspace_id} path parameter."""
+    def dependency(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user),
+                   db: Session = Depends(get_db)) -> Optional[str]:
+        return check_workspace_access(db, current_user, workspace_id, min_role, detail)
+    return dependency
+
+
+workspace_reader = require_workspace_role("viewer")
+workspace_editor = require_workspace_role("editor", "Edit access required")
+
+
+def invalidate_membership(user_id: uuid.UUID, workspace_id: uuid.UUID) -> None:
+    role_cache.pop((user_id, workspace_id))
+
+
+def invalidate_workspace(workspace_id: uuid.UUID) -> None:
+    role_cache.discard_where(lambda key: key[1] == workspace_id)
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    role_cache.discard_where(lambda key: key[0] == user_id)
@@ -0,0 +1,169 @@
+"""
+Activity log - keyset-paginated reads and monthly partitions.
+
+activity_log gets a row for every mutation, which makes it the fastest-growing
+table. Admin reads page through it newest first on (created_at, id), with
+optional user / workspace / action / date-range filters, and the actor's name
+comes from the same query through an outer join.
+
+On PostgreSQL the table is range-partitioned by month on created_at (migration
+0007), with a DEFAULT partition as a safety net. The maintenance scheduler's
+activity_partitions job creates partitions activity_partition_months_ahead
+months in advance. Rows that reached the DEFAULT partition because their month
+was missing are moved into a new partition for it, so retention still covers
+them. The job drops whole months once their newest possible row is older than
+activity_retention_days, which is a catalog operation rather than a DELETE over
+millions of rows. Pages with a date range only touch the months in range;
+unbounded pages read the newest partitions first and stop at the LIMIT.
+"""
+import uuid
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.orm import Session
+
+from models import ActivityLog, User
+from board import encode_cursor, decode_cursor
+from schemas import ActivityLogResponse, ActivityLogPage
+
+MAX_ACTIVITY_PAGE_SIZE = 500
+PARTITION_PREFIX = "activity_log_p"  # + YYYY_MM
+COLUMNS = "id, user_id, workspace_id, action, entity_type, entity_id, details, created_at"
+
+
+def load_activity_page(db: Session, limit: int, cursor: Optional[str] = None, user_id=None, workspace_id=None,
+                       action: Optional[str] = None, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> ActivityLogPage:
+    """One page of the log, newest first. since is inclusive, until exclusive.
+    Raises ValueError on a malformed cursor."""
+    limit = max(1, min(limit, MAX_ACTIVITY_PAGE_SIZE))
+    stmt = select(ActivityLog, User.display_name).outerjoin(User, User.id == ActivityLog.user_id)
+    if user_id is not None:
+        stmt = stmt.where(ActivityLog.user_id == user_id)
+    if workspace_id is not None:
+        stmt = stmt.where(ActivityLog.workspace_id == workspace_id)
+    if action:
+        stmt = stmt.where(ActivityLog.action == action)
+    if since is not None:
+        stmt = stmt.where(ActivityLog.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(ActivityLog.created_at < until)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            log_id = uuid.UUID(log_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        stmt = stmt.where(tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(created_at, log_id))
+    rows = db.execute(
+        stmt.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
+
+    return ActivityLogPage(
+        items=[
+            ActivityLogResponse(
+                id=log.id,
+                user_id=log.user_id,
+                user_name=user_name,
+                workspace_id=log.workspace_id,
+                action=log.action,
+                entity_type=log.entity_type,
+                entity_id=log.entity_id,
+                details=log.details,
+                created_at=log.created_at
+            )
+            for log, user_name in rows
+        ],
+        next_cursor=next_cursor
+    )
+
+
+# ==================== PARTITIONS (PostgreSQL) ====================
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def existing_partitions(db: Session) -> List[Tuple[str, date]]:
+    """(name, first day of month) of every monthly partition, oldest first."""
+    names = db.scalars(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'activity_log'::regclass
+    """)).all()
+    months = []
+    for name in names:
+        if not name.startswith(PARTITION_PREFIX):
+            continue  # the DEFAULT partition
+        year, month = name[len(PARTITION_PREFIX):].split("_")
+        months.append((name, date(int(year), int(month), 1)))
+    return sorted(months, key=lambda partition: partition[1])
+
+
+def stray_months(db: Session) -> List[date]:
+    """Months with rows in the DEFAULT partition, i.e. written before their
+    monthly partition existed (maintenance disabled, long downtime)."""
+    return [month.date() for month in db.scalars(text(
+        "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM activity_log_default"
+    ))]
+
+
+def create_partition(db: Session, month: date) -> None:
+    bounds = (f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') "
+              f"TO ('{add_months(month, 1).isoformat()} 00:00+00')")
+    in_month = (f"created_at >= '{month.isoformat()} 00:00+00' "
+                f"AND created_at < '{add_months(month, 1).isoformat()} 00:00+00'")
+    if db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM activity_log_default WHERE {in_month})")):
+        # The new partition's range would overlap rows in the default, which
+        # Postgres refuses, so move them across with the default detached
+        db.execute(text("ALTER TABLE activity_log DETACH PARTITION activity_log_default"))
+        db.execute(text(f"CREATE TABLE {partition_name(month)} PARTITION OF activity_log {bounds}"))
+        db.execute(text(f"""
+            WITH moved AS (DELETE FROM activity_log_default WHERE {in_month} RETURNING {COLUMNS})
+            INSERT INTO activity_log ({COLUMNS}) SELECT {COLUMNS} FROM moved
+        """))
+        db.execute(text("ALTER TABLE activity_log ATTACH PARTITION activity_log_default DEFAULT"))
+    else:
+        # IF NOT EXISTS: another worker's job may be creating the same month
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF activity_log {bounds}"))
+
+
+def create_partitions(db: Session, first: date, last: date) -> int:
+    """Create the monthly partitions from first's month through last's, plus any
+    month with rows stranded in the DEFAULT partition, if missing. Returns how
+    many were created."""
+    existing = {name for name, _ in existing_partitions(db)}
+    months, month = set(stray_months(db)), first.replace(day=1)
+    while month <= last:
+        months.add(month)
+        month = add_months(month, 1)
+    created = 0
+    for month in sorted(months):
+        if partition_name(month) not in existing:
+            create_partition(db, month)
+            created += 1
+    return created
+
+
+def drop_partitions_before(db: Session, cutoff: datetime) -> int:
+    """Drop every monthly partition whose rows are all older than cutoff. Returns how many."""
+    dropped = 0
+    for name, month in existing_partitions(db):
+        if add_months(month, 1) > cutoff.date():
+            break
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped += 1
+    return dropped
@@ -0,0 +1,87 @@
+"""
+Admin dashboard statistics - one aggregate query behind a short-TTL snapshot.
+
+Every count comes from a single statement: user totals in one pass over users,
+the workspace count, and tasks grouped by (workspace_id, status). The grouped
+rows give both the global tasks_by_status and the per-workspace breakdown, so
+tasks are scanned once (an index-only scan of ix_tasks_workspace_status_position
+on PostgreSQL) rather than once per status.
+
+The result is cached per worker for admin_stats_ttl_seconds. Nothing
+invalidates it: the dashboard tolerates numbers that are a few seconds old, and
+a burst of admins opening the page costs one query per worker per TTL.
+"""
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlalchemy import select, func, true
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from cache import TTLCache, MISSING
+from models import User, Workspace, Task
+from board import TASK_STATUSES
+from schemas import AdminStats, WorkspaceTaskStats
+
+settings = get_settings()
+
+TOP_WORKSPACES = 20  # Largest workspaces listed in the breakdown
+
+stats_cache = TTLCache(maxsize=1, ttl=settings.admin_stats_ttl_seconds)
+
+
+def compute_admin_stats(db: Session) -> AdminStats:
+    totals = select(
+        func.count(User.id).label("total_users"),
+        func.count(User.id).filter(User.is_active == True).label("active_users"),
+        select(func.count(Workspace.id)).scalar_subquery().label("total_workspaces"),
+    ).subquery()
+    per_status = (
+        select(Task.workspace_id, Task.status, func.count(Task.id).label("tasks"))
+        .group_by(Task.workspace_id, Task.status)
+        .subquery()
+    )
+    # Left join so the user counts still come back when there are no tasks
+    rows = db.execute(
+        select(totals, per_status.c.workspace_id, Workspace.name, per_status.c.status, per_status.c.tasks)
+        .select_from(totals)
+        .outerjoin(per_status, true())
+        .outerjoin(Workspace, Workspace.id == per_status.c.workspace_id)
+    ).all()
+
+    tasks_by_status = {status: 0 for status in TASK_STATUSES}
+    workspaces: Dict = {}
+    for row in rows:
+        if row.workspace_id is None:
+            continue
+        tasks_by_status[row.status] = tasks_by_status.get(row.status, 0) + row.tasks
+        ws = workspaces.get(row.workspace_id)
+        if ws is None:
+            ws = workspaces[row.workspace_id] = WorkspaceTaskStats(
+                workspace_id=row.workspace_id,
+                name=row.name,
+                total_tasks=0,
+                tasks_by_status={status: 0 for status in TASK_STATUSES}
+            )
+        ws.total_tasks += row.tasks
+        ws.tasks_by_status[row.status] = ws.tasks_by_status.get(row.status, 0) + row.tasks
+
+    first = rows[0]
+    return AdminStats(
+        total_users=first.total_users,
+        active_users=first.active_users,
+        total_workspaces=first.total_workspaces,
+        total_tasks=sum(tasks_by_status.values()),
+        tasks_by_status=tasks_by_status,
+        top_workspaces=sorted(workspaces.values(), key=lambda ws: ws.total_tasks, reverse=True)[:TOP_WORKSPACES],
+        computed_at=datetime.now(timezone.utc)
+    )
+
+
+def load_admin_stats(db: Session) -> AdminStats:
+    """The cached snapshot, recomputed once it is older than the TTL."""
+    stats = stats_cache.get("stats")
+    if stats is MISSING:
+        stats = compute_admin_stats(db)
+        stats_cache.set("stats", stats)
+    return stats
@@ -4,16 +4,26 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from cache import TTLCache, MISSING
 from config import get_settings
-from database import get_db
+from database import get_db, get_async_db
 from models import User
+import time
 import uuid
 
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Verified access token -> user id, and user id -> User column values. Both are
+# per worker and short-lived; invalidate_user_cache() drops a user's entries.
+token_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+user_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -44,6 +54,54 @@ def decode_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+def invalidate_user_cache(user_id) -> None:
+    user_id = uuid.UUID(str(user_id))
+    user_cache.pop(user_id)
+    token_cache.discard_values_where(lambda cached_id: cached_id == user_id)
+
+def auth_cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+def _token_user_id(token: str) -> Optional[uuid.UUID]:
+    """User id from a valid access token; decoded tokens are cached until they
+    expire or the cache TTL runs out, whichever is sooner."""
+    user_id = token_cache.get(token)
+    if user_id is not MISSING:
+        return user_id
+    
+    payload = decode_token(token)
+    if payload is None or payload.get("type") != "access" or payload.get("sub") is None:
+        return None
+    try:
+        user_id = uuid.UUID(payload["sub"])
+    except (TypeError, ValueError):
+        return None
+    
+    ttl = min(settings.auth_cache_ttl_seconds, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+def _load_user(db: Session, user_id: uuid.UUID) -> Optional[User]:
+    """Active user attached to `db`, rebuilt from cached column values when
+    possible so that authenticating doesn't hit the users table."""
+    values = user_cache.get(user_id)
+    if values is MISSING:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None or not user.is_active:
+            return None
+        user_cache.set(user_id, {key: getattr(user, key) for key in USER_COLUMNS})
+        return user
+    
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def authenticate_token(db: Session, token: str) -> Optional[User]:
+    """Active user for an access token, or None."""
+    user_id = _token_user_id(token)
+    return _load_user(db, user_id) if user_id else None
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -54,22 +112,26 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None or payload.get("type") != "access":
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None or not user.is_active:
+    user = authenticate_token(db, credentials.credentials)
+    if user is None:
         raise credentials_exception
     
     return user
 
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async routes; the user is attached to the AsyncSession."""
+    user = await db.run_sync(authenticate_token, credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
 async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_admin:
         raise HTTPException(
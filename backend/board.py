@@ -0,0 +1,256 @@
+"""
+Board read path - builds TaskResponse payloads for many tasks at once.
+
+Tasks are loaded together with their project and assignee in a single joined
+query, and their comment counts plus latest-comment previews in one more
+query, so the number of round trips stays fixed no matter how large the board
+is. Full comment threads are paged separately (load_comment_page).
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.orm import Session, aliased
+
+from models import Task, Project, User, TaskUpdate
+from schemas import TaskResponse, TaskUpdateResponse, TaskPage, TaskUpdatePage
+
+TASK_STATUSES = ("todo", "in_progress", "done", "archived")
+MAX_PAGE_SIZE = 200
+MAX_COMMENT_PAGE_SIZE = 100
+PREVIEW_LENGTH = 140
+
+Assignee = aliased(User)
+Author = aliased(User)
+
+
+def task_rows_query():
+    """SELECT tasks with project name/color and assignee name (outer joins)."""
+    return (
+        select(Task, Project.name, Project.color, Assignee.display_name)
+        .outerjoin(Project, Project.id == Task.project_id)
+        .outerjoin(Assignee, Assignee.id == Task.assigned_to)
+    )
+
+
+def comment_stats_query(task_ids: Sequence):
+    """Per-task comment count plus the newest comment (truncated) and its author.
+
+    Yields (task_id, comment_count, id, user_id, content_preview, created_at, user_name)
+    for every task in task_ids that has at least one comment.
+    """
+    ranked = (
+        select(
+            TaskUpdate.id,
+            TaskUpdate.task_id,
+            func.count(TaskUpdate.id).over(partition_by=TaskUpdate.task_id).label("comment_count"),
+            func.row_number().over(
+                partition_by=TaskUpdate.task_id,
+                order_by=(TaskUpdate.created_at.desc(), TaskUpdate.id.desc())
+            ).label("rn"),
+        )
+        .where(TaskUpdate.task_id.in_(task_ids))
+        .subquery()
+    )
+    return (
+        select(
+            ranked.c.task_id,
+            ranked.c.comment_count,
+            TaskUpdate.id,
+            TaskUpdate.user_id,
+            func.substr(TaskUpdate.content, 1, PREVIEW_LENGTH + 1),
+            TaskUpdate.created_at,
+            Author.display_name,
+        )
+        .join(TaskUpdate, TaskUpdate.id == ranked.c.id)
+        .outerjoin(Author, Author.id == TaskUpdate.user_id)
+        .where(ranked.c.rn == 1)
+    )
+
+
+def task_updates_query(task_id):
+    """SELECT a task's comments (with author name), newest first."""
+    return (
+        select(TaskUpdate, Author.display_name)
+        .outerjoin(Author, Author.id == TaskUpdate.user_id)
+        .where(TaskUpdate.task_id == task_id)
+        .order_by(TaskUpdate.created_at.desc(), TaskUpdate.id.desc())
+    )
+
+
+def build_update_response(update: TaskUpdate, user_name) -> TaskUpdateResponse:
+    return TaskUpdateResponse(
+        id=update.id,
+        user_id=update.user_id,
+        user_name=user_name,
+        content=update.content,
+        created_at=update.created_at
+    )
+
+
+def build_task_response(task: Task, project_name=None, project_color=None, assigned_to_name=None,
+                        comment_count: int = 0, latest_update: Optional[TaskUpdateResponse] = None) -> TaskResponse:
+    return TaskResponse(
+        id=task.id,
+        workspace_id=task.workspace_id,
+        project_id=task.project_id,
+        project_name=project_name,
+        project_color=project_color,
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        priority=task.priority,
+        blocked=task.blocked or False,
+        block_reason=task.block_reason,
+        on_hold=task.on_hold or False,
+        hold_reason=task.hold_reason,
+        due_date=task.due_date,
+        position=task.position,
+        created_by=task.created_by,
+        assigned_to=task.assigned_to,
+        assigned_to_name=assigned_to_name,
+        comment_count=comment_count,
+        latest_update=latest_update,
+        created_at=task.created_at,
+        updated_at=task.updated_at
+    )
+
+
+def build_task_responses(task_rows, stats_rows) -> List[TaskResponse]:
+    """Assemble responses from the rows of task_rows_query / comment_stats_query."""
+    stats: Dict = {}
+    for task_id, comment_count, update_id, user_id, preview, created_at, user_name in stats_rows:
+        if len(preview) > PREVIEW_LENGTH:
+            preview = preview[:PREVIEW_LENGTH].rstrip() + "..."
+        stats[task_id] = (comment_count, TaskUpdateResponse(
+            id=update_id,
+            user_id=user_id,
+            user_name=user_name,
+            content=preview,
+            created_at=created_at
+        ))
+
+    return [
+        build_task_response(task, project_name, project_color, assigned_to_name, *stats.get(task.id, (0, None)))
+        for task, project_name, project_color, assigned_to_name in task_rows
+    ]
+
+
+def load_stats_rows(db: Session, task_rows) -> list:
+    if not task_rows:
+        return []
+    return db.execute(comment_stats_query([row[0].id for row in task_rows])).all()
+
+
+def load_tasks(db: Session, stmt) -> List[TaskResponse]:
+    """Run a task_rows_query()-based statement and return TaskResponses (2 queries max)."""
+    task_rows = db.execute(stmt).all()
+    return build_task_responses(task_rows, load_stats_rows(db, task_rows))
+
+
+def load_task(db: Session, task_id) -> TaskResponse:
+    responses = load_tasks(db, task_rows_query().where(Task.id == task_id))
+    return responses[0] if responses else None
+
+
+def load_board(db: Session, workspace_id) -> List[TaskResponse]:
+    """Full board snapshot for a workspace, ordered by position."""
+    stmt = task_rows_query().where(Task.workspace_id == workspace_id).order_by(Task.position, Task.id)
+    return load_tasks(db, stmt)
+
+
+# ==================== COLUMN PAGINATION ====================
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque keyset cursor (urlsafe base64 of a JSON array)."""
+    raw = json.dumps([str(v) if not isinstance(v, (int, float)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of encode_cursor. Raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def load_column_page(db: Session, workspace_id, status: str, limit: int,
+                     cursor: Optional[str] = None, total: Optional[int] = None) -> TaskPage:
+    """One page of a status column, keyset-paginated on (position, id)."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = task_rows_query().where(Task.workspace_id == workspace_id, Task.status == status)
+    if cursor:
+        position, task_id = decode_cursor(cursor)
+        try:
+            position, task_id = float(position), uuid.UUID(task_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        stmt = stmt.where(tuple_(Task.position, Task.id) > tuple_(position, task_id))
+    stmt = stmt.order_by(Task.position, Task.id).limit(limit + 1)
+
+    task_rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(task_rows) > limit:
+        task_rows = task_rows[:limit]
+        last = task_rows[-1][0]
+        next_cursor = encode_cursor([last.position, last.id])
+
+    items = build_task_responses(task_rows, load_stats_rows(db, task_rows))
+    return TaskPage(items=items, next_cursor=next_cursor, total=total)
+
+
+def column_counts(db: Session, workspace_id) -> Dict[str, int]:
+    """Task count per status column in one GROUP BY."""
+    rows = db.execute(
+        select(Task.status, func.count(Task.id))
+        .where(Task.workspace_id == workspace_id)
+        .group_by(Task.status)
+    ).all()
+    counts = {status: 0 for status in TASK_STATUSES}
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def load_board_page(db: Session, workspace_id, limit: int) -> Dict[str, TaskPage]:
+    """First page of every status column plus per-column totals."""
+    counts = column_counts(db, workspace_id)
+    return {
+        status: load_column_page(db, workspace_id, status, limit, total=counts[status])
+        for status in TASK_STATUSES
+    }
+
+
+# ==================== COMMENT PAGINATION ====================
+
+def load_comment_page(db: Session, task_id, limit: int, cursor: Optional[str] = None) -> TaskUpdatePage:
+    """One page of a task's comments, newest first, keyset-paginated on (created_at, id)."""
+    limit = max(1, min(limit, MAX_COMMENT_PAGE_SIZE))
+    stmt = task_updates_query(task_id)
+    if cursor:
+        created_at, update_id = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            update_id = uuid.UUID(update_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        stmt = stmt.where(tuple_(TaskUpdate.created_at, TaskUpdate.id) < tuple_(created_at, update_id))
+    rows = db.execute(stmt.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
+
+    return TaskUpdatePage(
+        items=[build_update_response(update, user_name) for update, user_name in rows],
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,101 @@
+"""
+Delta sync - what changed in a workspace since a version the client has seen.
+
+Tasks, projects and comments carry change_seq, the workspace version (see
+versions.py) of the transaction that last wrote them; deletes leave a tombstone
+stamped the same way. A client keeps the version from its last board load or
+delta and asks for everything after it: tasks and projects changed since, the
+comments written since on those tasks, the ids deleted since, and the column
+totals (a client can't tell a moved card it never loaded from a new one).
+
+A client that is up to date costs one primary-key lookup. The answer is
+`reset` (reload everything) when the client's version is older than the
+tombstones still kept (maintenance purges them after tombstone_retention_days),
+newer than the workspace (the database was restored), or when more tasks
+changed than a full reload would cost.
+"""
+from typing import List, Union
+
+from sqlalchemy import select, literal, func, String
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from models import Task, Project, TaskUpdate, Tombstone, WorkspaceVersion
+from board import task_rows_query, build_task_responses, load_stats_rows, build_update_response, column_counts, Author
+from schemas import WorkspaceChanges, ProjectResponse, CommentChange, DeletedEntity
+from versions import touch_workspace
+
+MAX_CHANGED_TASKS = 500
+
+
+def record_deletes(db: Session, workspace_id, entity_type: str, entity_ids: Union[List, Select]) -> None:
+    """Tombstone deleted entities (a list of ids, or a SELECT of ids) at the transaction's version."""
+    seq = touch_workspace(db, workspace_id)
+    if not isinstance(entity_ids, Select):
+        if not entity_ids:
+            return
+        db.add_all([
+            Tombstone(workspace_id=workspace_id, entity_type=entity_type, entity_id=entity_id, change_seq=seq)
+            for entity_id in entity_ids
+        ])
+        return
+    ids = entity_ids.subquery()
+    db.execute(
+        Tombstone.__table__.insert().from_select(
+            ["id", "workspace_id", "entity_type", "entity_id", "change_seq"],
+            select(func.gen_random_uuid(), literal(workspace_id), literal(entity_type, String), ids.c[0], literal(seq))
+        )
+    )
+
+
+def load_changes(db: Session, workspace_id, since: int) -> WorkspaceChanges:
+    # Read the version first: anything committed after it is either included
+    # below or picked up by the next delta, never skipped
+    row = db.execute(
+        select(WorkspaceVersion.version, WorkspaceVersion.purged_seq)
+        .where(WorkspaceVersion.workspace_id == workspace_id)
+    ).first()
+    version, purged_seq = row if row else (0, 0)
+    if since > version or since < purged_seq:
+        return WorkspaceChanges(version=version, reset=True)
+    if since == version:
+        return WorkspaceChanges(version=version)
+
+    task_rows = db.execute(
+        task_rows_query()
+        .where(Task.workspace_id == workspace_id, Task.change_seq > since)
+        .order_by(Task.change_seq)
+        .limit(MAX_CHANGED_TASKS + 1)
+    ).all()
+    if len(task_rows) > MAX_CHANGED_TASKS:
+        return WorkspaceChanges(version=version, reset=True)
+
+    projects = db.scalars(
+        select(Project).where(Project.workspace_id == workspace_id, Project.change_seq > since)
+    ).all()
+    # Writing a comment also stamps its task, so new comments are on changed tasks
+    comments = []
+    if task_rows:
+        comments = db.execute(
+            select(TaskUpdate, Author.display_name)
+            .outerjoin(Author, Author.id == TaskUpdate.user_id)
+            .where(TaskUpdate.task_id.in_([task_row[0].id for task_row in task_rows]), TaskUpdate.change_seq > since)
+            .order_by(TaskUpdate.created_at, TaskUpdate.id)
+        ).all()
+    deleted = db.execute(
+        select(Tombstone.entity_type, Tombstone.entity_id)
+        .where(Tombstone.workspace_id == workspace_id, Tombstone.change_seq > since)
+        .order_by(Tombstone.change_seq)
+    ).all()
+
+    return WorkspaceChanges(
+        version=version,
+        tasks=build_task_responses(task_rows, load_stats_rows(db, task_rows)),
+        projects=[ProjectResponse.model_validate(project) for project in projects],
+        comments=[
+            CommentChange(task_id=update.task_id, **build_update_response(update, user_name).model_dump())
+            for update, user_name in comments
+        ],
+        deleted=[DeletedEntity(entity_type=entity_type, id=entity_id) for entity_type, entity_id in deleted],
+        totals=column_counts(db, workspace_id),
+    )
@@ -4,6 +4,16 @@ from functools import lru_cache
 class Settings(BaseSettings):
     # Database
     database_url: str = "postgresql://kanban:kanban@db:5432/kanban"
+    db_auto_migrate: bool = True  # Run Alembic migrations (upgrade head) at startup
+    db_async: bool = False  # Serve the hot routes (board, tasks, notifications) from an asyncio engine
+    async_database_url: str = ""  # Defaults to database_url with the asyncpg driver
+    
+    # Connection pool (per worker and per engine: workers * (size + overflow) must fit max_connections)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Seconds to wait for a connection before erroring
+    db_pool_recycle: int = 1800  # Replace connections older than this (seconds, -1 = never)
+    db_pool_pre_ping: bool = True  # Test connections on checkout (survives DB restarts)
     
     # JWT
     secret_key: str = "change-this-to-a-random-secret-key"
@@ -20,6 +30,57 @@ class Settings(BaseSettings):
     # Email templates
     email_company_name: str = ""  # e.g., "Cristian from Acme Corp"
     
+    # Board
+    board_page_size: int = 50  # Tasks per column page on the workspace board
+    comment_page_size: int = 20  # Comments per page in the task modal
+    search_page_size: int = 20  # Hits per page of /api/search
+    admin_page_size: int = 50  # Rows per page of the admin user and workspace lists
+    member_page_size: int = 100  # Members per page of a workspace's member list
+    task_rank_rebalance_seconds: float = 10  # How often the maintenance thread renumbers columns with dense ranks
+    
+    # Authenticated-user cache (per worker; user edits/logout evict it locally)
+    auth_cache_ttl_seconds: int = 30
+    auth_cache_size: int = 10000
+    
+    # Access control cache (per worker; membership changes invalidate it locally)
+    access_cache_ttl_seconds: int = 30
+    access_cache_size: int = 10000
+    
+    # Admin dashboard stats snapshot (per worker; not invalidated, served stale up to the TTL)
+    admin_stats_ttl_seconds: int = 30
+    
+    # Cached site_settings: seconds between version checks for changes made by other workers
+    site_settings_check_seconds: float = 5
+    
+    # Realtime (WebSocket/SSE): "local" fans out within one worker, "postgres" uses LISTEN/NOTIFY across workers
+    realtime_backend: str = "local"
+    realtime_queue_size: int = 100  # Per-connection backlog before the client is told to resync
+    realtime_ping_seconds: float = 25
+    realtime_retry_ms: int = 3000  # SSE reconnect delay advertised to browsers
+    
+    # Outbound email (queued in email_outbox, sent by a background dispatcher per worker)
+    email_dispatcher_enabled: bool = True
+    email_batch_size: int = 20  # Messages claimed and sent per SMTP round
+    email_poll_seconds: float = 5  # Idle poll interval; commits in the same worker wake it sooner
+    email_max_attempts: int = 6
+    email_retry_base_seconds: int = 30  # Backoff: base * 2^(attempt-1), capped below
+    email_retry_max_seconds: int = 3600
+    email_lease_seconds: int = 300  # A claimed message is retried after this if its worker died (at least batch_size * 2 * smtp_timeout)
+    email_smtp_timeout_seconds: int = 30
+    email_smtp_idle_seconds: int = 60  # Close the pooled SMTP connection after this much idle time
+    
+    # Maintenance jobs (background thread per worker): retention purges and counter repair
+    maintenance_enabled: bool = True
+    maintenance_interval_seconds: float = 3600  # Between retention purges
+    maintenance_batch_size: int = 1000  # Rows deleted per transaction
+    maintenance_batch_pause_seconds: float = 0.05  # Gap between batches so other writers get the locks
+    notification_read_retention_days: int = 7
+    notification_unread_retention_days: int = 30
+    tombstone_retention_days: int = 30  # Delete records kept for delta sync; older clients reload the board
+    activity_retention_days: int = 365  # Drop activity_log months older than this (0 = keep forever)
+    activity_partition_months_ahead: int = 3  # Monthly activity_log partitions created in advance
+    notification_reconcile_seconds: float = 3600  # Between recounts of unread notification counters
+    
     # Registration
     allow_registration: bool = True  # Set to false after creating admin
     first_user_is_admin: bool = True  # First registered user becomes admin
@@ -1,10 +1,20 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config import get_settings
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+POOL_OPTIONS = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+
+engine = create_engine(settings.database_url, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -13,3 +23,26 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async engine (DB_ASYNC=true). The remaining sync routes keep using `engine`.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def get_async_database_url() -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    scheme, rest = settings.database_url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.db_async:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(get_async_database_url(), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+    instrument(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,257 @@
+"""
+Outbound email.
+
+Routes never talk to SMTP. enqueue_email() adds a row to email_outbox in the
+caller's transaction, so the message is durable exactly when the change that
+triggered it commits. EmailDispatcher, a background thread started with the
+app, claims due messages in batches and sends them over one authenticated SMTP
+connection that is kept open between batches. Failed sends are retried with
+exponential backoff until email_max_attempts, after which the row is marked
+"failed" with the last error.
+
+Several workers may run a dispatcher: claiming uses FOR UPDATE SKIP LOCKED and a
+lease (next_attempt_at pushed into the future), so a message that was claimed by
+a worker that then died is picked up again once the lease expires. Each send's
+result is committed as soon as it is known, so only the message in flight can
+be sent twice, and the lease outlasts a batch of timeouts (lease_seconds()).
+"""
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from sqlalchemy import event, select, update, func, or_
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import EmailOutbox
+from site_settings import SMTPConfig, site_settings
+
+settings = get_settings()
+
+# Recipient-level rejections won't succeed on retry
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, text_body: str, html_body: Optional[str] = None) -> bool:
+    """Queue a message for the dispatcher. Doesn't commit - the caller's commit
+    makes it visible. Returns False (and queues nothing) if SMTP isn't configured."""
+    if not site_settings.get(db).smtp.configured:
+        print(f"SMTP not configured - email to {to_email} not queued")
+        return False
+
+    db.add(EmailOutbox(to_email=to_email, subject=subject, text_body=text_body, html_body=html_body,
+                       next_attempt_at=datetime.utcnow()))
+    # Wake this worker's dispatcher as soon as the message is committed
+    if not db.info.get("email_wake_registered"):
+        db.info["email_wake_registered"] = True
+
+        @event.listens_for(db, "after_commit", once=True)
+        def wake_dispatcher(session):
+            session.info.pop("email_wake_registered", None)
+            dispatcher.wake()
+    return True
+
+
+def lease_seconds() -> int:
+    """How long a claimed batch stays leased: long enough for every message in
+    it to time out on both connect and send."""
+    return max(settings.email_lease_seconds,
+               settings.email_batch_size * 2 * settings.email_smtp_timeout_seconds)
+
+
+def build_message(message: EmailOutbox, smtp: SMTPConfig) -> str:
+    if message.html_body:
+        mime = MIMEMultipart('alternative')
+        mime.attach(MIMEText(message.text_body, 'plain'))
+        mime.attach(MIMEText(message.html_body, 'html'))
+    else:
+        mime = MIMEText(message.text_body)
+    mime['Subject'] = message.subject
+    mime['From'] = f"{smtp.from_name} <{smtp.sender}>"
+    mime['To'] = message.to_email
+    return mime.as_string()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter, capped at email_retry_max_seconds."""
+    delay = min(settings.email_retry_base_seconds * (2 ** (attempts - 1)), settings.email_retry_max_seconds)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SMTPConnection:
+    """One reusable, logged-in SMTP connection. Reconnects when the settings
+    change, the server drops it, or it sat idle longer than email_smtp_idle_seconds."""
+
+    def __init__(self):
+        self.server: Optional[smtplib.SMTP] = None
+        self.config: Optional[SMTPConfig] = None
+        self.last_used = 0.0
+
+    def get(self, smtp: SMTPConfig) -> smtplib.SMTP:
+        if self.server is not None:
+            idle = time.monotonic() - self.last_used
+            if smtp != self.config or idle > settings.email_smtp_idle_seconds or not self._alive():
+                self.close()
+        if self.server is None:
+            self.server = self._connect(smtp)
+            self.config = smtp
+        self.last_used = time.monotonic()
+        return self.server
+
+    def _alive(self) -> bool:
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _connect(self, smtp: SMTPConfig) -> smtplib.SMTP:
+        server = smtplib.SMTP(smtp.host, smtp.port, timeout=settings.email_smtp_timeout_seconds)
+        if smtp.use_tls:
+            server.starttls()
+        if smtp.user and smtp.password:
+            server.login(smtp.user, smtp.password)
+        return server
+
+    def close_if_idle(self) -> None:
+        if self.server is not None and time.monotonic() - self.last_used > settings.email_smtp_idle_seconds:
+            self.close()
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.server = None
+
+
+class EmailDispatcher:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connection = SMTPConnection()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.connection.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keep draining while full batches come back
+                while not self._stop.is_set() and self.dispatch_batch() == settings.email_batch_size:
+                    pass
+            except Exception as e:
+                print(f"Email dispatcher error: {e}")
+            self.connection.close_if_idle()
+            self._wake.wait(settings.email_poll_seconds)
+            self._wake.clear()
+
+    def claim_batch(self, db: Session) -> list:
+        now = datetime.utcnow()
+        ids = db.execute(
+            select(EmailOutbox.id)
+            .where(
+                or_(EmailOutbox.status == "pending", EmailOutbox.status == "sending"),
+                EmailOutbox.next_attempt_at <= now
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(settings.email_batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            db.rollback()
+            return []
+        # Lease: if this worker dies mid-batch the rows become due again
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids))
+            .values(status="sending", attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=lease_seconds()))
+        )
+        db.commit()
+        messages = db.execute(select(EmailOutbox).where(EmailOutbox.id.in_(ids))).scalars().all()
+        db.commit()  # don't hold a transaction open through the SMTP round
+        return messages
+
+    def dispatch_batch(self) -> int:
+        """Send one batch of due messages; returns how many were claimed."""
+        # Loaded messages keep their attributes across the per-message commits
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            messages = self.claim_batch(db)
+            if not messages:
+                return 0
+            smtp = site_settings.get(db).smtp
+            db.commit()
+            for message in messages:
+                self._send(message, smtp)
+                # Record each result as soon as it's known, so a worker that
+                # dies mid-batch only resends the message it was on
+                db.commit()
+            return len(messages)
+        finally:
+            db.close()
+
+    def _send(self, message: EmailOutbox, smtp: SMTPConfig) -> None:
+        try:
+            if not smtp.configured:
+                raise RuntimeError("SMTP not configured")
+            server = self.connection.get(smtp)
+            server.sendmail(smtp.sender, [message.to_email], build_message(message, smtp))
+        except Exception as e:
+            if not isinstance(e, PERMANENT_ERRORS):
+                # The connection may be what broke; reconnect for the next message
+                self.connection.close()
+            message.last_error = str(e)[:1000]
+            if isinstance(e, PERMANENT_ERRORS) or message.attempts >= settings.email_max_attempts:
+                message.status = "failed"
+                self.failed += 1
+                print(f"Giving up on email to {message.to_email}: {e}")
+            else:
+                message.status = "pending"
+                message.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(message.attempts))
+                self.retried += 1
+            return
+        message.status = "sent"
+        message.sent_at = datetime.utcnow()
+        message.last_error = None
+        self.sent += 1
+
+    def stats(self, db: Session) -> dict:
+        counts = dict(db.execute(
+            select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status)
+        ).all())
+        return {
+            "queue": {status: counts.get(status, 0) for status in ("pending", "sending", "sent", "failed")},
+            "worker": {"running": self._thread is not None, "sent": self.sent,
+                       "retried": self.retried, "failed": self.failed},
+        }
+
+
+dispatcher = EmailDispatcher()
@@ -1,24 +1,59 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import text, select, union, case, update as sql_update
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
 import uuid
 
 from config import get_settings
-from database import get_db, engine
-from models import Base, User, Workspace, WorkspaceMember, Project, Task, TaskUpdate, ActivityLog, Session as DBSession, Notification
+from database import get_db, get_async_db, engine, async_engine, SessionLocal
+from pool_metrics import pool_snapshots
+from migrate import upgrade_database
+from mailer import enqueue_email, dispatcher as email_dispatcher
+from site_settings import site_settings
+from notifications import fan_out, notify_many, get_unread, adjust_unread
+from maintenance import scheduler as maintenance_scheduler
+from versions import touch_workspace, touch_user_workspaces, workspace_version, workspace_etag, make_etag, not_modified
+from changes import load_changes, record_deletes
+from search import search
+from activity import load_activity_page
+from admin_stats import load_admin_stats, stats_cache as admin_stats_cache
+from admin_lists import load_user_page, load_workspace_page
+from members import load_member_page
+from ranking import next_rank, place_task, append_tasks, lock_column
+from realtime import (
+    hub, emit, emit_workspace, emit_user, pump_websocket, stream_events, workspace_channel, user_channel,
+    PostgresListener, RESYNC
+)
+from models import User, Workspace, WorkspaceMember, Project, Task, TaskUpdate, ActivityLog, Session as DBSession, Notification
 from schemas import *
+from board import (
+    TASK_STATUSES, build_task_response, build_update_response, load_board, load_board_page,
+    load_column_page, load_comment_page, load_task, load_tasks, task_rows_query
+)
+from workspaces import load_user_workspaces, load_workspace_summary, user_workspaces_etag
+from access import (
+    check_workspace_access, require_workspace_role, workspace_reader,
+    invalidate_membership, invalidate_workspace, invalidate_user, role_cache
+)
 from auth import (
     get_password_hash, verify_password, create_access_token, create_refresh_token,
-    decode_token, get_current_user, get_current_admin
+    decode_token, get_current_user, get_current_user_async, get_current_admin, authenticate_token,
+    invalidate_user_cache, auth_cache_stats
 )
 
 settings = get_settings()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (Alembic revisions in migrations/)
+if settings.db_auto_migrate:
+    upgrade_database(engine)
 
 app = FastAPI(title=settings.app_name, version="2.0.0")
 
@@ -31,6 +66,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+realtime_listener = PostgresListener(engine)
+
+@app.on_event("startup")
+async def start_background_workers():
+    hub.bind(asyncio.get_running_loop())
+    if settings.realtime_backend == "postgres":
+        realtime_listener.start()
+    if settings.email_dispatcher_enabled:
+        email_dispatcher.start()
+    if settings.maintenance_enabled:
+        maintenance_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    email_dispatcher.stop()
+    maintenance_scheduler.stop()
+    realtime_listener.stop()
+
 # Helper to log activity
 def log_activity(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID, action: str, 
                  entity_type: str = None, entity_id: uuid.UUID = None, details: dict = None):
@@ -44,15 +97,11 @@ def log_activity(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID, actio
     )
     db.add(log)
 
-# Helper to get effective from_email (falls back to smtp_user if from_email is empty)
-def get_from_email(settings: dict) -> str:
-    return settings.get('smtp_from_email') or settings.get('smtp_user', '')
-
 # Helper to get base URL from site_settings (with fallback to config)
 def get_base_url(db: Session) -> str:
-    row = db.execute(text("SELECT value FROM site_settings WHERE key = 'app_base_url'")).fetchone()
-    if row and row[0]:
-        return row[0]
+    app_base_url = site_settings.get(db).app_base_url
+    if app_base_url:
+        return app_base_url
     # Fallback to config settings
     settings = get_settings()
     return settings.public_url or settings.frontend_url
@@ -156,6 +205,7 @@ def refresh_token(request: RefreshRequest, db: Session = Depends(get_db)):
 def logout(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     db.query(DBSession).filter(DBSession.user_id == current_user.id).delete()
     db.commit()
+    invalidate_user_cache(current_user.id)
     return {"message": "Logged out successfully"}
 
 @app.get("/api/auth/me", response_model=UserResponse)
@@ -168,58 +218,23 @@ def get_me(current_user: User = Depends(get_current_user)):
 def update_me(update: UserUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if update.display_name is not None:
         current_user.display_name = update.display_name
+        touch_user_workspaces(db, current_user.id)
     if update.theme is not None:
         current_user.theme = update.theme
     db.commit()
     db.refresh(current_user)
+    invalidate_user_cache(current_user.id)
     return current_user
 
 # ==================== WORKSPACE ROUTES ====================
 
 @app.get("/api/workspaces", response_model=List[WorkspaceResponse])
-def get_workspaces(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Guests only see workspaces they're invited to
-    if current_user.is_guest:
-        workspaces = db.query(Workspace).join(WorkspaceMember).filter(
-            WorkspaceMember.user_id == current_user.id
-        ).all()
-    else:
-        # Regular users see owned + member workspaces
-        owned = db.query(Workspace).filter(Workspace.owner_id == current_user.id).all()
-        member_of = db.query(Workspace).join(WorkspaceMember).filter(
-            WorkspaceMember.user_id == current_user.id
-        ).all()
-        workspaces = list(set(owned + member_of))
-    
-    result = []
-    for ws in workspaces:
-        owner = db.query(User).filter(User.id == ws.owner_id).first()
-        member_count = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == ws.id).count() + 1
-        task_count = db.query(Task).filter(Task.workspace_id == ws.id).count()
-        
-        # Get user's display_order for this workspace
-        membership = db.query(WorkspaceMember).filter(
-            WorkspaceMember.workspace_id == ws.id,
-            WorkspaceMember.user_id == current_user.id
-        ).first()
-        display_order = membership.display_order if membership else 0
-        
-        result.append(WorkspaceResponse(
-            id=ws.id,
-            name=ws.name,
-            description=ws.description,
-            color=ws.color,
-            owner_id=ws.owner_id,
-            owner_name=owner.display_name if owner else "Unknown",
-            member_count=member_count,
-            task_count=task_count,
-            display_order=display_order,
-            created_at=ws.created_at
-        ))
-    
-    # Sort by display_order
-    result.sort(key=lambda x: x.display_order)
-    return result
+def get_workspaces(request: Request, response: Response, current_user: User = Depends(get_current_user),
+                   db: Session = Depends(get_db)):
+    cached = not_modified(request, response, user_workspaces_etag(db, current_user))
+    if cached:
+        return cached
+    return load_user_workspaces(db, current_user)
 
 @app.post("/api/workspaces", response_model=WorkspaceResponse)
 def create_workspace(workspace: WorkspaceCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -238,6 +253,7 @@ def create_workspace(workspace: WorkspaceCreate, current_user: User = Depends(ge
     db.refresh(db_workspace)
     
     log_activity(db, current_user.id, db_workspace.id, "workspace_created", "workspace", db_workspace.id, {"name": workspace.name})
+    touch_workspace(db, db_workspace.id)
     db.commit()
     
     return WorkspaceResponse(
@@ -252,54 +268,17 @@ def create_workspace(workspace: WorkspaceCreate, current_user: User = Depends(ge
         created_at=db_workspace.created_at
     )
 
-@app.get("/api/workspaces/{workspace_id}")
-def get_workspace(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check access
-    is_owner = workspace.owner_id == current_user.id
-    is_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first() is not None
-    
-    if not is_owner and not is_member and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    owner = db.query(User).filter(User.id == workspace.owner_id).first()
-    member_count = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace.id).count() + 1
-    task_count = db.query(Task).filter(Task.workspace_id == workspace.id).count()
-    
-    return WorkspaceResponse(
-        id=workspace.id,
-        name=workspace.name,
-        description=workspace.description,
-        color=workspace.color,
-        owner_id=workspace.owner_id,
-        owner_name=owner.display_name if owner else "Unknown",
-        member_count=member_count,
-        task_count=task_count,
-        created_at=workspace.created_at
-    )
+@app.get("/api/workspaces/{workspace_id}", dependencies=[Depends(workspace_reader)])
+def get_workspace(workspace_id: uuid.UUID, request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, workspace_etag(db, workspace_id, "workspace"))
+    if cached:
+        return cached
+    return load_workspace_summary(db, workspace_id)
 
-@app.put("/api/workspaces/{workspace_id}", response_model=WorkspaceResponse)
+@app.put("/api/workspaces/{workspace_id}", response_model=WorkspaceResponse,
+         dependencies=[Depends(require_workspace_role("editor", "Only owner or editor can update workspace"))])
 def update_workspace(workspace_id: uuid.UUID, update: WorkspaceUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check if owner or editor
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Only owner or editor can update workspace")
     
     if update.name is not None:
         workspace.name = update.name
@@ -312,23 +291,10 @@ def update_workspace(workspace_id: uuid.UUID, update: WorkspaceUpdate, current_u
     db.refresh(workspace)
     
     log_activity(db, current_user.id, workspace_id, "workspace_updated", "workspace", workspace_id)
+    touch_workspace(db, workspace_id)
     db.commit()
     
-    owner = db.query(User).filter(User.id == workspace.owner_id).first()
-    member_count = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace.id).count() + 1
-    task_count = db.query(Task).filter(Task.workspace_id == workspace.id).count()
-    
-    return WorkspaceResponse(
-        id=workspace.id,
-        name=workspace.name,
-        description=workspace.description,
-        color=workspace.color,
-        owner_id=workspace.owner_id,
-        owner_name=owner.display_name if owner else "Unknown",
-        member_count=member_count,
-        task_count=task_count,
-        created_at=workspace.created_at
-    )
+    return load_workspace_summary(db, workspace_id)
 
 @app.delete("/api/workspaces/{workspace_id}")
 def delete_workspace(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -341,6 +307,7 @@ def delete_workspace(workspace_id: uuid.UUID, current_user: User = Depends(get_c
     
     db.delete(workspace)
     db.commit()
+    invalidate_workspace(workspace_id)
     return {"message": "Workspace deleted"}
 
 @app.put("/api/workspaces/reorder")
@@ -372,65 +339,23 @@ def reorder_workspaces(order: List[uuid.UUID], current_user: User = Depends(get_
 
 # ==================== WORKSPACE MEMBERS ====================
 
-@app.get("/api/workspaces/{workspace_id}/members", response_model=List[WorkspaceMemberResponse])
-def get_workspace_members(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check access
-    is_owner = workspace.owner_id == current_user.id
-    is_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first() is not None
-    
-    if not is_owner and not is_member and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Get owner
-    owner = db.query(User).filter(User.id == workspace.owner_id).first()
-    result = [WorkspaceMemberResponse(
-        id=uuid.uuid4(),  # Fake ID for owner
-        user_id=owner.id,
-        user_email=owner.email,
-        user_name=owner.display_name,
-        role="owner",
-        created_at=workspace.created_at
-    )]
-    
-    # Get members
-    members = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace_id).all()
-    for m in members:
-        user = db.query(User).filter(User.id == m.user_id).first()
-        if user:
-            result.append(WorkspaceMemberResponse(
-                id=m.id,
-                user_id=m.user_id,
-                user_email=user.email,
-                user_name=user.display_name,
-                role=m.role,
-                created_at=m.created_at
-            ))
-    
-    return result
+@app.get("/api/workspaces/{workspace_id}/members", response_model=WorkspaceMemberPage, dependencies=[Depends(workspace_reader)])
+def get_workspace_members(workspace_id: uuid.UUID, request: Request, response: Response, limit: Optional[int] = None,
+                          cursor: Optional[str] = None, q: Optional[str] = None, db: Session = Depends(get_db)):
+    """Owner first, then members by name (keyset on display_name, id); q matches name or email"""
+    limit = limit or settings.member_page_size
+    cached = not_modified(request, response, workspace_etag(db, workspace_id, "members", limit, cursor, q))
+    if cached:
+        return cached
+    try:
+        return load_member_page(db, workspace_id, limit, cursor, q)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @app.post("/api/workspaces/{workspace_id}/members")
 def add_workspace_member(workspace_id: uuid.UUID, member: WorkspaceMemberAdd, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    check_workspace_access(db, current_user, workspace_id, "editor", "Only owner or editor can add members")
     workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check if owner or editor
-    is_owner = workspace.owner_id == current_user.id
-    existing_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = existing_member and existing_member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Only owner or editor can add members")
     
     # Check if user exists
     user = db.query(User).filter(User.id == member.user_id).first()
@@ -449,6 +374,15 @@ def add_workspace_member(workspace_id: uuid.UUID, member: WorkspaceMemberAdd, cu
     if member.user_id == workspace.owner_id:
         raise HTTPException(status_code=400, detail="User is the workspace owner")
     
+    # Notify existing workspace members about new member (before the new row exists)
+    notify_workspace_members(
+        db, workspace_id, current_user.id,
+        "member_joined",
+        f"{user.display_name} joined {workspace.name}",
+        f"{user.display_name} was added to the workspace by {current_user.display_name}",
+        {"workspace_id": str(workspace_id), "workspace_name": workspace.name, "user_name": user.display_name, "actor_name": current_user.display_name}
+    )
+    
     db_member = WorkspaceMember(
         workspace_id=workspace_id,
         user_id=member.user_id,
@@ -458,19 +392,9 @@ def add_workspace_member(workspace_id: uuid.UUID, member: WorkspaceMemberAdd, cu
     db.add(db_member)
     
     log_activity(db, current_user.id, workspace_id, "member_added", "user", member.user_id, {"role": member.role, "user_email": user.email})
+    touch_workspace(db, workspace_id)
     
-    # Notify existing workspace members about new member
-    notify_workspace_members(
-        db, workspace_id, current_user.id,
-        "member_joined",
-        f"{user.display_name} joined {workspace.name}",
-        f"{user.display_name} was added to the workspace by {current_user.display_name}",
-        {"workspace_id": str(workspace_id), "workspace_name": workspace.name, "user_name": user.display_name, "actor_name": current_user.display_name}
-    )
-    
-    db.commit()
-    
-    # Send notification email
+    # Queue notification email (sent by the dispatcher once this commits)
     workspace_url = f"{get_base_url(db)}/workspace/{workspace_id}"
     send_workspace_added_email(
         user.email, 
@@ -482,18 +406,24 @@ def add_workspace_member(workspace_id: uuid.UUID, member: WorkspaceMemberAdd, cu
         db
     )
     
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent add (uq_workspace_members_workspace_user)
+        db.rollback()
+        raise HTTPException(status_code=400, detail="User is already a member")
+    invalidate_membership(member.user_id, workspace_id)
+    
     return {"message": "Member added successfully"}
 
 @app.put("/api/workspaces/{workspace_id}/members/{member_id}")
 def update_workspace_member(workspace_id: uuid.UUID, member_id: uuid.UUID, role: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
+    check_workspace_access(db, current_user, workspace_id, "owner", "Only owner can change member roles")
     
-    if workspace.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only owner can change member roles")
-    
-    member = db.query(WorkspaceMember).filter(WorkspaceMember.id == member_id).first()
+    member = db.query(WorkspaceMember).filter(
+        WorkspaceMember.id == member_id,
+        WorkspaceMember.workspace_id == workspace_id
+    ).first()
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
     
@@ -502,7 +432,9 @@ def update_workspace_member(workspace_id: uuid.UUID, member_id: uuid.UUID, role:
     
     member.role = role
     log_activity(db, current_user.id, workspace_id, "member_role_changed", "user", member.user_id, {"new_role": role})
+    touch_workspace(db, workspace_id)
     db.commit()
+    invalidate_membership(member.user_id, workspace_id)
     
     return {"message": "Member role updated"}
 
@@ -512,7 +444,10 @@ def remove_workspace_member(workspace_id: uuid.UUID, member_id: uuid.UUID, curre
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    member = db.query(WorkspaceMember).filter(WorkspaceMember.id == member_id).first()
+    member = db.query(WorkspaceMember).filter(
+        WorkspaceMember.id == member_id,
+        WorkspaceMember.workspace_id == workspace_id
+    ).first()
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
     
@@ -536,51 +471,42 @@ def remove_workspace_member(workspace_id: uuid.UUID, member_id: uuid.UUID, curre
     )
     
     db.delete(member)
+    touch_workspace(db, workspace_id)
     db.commit()
+    invalidate_membership(member.user_id, workspace_id)
     
     return {"message": "Member removed"}
 
 # ==================== PROJECT ROUTES ====================
 
-@app.get("/api/workspaces/{workspace_id}/projects", response_model=List[ProjectResponse])
-def get_projects(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Check workspace access (simplified)
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
+@app.get("/api/workspaces/{workspace_id}/projects", response_model=List[ProjectResponse], dependencies=[Depends(workspace_reader)])
+def get_projects(workspace_id: uuid.UUID, request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, workspace_etag(db, workspace_id, "projects"))
+    if cached:
+        return cached
     projects = db.query(Project).filter(Project.workspace_id == workspace_id).all()
     return projects
 
 @app.post("/api/projects", response_model=ProjectResponse)
 def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check edit access
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == project.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
+    check_workspace_access(db, current_user, project.workspace_id, "editor", "Edit access required")
     
     db_project = Project(
         workspace_id=project.workspace_id,
         name=project.name,
-        color=project.color
+        color=project.color,
+        change_seq=touch_workspace(db, project.workspace_id)
     )
     db.add(db_project)
     
     log_activity(db, current_user.id, project.workspace_id, "project_created", "project", db_project.id, {"name": project.name})
-    db.commit()
+    db.flush()
     db.refresh(db_project)
+    response = ProjectResponse.model_validate(db_project)
+    emit_workspace(db, project.workspace_id, "project.created", current_user.id, project=response)
+    db.commit()
     
-    return db_project
+    return response
 
 @app.put("/api/projects/{project_id}", response_model=ProjectResponse)
 def update_project(project_id: uuid.UUID, update: ProjectUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -588,27 +514,22 @@ def update_project(project_id: uuid.UUID, update: ProjectUpdate, current_user: U
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == project.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
+    check_workspace_access(db, current_user, project.workspace_id, "editor", "Edit access required")
     
     if update.name:
         project.name = update.name
     if update.color:
         project.color = update.color
+    project.change_seq = touch_workspace(db, project.workspace_id)
     
     log_activity(db, current_user.id, project.workspace_id, "project_updated", "project", project_id, {"name": project.name})
-    db.commit()
+    db.flush()
     db.refresh(project)
+    response = ProjectResponse.model_validate(project)
+    emit_workspace(db, project.workspace_id, "project.updated", current_user.id, project=response)
+    db.commit()
     
-    return project
+    return response
 
 @app.delete("/api/projects/{project_id}")
 def delete_project(project_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -616,22 +537,16 @@ def delete_project(project_id: uuid.UUID, current_user: User = Depends(get_curre
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == project.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
+    check_workspace_access(db, current_user, project.workspace_id, "editor", "Edit access required")
     
     # Delete all tasks in this project first
     task_count = db.query(Task).filter(Task.project_id == project_id).count()
+    record_deletes(db, project.workspace_id, "task", select(Task.id).where(Task.project_id == project_id))
+    record_deletes(db, project.workspace_id, "project", [project_id])
     db.query(Task).filter(Task.project_id == project_id).delete()
     
     log_activity(db, current_user.id, project.workspace_id, "project_deleted", "project", project_id, {"name": project.name, "tasks_deleted": task_count})
+    emit_workspace(db, project.workspace_id, "project.deleted", current_user.id, project_id=project_id)
     db.delete(project)
     db.commit()
     
@@ -639,128 +554,115 @@ def delete_project(project_id: uuid.UUID, current_user: User = Depends(get_curre
 
 # ==================== TASK ROUTES ====================
 
-@app.get("/api/workspaces/{workspace_id}/tasks", response_model=List[TaskResponse])
-def get_tasks(workspace_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check access
-    is_owner = workspace.owner_id == current_user.id
-    is_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first() is not None
-    
-    if not is_owner and not is_member and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    tasks = db.query(Task).filter(Task.workspace_id == workspace_id).order_by(Task.position).all()
+@app.get("/api/workspaces/{workspace_id}/tasks", response_model=List[TaskResponse], dependencies=[Depends(workspace_reader)])
+def get_tasks(workspace_id: uuid.UUID, request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, workspace_etag(db, workspace_id, "tasks"))
+    if cached:
+        return cached
+    return load_board(db, workspace_id)
+
+@app.get("/api/workspaces/{workspace_id}/board", response_model=BoardResponse, dependencies=[Depends(workspace_reader)])
+def get_board(workspace_id: uuid.UUID, request: Request, response: Response, limit: Optional[int] = None,
+              db: Session = Depends(get_db)):
+    """First page of every status column, with per-column totals"""
+    limit = limit or settings.board_page_size
+    # Read before the columns, so replaying /changes from it can't skip a write
+    version = workspace_version(db, workspace_id)
+    cached = not_modified(request, response, make_etag("board", workspace_id, version, limit))
+    if cached:
+        return cached
+    return BoardResponse(columns=load_board_page(db, workspace_id, limit), version=version)
+
+@app.get("/api/workspaces/{workspace_id}/changes", response_model=WorkspaceChanges, dependencies=[Depends(workspace_reader)])
+def get_workspace_changes(workspace_id: uuid.UUID, since: int, db: Session = Depends(get_db)):
+    """Tasks, projects and comments written, and ids deleted, after version `since`"""
+    return load_changes(db, workspace_id, since)
+
+@app.get("/api/workspaces/{workspace_id}/columns/{status}/tasks", response_model=TaskPage, dependencies=[Depends(workspace_reader)])
+def get_column_tasks(workspace_id: uuid.UUID, status: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                     db: Session = Depends(get_db)):
+    """Next page of a single status column (keyset on position, id)"""
+    if status not in TASK_STATUSES:
+        raise HTTPException(status_code=400, detail="Unknown status column")
     
-    result = []
-    for task in tasks:
-        project = db.query(Project).filter(Project.id == task.project_id).first() if task.project_id else None
-        assigned_user = db.query(User).filter(User.id == task.assigned_to).first() if task.assigned_to else None
-        updates = db.query(TaskUpdate).filter(TaskUpdate.task_id == task.id).order_by(TaskUpdate.created_at.desc()).all()
-        
-        update_responses = []
-        for u in updates:
-            update_user = db.query(User).filter(User.id == u.user_id).first()
-            update_responses.append(TaskUpdateResponse(
-                id=u.id,
-                user_id=u.user_id,
-                user_name=update_user.display_name if update_user else None,
-                content=u.content,
-                created_at=u.created_at
-            ))
-        
-        result.append(TaskResponse(
-            id=task.id,
-            workspace_id=task.workspace_id,
-            project_id=task.project_id,
-            project_name=project.name if project else None,
-            project_color=project.color if project else None,
-            title=task.title,
-            description=task.description,
-            status=task.status,
-            priority=task.priority,
-            blocked=task.blocked or False,
-            block_reason=task.block_reason,
-            on_hold=task.on_hold or False,
-            due_date=task.due_date,
-            position=task.position,
-            created_by=task.created_by,
-            assigned_to=task.assigned_to,
-            assigned_to_name=assigned_user.display_name if assigned_user else None,
-            updates=update_responses,
-            created_at=task.created_at,
-            updated_at=task.updated_at
-        ))
-    
-    return result
+    try:
+        return load_column_page(db, workspace_id, status, limit or settings.board_page_size, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def authorize_socket(token: str, workspace_id: uuid.UUID) -> bool:
+    db = SessionLocal()
+    try:
+        user = authenticate_token(db, token)
+        if user is None:
+            return False
+        check_workspace_access(db, user, workspace_id)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+@app.websocket("/api/workspaces/{workspace_id}/ws")
+async def workspace_socket(websocket: WebSocket, workspace_id: uuid.UUID, token: str = ""):
+    """Board deltas (task.*, project.*, comment.*) for one workspace.
+    Browsers can't set headers on WebSockets, so the access token comes as ?token=."""
+    if not await run_in_threadpool(authorize_socket, token, workspace_id):
+        await websocket.close(code=4403)
+        return
+    await websocket.accept()
+    await pump_websocket(websocket, workspace_channel(workspace_id))
 
 @app.post("/api/tasks", response_model=TaskResponse)
 def create_task(task: TaskCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspace = db.query(Workspace).filter(Workspace.id == task.workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Check edit access
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == task.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
-    
-    # Get max position
-    max_pos = db.query(func.max(Task.position)).filter(
-        Task.workspace_id == task.workspace_id,
-        Task.status == task.status
-    ).scalar() or 0
+    check_workspace_access(db, current_user, task.workspace_id, "editor", "Edit access required")
     
+    column_status = task.status or "todo"
+    seq = touch_workspace(db, task.workspace_id)
     db_task = Task(
         workspace_id=task.workspace_id,
         project_id=task.project_id,
         title=task.title,
         description=task.description,
-        status=task.status or "todo",
+        status=column_status,
         priority=task.priority,
         due_date=task.due_date,
-        position=max_pos + 1,
-        created_by=current_user.id
+        position=next_rank(db, task.workspace_id, column_status),
+        created_by=current_user.id,
+        change_seq=seq
     )
     db.add(db_task)
     
     log_activity(db, current_user.id, task.workspace_id, "task_created", "task", db_task.id, {"title": task.title})
-    db.commit()
+    db.flush()
     db.refresh(db_task)
+    response = build_task_response(db_task)
+    emit_workspace(db, task.workspace_id, "task.created", current_user.id, task=response)
+    db.commit()
     
-    return TaskResponse(
-        id=db_task.id,
-        workspace_id=db_task.workspace_id,
-        project_id=db_task.project_id,
-        project_name=None,
-        project_color=None,
-        title=db_task.title,
-        description=db_task.description,
-        status=db_task.status,
-        priority=db_task.priority,
-        blocked=db_task.blocked or False,
-        block_reason=db_task.block_reason,
-        on_hold=db_task.on_hold or False,
-        due_date=db_task.due_date,
-        position=db_task.position,
-        created_by=db_task.created_by,
-        assigned_to=db_task.assigned_to,
-        assigned_to_name=None,
-        updates=[],
-        created_at=db_task.created_at,
-        updated_at=db_task.updated_at
-    )
+    return response
+
+def task_moved_notification(task, old_status: str, actor: User) -> Optional[dict]:
+    """Notification for the creator of a task (Task or TaskResponse) that someone else moved, else None."""
+    if not task.created_by or task.created_by == actor.id:
+        return None
+    status_labels = {"todo": "To Do", "in_progress": "In Progress", "done": "Done", "archived": "Archived"}
+    old_label = status_labels.get(old_status, old_status)
+    new_label = status_labels.get(task.status, task.status)
+    return {
+        "user_id": task.created_by,
+        "type": "task_moved",
+        "title": f"Task moved: {task.title}",
+        "message": f"{actor.display_name} moved your task from {old_label} → {new_label}",
+        "data": {"task_id": str(task.id), "workspace_id": str(task.workspace_id), "task_title": task.title, 
+                 "old_status": old_status, "new_status": task.status, "actor_name": actor.display_name},
+    }
+
+def notify_task_moved(db: Session, task: Task, old_status: str, actor: User):
+    notification = task_moved_notification(task, old_status, actor)
+    if notification:
+        create_notification(db, notification["user_id"], notification["type"], notification["title"],
+                            notification["message"], notification["data"])
 
 @app.put("/api/tasks/{task_id}", response_model=TaskResponse)
 def update_task(task_id: uuid.UUID, update: TaskUpdatePayload, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -768,25 +670,15 @@ def update_task(task_id: uuid.UUID, update: TaskUpdatePayload, current_user: Use
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    workspace = db.query(Workspace).filter(Workspace.id == task.workspace_id).first()
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == task.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
+    check_workspace_access(db, current_user, task.workspace_id, "editor", "Edit access required")
     
     old_status = task.status
+    task.change_seq = touch_workspace(db, task.workspace_id)
     
     if update.title is not None:
         task.title = update.title
     if update.description is not None:
         task.description = update.description
-    if update.status is not None:
-        task.status = update.status
     if update.priority is not None:
         task.priority = update.priority
     if update.blocked is not None:
@@ -799,58 +691,173 @@ def update_task(task_id: uuid.UUID, update: TaskUpdatePayload, current_user: Use
         task.due_date = update.due_date
     if update.project_id is not None:
         task.project_id = update.project_id
-    if update.position is not None:
-        task.position = update.position
     if update.assigned_to is not None:
         task.assigned_to = update.assigned_to
     
+    # A column change or an anchored move gets a rank between the new neighbours;
+    # a status change alone appends the card to its new column
+    new_status = update.status or old_status
+    if update.after_id or update.before_id or new_status != old_status:
+        if new_status not in TASK_STATUSES:
+            raise HTTPException(status_code=400, detail="Unknown status column")
+        try:
+            place_task(db, task, new_status, update.after_id, update.before_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif update.position is not None:
+        task.position = update.position
+    
     action = "task_updated"
-    if update.status and update.status != old_status:
+    if task.status != old_status:
         action = "task_moved"
-        
-        # Notify task creator if someone else moved their task
-        if task.created_by and task.created_by != current_user.id:
-            status_labels = {"todo": "To Do", "in_progress": "In Progress", "done": "Done", "archived": "Archived"}
-            old_label = status_labels.get(old_status, old_status)
-            new_label = status_labels.get(task.status, task.status)
-            create_notification(
-                db, task.created_by,
-                "task_moved",
-                f"Task moved: {task.title}",
-                f"{current_user.display_name} moved your task from {old_label} → {new_label}",
-                {"task_id": str(task.id), "workspace_id": str(task.workspace_id), "task_title": task.title, 
-                 "old_status": old_status, "new_status": task.status, "actor_name": current_user.display_name}
-            )
+        notify_task_moved(db, task, old_status, current_user)
     
     log_activity(db, current_user.id, task.workspace_id, action, "task", task_id, {"title": task.title, "old_status": old_status, "new_status": task.status})
+    db.flush()
+    response = load_task(db, task_id)
+    emit_workspace(db, task.workspace_id, "task.updated", current_user.id, task=response, old_status=old_status)
+    db.commit()
+    
+    return response
+
+MAX_BATCH_TASKS = 1000
+BATCH_FIELDS = {"title", "description", "priority", "blocked", "block_reason", "on_hold", "hold_reason",
+                "due_date", "project_id", "assigned_to", "position"}
+
+@app.post("/api/tasks/batch", response_model=List[TaskResponse])
+def batch_update_tasks(batch: TaskBatchPayload, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Apply partial updates to many tasks in one transaction: one access check per
+    workspace, one UPDATE per distinct change set, activity and notifications in bulk"""
+    if len(batch.updates) > MAX_BATCH_TASKS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TASKS} tasks per batch")
+    task_ids = [item.task_id for item in batch.updates]
+    if len(set(task_ids)) != len(task_ids):
+        raise HTTPException(status_code=400, detail="A task can only appear once per batch")
+    if not task_ids:
+        return []
+    
+    before = {row.id: row for row in db.execute(
+        select(Task.id, Task.workspace_id, Task.status).where(Task.id.in_(task_ids))
+    )}
+    if len(before) != len(task_ids):
+        raise HTTPException(status_code=404, detail="Task not found")
+    # Bump workspace versions before any column lock (see ranking.py), in a fixed order
+    workspace_ids = sorted({row.workspace_id for row in before.values()}, key=str)
+    for workspace_id in workspace_ids:
+        check_workspace_access(db, current_user, workspace_id, "editor", "Edit access required")
+    seqs = {workspace_id: touch_workspace(db, workspace_id) for workspace_id in workspace_ids}
+    
+    # As in update_task, None means "leave as is". Items in one workspace with
+    # identical changes share one UPDATE ... WHERE id IN (...)
+    change_sets = {}
+    appends = {}  # (workspace_id, status) -> task ids changing column without an anchor
+    anchored = []
+    for item in batch.updates:
+        row = before[item.task_id]
+        values = item.model_dump(include=BATCH_FIELDS, exclude_none=True)
+        new_status = item.status or row.status
+        if new_status not in TASK_STATUSES:
+            raise HTTPException(status_code=400, detail="Unknown status column")
+        if item.after_id or item.before_id:
+            anchored.append(item)
+            values.pop("position", None)
+        elif new_status != row.status:
+            appends.setdefault((row.workspace_id, new_status), []).append(item.task_id)
+            values.pop("position", None)
+        if values:
+            values["change_seq"] = seqs[row.workspace_id]
+            change_sets.setdefault(tuple(sorted(values.items())), []).append(item.task_id)
+    
+    # Take every column lock up front, in a fixed order, so concurrent batches can't deadlock
+    columns = set(appends) | {(before[item.task_id].workspace_id, item.status or before[item.task_id].status)
+                              for item in anchored}
+    for workspace_id, column_status in sorted(columns, key=lambda column: (str(column[0]), column[1])):
+        lock_column(db, workspace_id, column_status)
+    
+    for values, ids in change_sets.items():
+        db.execute(sql_update(Task).where(Task.id.in_(ids)).values(**dict(values))
+                   .execution_options(synchronize_session=False))
+    for (workspace_id, column_status), ids in appends.items():
+        append_tasks(db, workspace_id, column_status, ids)
+    for item in anchored:
+        task = db.get(Task, item.task_id)
+        try:
+            place_task(db, task, item.status or task.status, item.after_id, item.before_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        db.flush()
+    
+    order = {task_id: i for i, task_id in enumerate(task_ids)}
+    responses = sorted(load_tasks(db, task_rows_query().where(Task.id.in_(task_ids))), key=lambda t: order[t.id])
+    
+    # Added together, the activity rows go out as one multi-row INSERT on flush
+    notifications = []
+    for response in responses:
+        old_status = before[response.id].status
+        action = "task_moved" if response.status != old_status else "task_updated"
+        log_activity(db, current_user.id, response.workspace_id, action, "task", response.id,
+                     {"title": response.title, "old_status": old_status, "new_status": response.status})
+        if response.status != old_status:
+            notifications.append(task_moved_notification(response, old_status, current_user))
+    notify_many(db, [notification for notification in notifications if notification])
+    
+    if len(responses) > settings.realtime_queue_size:
+        # More events than a client's queue holds; open boards reload instead
+        for workspace_id in workspace_ids:
+            emit(db, workspace_channel(workspace_id), RESYNC)
+    else:
+        for response in responses:
+            emit_workspace(db, response.workspace_id, "task.updated", current_user.id, task=response,
+                           old_status=before[response.id].status)
     db.commit()
-    db.refresh(task)
     
-    project = db.query(Project).filter(Project.id == task.project_id).first() if task.project_id else None
-    assigned_user = db.query(User).filter(User.id == task.assigned_to).first() if task.assigned_to else None
+    return responses
+
+MAX_REORDER_MOVES = 500
+
+@app.put("/api/workspaces/{workspace_id}/tasks/reorder", response_model=List[TaskResponse])
+def reorder_tasks(workspace_id: uuid.UUID, reorder: TaskReorderPayload, current_user: User = Depends(get_current_user),
+                  db: Session = Depends(get_db)):
+    """Apply several card moves in one transaction; each move rewrites only the moved card's rank"""
+    check_workspace_access(db, current_user, workspace_id, "editor", "Edit access required")
+    if len(reorder.moves) > MAX_REORDER_MOVES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_REORDER_MOVES} moves per request")
+    touch_workspace(db, workspace_id)  # before the column locks, see ranking.py
     
-    return TaskResponse(
-        id=task.id,
-        workspace_id=task.workspace_id,
-        project_id=task.project_id,
-        project_name=project.name if project else None,
-        project_color=project.color if project else None,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        blocked=task.blocked or False,
-        block_reason=task.block_reason,
-        on_hold=task.on_hold or False,
-        due_date=task.due_date,
-        position=task.position,
-        created_by=task.created_by,
-        assigned_to=task.assigned_to,
-        assigned_to_name=assigned_user.display_name if assigned_user else None,
-        updates=[],
-        created_at=task.created_at,
-        updated_at=task.updated_at
-    )
+    task_ids = list(dict.fromkeys(move.task_id for move in reorder.moves))
+    tasks = {task.id: task for task in db.query(Task).filter(Task.workspace_id == workspace_id, Task.id.in_(task_ids))}
+    if len(tasks) != len(task_ids):
+        raise HTTPException(status_code=404, detail="Task not found")
+    old_statuses = {task_id: task.status for task_id, task in tasks.items()}
+    
+    statuses = {move.status or tasks[move.task_id].status for move in reorder.moves}
+    if not statuses <= set(TASK_STATUSES):
+        raise HTTPException(status_code=400, detail="Unknown status column")
+    # Take every column lock up front, in a fixed order, so concurrent reorders can't deadlock
+    for column_status in sorted(statuses):
+        lock_column(db, workspace_id, column_status)
+    
+    for move in reorder.moves:
+        task = tasks[move.task_id]
+        try:
+            place_task(db, task, move.status or task.status, move.after_id, move.before_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        db.flush()  # later moves may be anchored to this card
+    
+    for task_id, task in tasks.items():
+        if task.status != old_statuses[task_id]:
+            notify_task_moved(db, task, old_statuses[task_id], current_user)
+            log_activity(db, current_user.id, workspace_id, "task_moved", "task", task_id,
+                         {"title": task.title, "old_status": old_statuses[task_id], "new_status": task.status})
+    db.flush()
+    responses = load_tasks(db, task_rows_query().where(Task.id.in_(task_ids)))
+    for response in responses:
+        emit_workspace(db, workspace_id, "task.updated", current_user.id, task=response,
+                       old_status=old_statuses[response.id])
+    db.commit()
+    
+    return responses
 
 @app.delete("/api/tasks/{task_id}")
 def delete_task(task_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -858,76 +865,74 @@ def delete_task(task_id: uuid.UUID, current_user: User = Depends(get_current_use
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    workspace = db.query(Workspace).filter(Workspace.id == task.workspace_id).first()
-    is_owner = workspace.owner_id == current_user.id
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == task.workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    is_editor = member and member.role == "editor"
-    
-    if not is_owner and not is_editor:
-        raise HTTPException(status_code=403, detail="Edit access required")
+    check_workspace_access(db, current_user, task.workspace_id, "editor", "Edit access required")
     
     log_activity(db, current_user.id, task.workspace_id, "task_deleted", "task", task_id, {"title": task.title})
+    record_deletes(db, task.workspace_id, "task", [task_id])
+    emit_workspace(db, task.workspace_id, "task.deleted", current_user.id, task_id=task_id, status=task.status)
     db.delete(task)
     db.commit()
     
     return {"message": "Task deleted"}
 
-@app.post("/api/tasks/{task_id}/updates")
+@app.get("/api/tasks/{task_id}/updates", response_model=TaskUpdatePage)
+def get_task_updates(task_id: uuid.UUID, cursor: Optional[str] = None, limit: Optional[int] = None,
+                     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Comments on a task, newest first (keyset on created_at, id)"""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    check_workspace_access(db, current_user, task.workspace_id)
+    
+    try:
+        return load_comment_page(db, task_id, limit or settings.comment_page_size, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.post("/api/tasks/{task_id}/updates", response_model=TaskUpdateResponse)
 def add_task_update(task_id: uuid.UUID, update: TaskUpdateCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    check_workspace_access(db, current_user, task.workspace_id)
+    
+    # The task is stamped too: its comment count and latest comment change
+    task.change_seq = touch_workspace(db, task.workspace_id)
     db_update = TaskUpdate(
         task_id=task_id,
         user_id=current_user.id,
-        content=update.content
+        content=update.content,
+        change_seq=task.change_seq
     )
     db.add(db_update)
     
     # Truncate update content for notification message
     content_preview = update.content[:100] + "..." if len(update.content) > 100 else update.content
     
-    # Collect users to notify (avoid duplicates)
-    users_to_notify = set()
-    
-    # Notify task creator if commenter is not creator
-    if task.created_by and task.created_by != current_user.id:
-        users_to_notify.add(task.created_by)
-    
-    # Notify others who have commented on this task (except current user)
-    previous_commenters = db.query(TaskUpdate.user_id).filter(
-        TaskUpdate.task_id == task_id,
-        TaskUpdate.user_id != current_user.id
-    ).distinct().all()
-    for (commenter_id,) in previous_commenters:
-        if commenter_id:
-            users_to_notify.add(commenter_id)
-    
-    # Create notifications
-    for user_id in users_to_notify:
-        # Determine notification type
-        if user_id == task.created_by:
-            notif_type = "task_update"
-            title = f"Update on your task: {task.title}"
-        else:
-            notif_type = "task_update_reply"
-            title = f"New comment on: {task.title}"
-        
-        create_notification(
-            db, user_id,
-            notif_type,
-            title,
-            f"{current_user.display_name}: {content_preview}",
-            {"task_id": str(task.id), "workspace_id": str(task.workspace_id), "task_title": task.title, "actor_name": current_user.display_name}
-        )
+    # Notify the task creator and everyone else who has commented (except the commenter);
+    # UNION drops duplicates
+    recipients = union(
+        select(Task.created_by.label("user_id")).where(Task.id == task_id, Task.created_by != current_user.id),
+        select(TaskUpdate.user_id).where(TaskUpdate.task_id == task_id, TaskUpdate.user_id != current_user.id)
+    ).subquery()
+    is_creator = recipients.c.user_id == task.created_by
+    fan_out(
+        db, recipients,
+        case((is_creator, "task_update"), else_="task_update_reply"),
+        case((is_creator, f"Update on your task: {task.title}"), else_=f"New comment on: {task.title}"),
+        f"{current_user.display_name}: {content_preview}",
+        {"task_id": str(task.id), "workspace_id": str(task.workspace_id), "task_title": task.title, "actor_name": current_user.display_name}
+    )
     
+    db.flush()
+    db.refresh(db_update)
+    response = build_update_response(db_update, current_user.display_name)
+    emit_workspace(db, task.workspace_id, "comment.created", current_user.id, task_id=task_id, update=response)
     db.commit()
     
-    return {"message": "Update added"}
+    return response
 
 @app.delete("/api/tasks/{task_id}/updates/{update_id}")
 def delete_task_update(task_id: uuid.UUID, update_id: uuid.UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -939,16 +944,37 @@ def delete_task_update(task_id: uuid.UUID, update_id: uuid.UUID, current_user: U
     if task_update.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="You can only delete your own updates")
     
+    task = db.get(Task, task_id)
+    workspace_id = task.workspace_id
+    record_deletes(db, workspace_id, "comment", [update_id])
+    task.change_seq = touch_workspace(db, workspace_id)
+    emit_workspace(db, workspace_id, "comment.deleted", current_user.id, task_id=task_id, update_id=update_id)
     db.delete(task_update)
     db.commit()
     
     return {"message": "Update deleted"}
 
+# ==================== SEARCH ====================
+
+@app.get("/api/search", response_model=SearchPage)
+def search_tasks(q: str, workspace_id: Optional[uuid.UUID] = None, cursor: Optional[str] = None,
+                 limit: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Ranked full-text search over task titles, descriptions and comments, in one
+    workspace or every workspace in the caller's sidebar"""
+    if workspace_id is not None:
+        check_workspace_access(db, current_user, workspace_id)
+    
+    try:
+        return search(db, current_user, q, limit or settings.search_page_size, cursor, workspace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ==================== NOTIFICATIONS ====================
 
 def create_notification(db: Session, user_id: uuid.UUID, notification_type: str, title: str, message: str, data: dict = None):
     """Helper function to create a notification"""
     notification = Notification(
+        id=uuid.uuid4(),
         user_id=user_id,
         type=notification_type,
         title=title,
@@ -956,29 +982,47 @@ def create_notification(db: Session, user_id: uuid.UUID, notification_type: str,
         data=data
     )
     db.add(notification)
-    # Don't commit here - let the caller handle the transaction
+    adjust_unread(db, user_id, 1)
+    # Don't commit here - let the caller handle the transaction; the stream gets it on commit
+    emit_user(db, user_id, "notification", notification={
+        "id": notification.id, "type": notification_type, "title": title, "message": message,
+        "data": data, "read_at": None, "created_at": datetime.now(timezone.utc),
+    })
 
 def notify_workspace_members(db: Session, workspace_id: uuid.UUID, exclude_user_id: uuid.UUID, 
                              notification_type: str, title: str, message: str, data: dict = None):
-    """Notify all members of a workspace except the actor"""
-    # Get workspace owner
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        return
-    
-    # Get all member user IDs
-    member_ids = set()
-    if workspace.owner_id != exclude_user_id:
-        member_ids.add(workspace.owner_id)
-    
-    members = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace_id).all()
-    for member in members:
-        if member.user_id != exclude_user_id:
-            member_ids.add(member.user_id)
-    
-    # Create notifications for each member
-    for member_id in member_ids:
-        create_notification(db, member_id, notification_type, title, message, data)
+    """Notify all members of a workspace except the actor (one INSERT ... SELECT)"""
+    recipients = union(
+        select(Workspace.owner_id.label("user_id")).where(Workspace.id == workspace_id, Workspace.owner_id != exclude_user_id),
+        select(WorkspaceMember.user_id).where(WorkspaceMember.workspace_id == workspace_id, WorkspaceMember.user_id != exclude_user_id)
+    ).subquery()
+    fan_out(db, recipients, notification_type, title, message, data)
+
+def open_notification_stream(token: str) -> Optional[dict]:
+    """Authenticate a stream request; returns the first event (the current unread count)."""
+    db = SessionLocal()
+    try:
+        user = authenticate_token(db, token)
+        if user is None:
+            return None
+        return {"type": "unread_count", "user_id": user.id, "unread_count": get_unread(db, user.id)}
+    finally:
+        db.close()
+
+@app.get("/api/notifications/stream")
+async def notification_stream(token: str = ""):
+    """Server-Sent Events: "notification" when one is created for the user and
+    "unread_count" when reading or deleting changes the count. EventSource can't
+    set headers, so the access token comes as ?token=."""
+    initial = await run_in_threadpool(open_notification_stream, token)
+    if initial is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    channel = user_channel(initial.pop("user_id"))
+    return StreamingResponse(
+        stream_events(channel, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/api/notifications", response_model=List[NotificationResponse])
 def get_notifications(limit: int = 50, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -991,19 +1035,19 @@ def get_notifications(limit: int = 50, current_user: User = Depends(get_current_
 @app.get("/api/notifications/count", response_model=NotificationCountResponse)
 def get_notification_count(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get count of unread notifications"""
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.read_at == None
-    ).count()
-    return NotificationCountResponse(unread_count=count)
+    return NotificationCountResponse(unread_count=get_unread(db, current_user.id))
 
 @app.post("/api/notifications/mark-read")
 def mark_notifications_read(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Mark all notifications as read"""
-    db.query(Notification).filter(
+    marked = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.read_at == None
     ).update({"read_at": datetime.utcnow()})
+    # Subtract what was marked rather than zeroing: a notification committed
+    # after this UPDATE's snapshot has already added its +1
+    adjust_unread(db, current_user.id, -marked)
+    emit_user(db, current_user.id, "unread_count", unread_count=get_unread(db, current_user.id))
     db.commit()
     return {"message": "Notifications marked as read"}
 
@@ -1018,28 +1062,41 @@ def delete_notification(notification_id: uuid.UUID, current_user: User = Depends
         raise HTTPException(status_code=404, detail="Notification not found")
     
     db.delete(notification)
+    if notification.read_at is None:
+        adjust_unread(db, current_user.id, -1)
+        emit_user(db, current_user.id, "unread_count", unread_count=get_unread(db, current_user.id))
     db.commit()
     return {"message": "Notification deleted"}
 
 # Cleanup old notifications (called periodically or on request)
 @app.post("/api/notifications/cleanup")
 def cleanup_notifications(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Delete old notifications: read > 7 days, unread > 30 days"""
+    """Delete old notifications: read > 7 days, unread > 30 days (the maintenance job does this for everyone)"""
     now = datetime.utcnow()
+    read_cutoff = now - timedelta(days=settings.notification_read_retention_days)
+    unread_cutoff = now - timedelta(days=settings.notification_unread_retention_days)
     
     # Delete read notifications older than 7 days
     db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.read_at != None,
-        Notification.read_at < now - timedelta(days=7)
+        Notification.read_at < read_cutoff
     ).delete()
     
     # Delete unread notifications older than 30 days
+    removed_unread = db.query(Notification).filter(
+        Notification.user_id == current_user.id,
+        Notification.read_at == None,
+        Notification.created_at < unread_cutoff
+    ).delete()
     db.query(Notification).filter(
         Notification.user_id == current_user.id,
-        Notification.created_at < now - timedelta(days=30)
+        Notification.created_at < unread_cutoff
     ).delete()
     
+    if removed_unread:
+        adjust_unread(db, current_user.id, -removed_unread)
+        emit_user(db, current_user.id, "unread_count", unread_count=get_unread(db, current_user.id))
     db.commit()
     return {"message": "Old notifications cleaned up"}
 
@@ -1047,30 +1104,17 @@ def cleanup_notifications(current_user: User = Depends(get_current_user), db: Se
 
 @app.get("/api/admin/stats", response_model=AdminStats)
 def get_admin_stats(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    total_workspaces = db.query(Workspace).count()
-    total_tasks = db.query(Task).count()
-    
-    tasks_by_status = {
-        "todo": db.query(Task).filter(Task.status == "todo").count(),
-        "in_progress": db.query(Task).filter(Task.status == "in_progress").count(),
-        "done": db.query(Task).filter(Task.status == "done").count(),
-        "archived": db.query(Task).filter(Task.status == "archived").count()
-    }
-    
-    return AdminStats(
-        total_users=total_users,
-        active_users=active_users,
-        total_workspaces=total_workspaces,
-        total_tasks=total_tasks,
-        tasks_by_status=tasks_by_status
-    )
+    return load_admin_stats(db)
 
-@app.get("/api/admin/users", response_model=List[UserResponse])
-def get_all_users(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+@app.get("/api/admin/users", response_model=UserPage)
+def get_all_users(limit: Optional[int] = None, cursor: Optional[str] = None, sort: str = "name",
+                  direction: Optional[str] = None, q: Optional[str] = None,
+                  current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Users page by page (keyset on sort, id); q matches email or display name"""
+    try:
+        return load_user_page(db, limit or settings.admin_page_size, cursor, sort, direction, q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/admin/users", response_model=UserResponse)
 def create_user(user: UserCreate, current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
@@ -1083,8 +1127,7 @@ def create_user(user: UserCreate, current_user: User = Depends(get_current_admin
     # If no password provided, this is an invite flow
     if not user.password:
         # Validate that app_base_url is configured before inviting
-        base_url_row = db.execute(text("SELECT value FROM site_settings WHERE key = 'app_base_url'")).fetchone()
-        if not base_url_row or not base_url_row[0]:
+        if not site_settings.get(db).app_base_url:
             raise HTTPException(status_code=400, detail="Please configure Application Base URL in Settings before inviting users")
         # Create user with a random unusable password
         temp_password = secrets.token_urlsafe(32)
@@ -1107,12 +1150,12 @@ def create_user(user: UserCreate, current_user: User = Depends(get_current_admin
             INSERT INTO password_reset_tokens (user_id, token, expires_at)
             VALUES (:uid, :token, :expires)
         """), {"uid": db_user.id, "token": token, "expires": expires_at})
-        db.commit()
         
-        # Send invite email
+        # Queue invite email with the token
         base_url = get_base_url(db)
         invite_url = f"{base_url}/reset-password?token={token}"
         send_invite_email(user.email, user.display_name, invite_url, db)
+        db.commit()
     else:
         # Direct creation with password (backward compatible)
         db_user = User(
@@ -1136,11 +1179,13 @@ def admin_update_user(user_id: uuid.UUID, update: UserUpdate, current_user: User
     
     if update.display_name is not None:
         user.display_name = update.display_name
+        touch_user_workspaces(db, user.id)
     if update.is_active is not None:
         user.is_active = update.is_active
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id)
     return user
 
 @app.post("/api/admin/users/{user_id}/reset-password")
@@ -1151,6 +1196,7 @@ def admin_reset_password(user_id: uuid.UUID, reset: UserPasswordReset, current_u
     
     user.password_hash = get_password_hash(reset.new_password)
     db.commit()
+    invalidate_user_cache(user.id)
     
     return {"message": "Password reset successfully"}
 
@@ -1163,68 +1209,74 @@ def admin_delete_user(user_id: uuid.UUID, current_user: User = Depends(get_curre
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
+    touch_user_workspaces(db, user.id)  # they drop out of other workspaces' member lists
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
+    invalidate_user_cache(user_id)
     
     return {"message": "User deleted"}
 
-@app.get("/api/admin/workspaces", response_model=List[WorkspaceResponse])
-def get_all_workspaces(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    workspaces = db.query(Workspace).all()
-    result = []
-    for ws in workspaces:
-        owner = db.query(User).filter(User.id == ws.owner_id).first()
-        member_count = db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == ws.id).count() + 1
-        task_count = db.query(Task).filter(Task.workspace_id == ws.id).count()
-        result.append(WorkspaceResponse(
-            id=ws.id,
-            name=ws.name,
-            description=ws.description,
-            color=ws.color,
-            owner_id=ws.owner_id,
-            owner_name=owner.display_name if owner else "Unknown",
-            member_count=member_count,
-            task_count=task_count,
-            created_at=ws.created_at
-        ))
-    return result
-
-@app.get("/api/admin/activity", response_model=List[ActivityLogResponse])
-def get_activity_log(limit: int = 100, current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    logs = db.query(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(limit).all()
-    result = []
-    for log in logs:
-        user = db.query(User).filter(User.id == log.user_id).first()
-        result.append(ActivityLogResponse(
-            id=log.id,
-            user_id=log.user_id,
-            user_name=user.display_name if user else None,
-            workspace_id=log.workspace_id,
-            action=log.action,
-            entity_type=log.entity_type,
-            entity_id=log.entity_id,
-            details=log.details,
-            created_at=log.created_at
-        ))
-    return result
+@app.get("/api/admin/cache-stats")
+def admin_cache_stats(current_user: User = Depends(get_current_admin)):
+    """Hit rates of the per-worker auth, access-control and admin stats caches"""
+    return {"auth": auth_cache_stats(), "access": role_cache.stats(), "admin_stats": admin_stats_cache.stats()}
+
+@app.get("/api/admin/maintenance")
+def get_maintenance_status(current_user: User = Depends(get_current_admin)):
+    """Last run of each maintenance job (rows purged, timing) on this worker"""
+    return maintenance_scheduler.stats()
+
+@app.post("/api/admin/maintenance/{job}/run")
+def run_maintenance_job(job: str, current_user: User = Depends(get_current_admin)):
+    """Run a maintenance job now instead of waiting for its schedule"""
+    if job not in maintenance_scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Unknown maintenance job")
+    return maintenance_scheduler.run_job(job)
+
+@app.get("/api/admin/db-pool")
+def admin_db_pool(current_user: User = Depends(get_current_admin)):
+    """Connection pool state and checkout timings for this worker"""
+    return {"pools": pool_snapshots([
+        ("sync", engine),
+        ("async", async_engine.sync_engine if async_engine else None),
+    ])}
+
+@app.get("/api/admin/workspaces", response_model=WorkspacePage)
+def get_all_workspaces(limit: Optional[int] = None, cursor: Optional[str] = None, sort: str = "name",
+                       direction: Optional[str] = None, q: Optional[str] = None,
+                       current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Workspaces page by page with owner and counts; sort is name, created_at, tasks or members"""
+    try:
+        return load_workspace_page(db, limit or settings.admin_page_size, cursor, sort, direction, q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/admin/activity", response_model=ActivityLogPage)
+def get_activity_log(limit: int = 100, cursor: Optional[str] = None, user_id: Optional[uuid.UUID] = None,
+                     workspace_id: Optional[uuid.UUID] = None, action: Optional[str] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Activity log, newest first (keyset on created_at, id); since is inclusive, until exclusive"""
+    try:
+        return load_activity_page(db, limit, cursor, user_id, workspace_id, action, since, until)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # ==================== SMTP SETTINGS ====================
 
 @app.get("/api/admin/settings/smtp")
 def get_smtp_settings(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    settings = {}
-    rows = db.execute(text("SELECT key, value FROM site_settings WHERE key LIKE 'smtp_%'")).fetchall()
-    for row in rows:
-        settings[row[0]] = row[1]
+    smtp = site_settings.get(db).smtp
     
     return SMTPSettings(
-        smtp_host=settings.get('smtp_host', ''),
-        smtp_port=int(settings.get('smtp_port', 587)),
-        smtp_user=settings.get('smtp_user', ''),
-        smtp_password='********' if settings.get('smtp_password') else '',  # Hide password
-        smtp_from_email=settings.get('smtp_from_email', ''),
-        smtp_from_name=settings.get('smtp_from_name', 'Kanban'),
-        smtp_use_tls=settings.get('smtp_use_tls', 'true').lower() == 'true'
+        smtp_host=smtp.host,
+        smtp_port=smtp.port,
+        smtp_user=smtp.user,
+        smtp_password='********' if smtp.password else '',  # Hide password
+        smtp_from_email=smtp.from_email,
+        smtp_from_name=smtp.from_name,
+        smtp_use_tls=smtp.use_tls
     )
 
 @app.put("/api/admin/settings/smtp")
@@ -1246,6 +1298,7 @@ def update_smtp_settings(settings: SMTPSettings, current_user: User = Depends(ge
     upsert_setting('smtp_use_tls', str(settings.smtp_use_tls).lower())
     
     db.commit()
+    site_settings.invalidate()
     return {"message": "SMTP settings updated"}
 
 @app.post("/api/admin/settings/smtp/test")
@@ -1253,43 +1306,41 @@ def test_smtp(current_user: User = Depends(get_current_admin), db: Session = Dep
     import smtplib
     from email.mime.text import MIMEText
     
-    # Get settings
-    rows = db.execute(text("SELECT key, value FROM site_settings WHERE key LIKE 'smtp_%'")).fetchall()
-    settings = {row[0]: row[1] for row in rows}
+    smtp = site_settings.get(db).smtp
     
-    if not settings.get('smtp_host'):
+    if not smtp.configured:
         raise HTTPException(status_code=400, detail="SMTP not configured")
     
     try:
-        from_email = get_from_email(settings)
         msg = MIMEText("This is a test email from Kanban V2.")
         msg['Subject'] = "Kanban - SMTP Test"
-        msg['From'] = f"{settings.get('smtp_from_name', 'Kanban')} <{from_email}>"
+        msg['From'] = f"{smtp.from_name} <{smtp.sender}>"
         msg['To'] = current_user.email
         
-        if settings.get('smtp_use_tls', 'true').lower() == 'true':
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
+        server = smtplib.SMTP(smtp.host, smtp.port)
+        if smtp.use_tls:
             server.starttls()
-        else:
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
         
-        if settings.get('smtp_user') and settings.get('smtp_password'):
-            server.login(settings['smtp_user'], settings['smtp_password'])
+        if smtp.user and smtp.password:
+            server.login(smtp.user, smtp.password)
         
-        server.sendmail(from_email, [current_user.email], msg.as_string())
+        server.sendmail(smtp.sender, [current_user.email], msg.as_string())
         server.quit()
         
         return {"message": f"Test email sent to {current_user.email}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"SMTP error: {str(e)}")
 
+@app.get("/api/admin/email-outbox")
+def get_email_outbox_stats(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Queued/sent/failed email counts and this worker's dispatcher counters"""
+    return email_dispatcher.stats(db)
+
 # ==================== APP SETTINGS ====================
 
 @app.get("/api/admin/settings/app")
 def get_app_settings(current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    row = db.execute(text("SELECT value FROM site_settings WHERE key = 'app_base_url'")).fetchone()
-    app_base_url = row[0] if row else ""
-    return AppSettings(app_base_url=app_base_url)
+    return AppSettings(app_base_url=site_settings.get(db).app_base_url)
 
 @app.put("/api/admin/settings/app")
 def update_app_settings(settings: AppSettings, current_user: User = Depends(get_current_admin), db: Session = Depends(get_db)):
@@ -1299,6 +1350,7 @@ def update_app_settings(settings: AppSettings, current_user: User = Depends(get_
         ON CONFLICT (key) DO UPDATE SET value = :value, updated_at = NOW()
     """), {"value": settings.app_base_url})
     db.commit()
+    site_settings.invalidate()
     return {"message": "App settings updated"}
 
 # ==================== PASSWORD RESET ====================
@@ -1306,24 +1358,9 @@ def update_app_settings(settings: AppSettings, current_user: User = Depends(get_
 import secrets
 
 def send_reset_email(email: str, reset_url: str, db: Session):
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    
-    rows = db.execute(text("SELECT key, value FROM site_settings WHERE key LIKE 'smtp_%'")).fetchall()
-    settings = {row[0]: row[1] for row in rows}
+    subject = "Fun Kanban - Reset Your Password"
     
-    if not settings.get('smtp_host'):
-        return False
-    
-    try:
-        from_email = get_from_email(settings)
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = "Fun Kanban - Reset Your Password"
-        msg['From'] = f"{settings.get('smtp_from_name', 'Fun Kanban')} <{from_email}>"
-        msg['To'] = email
-        
-        text_body = f"""
+    text_body = f"""
 Reset your Fun Kanban password by clicking the link below:
 
 {reset_url}
@@ -1332,7 +1369,7 @@ This link expires in 1 hour.
 
 If you didn't request this, you can ignore this email.
 """
-        html = f"""
+    html = f"""
 <html>
 <body style="font-family: sans-serif; padding: 20px;">
     <h2 style="color: #22c55e;">Fun Kanban - Password Reset</h2>
@@ -1347,50 +1384,17 @@ If you didn't request this, you can ignore this email.
 </body>
 </html>
 """
-        msg.attach(MIMEText(text_body, 'plain'))
-        msg.attach(MIMEText(html, 'html'))
-        
-        if settings.get('smtp_use_tls', 'true').lower() == 'true':
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-            server.starttls()
-        else:
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-        
-        if settings.get('smtp_user') and settings.get('smtp_password'):
-            server.login(settings['smtp_user'], settings['smtp_password'])
-        
-        server.sendmail(from_email, [email], msg.as_string())
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Failed to send reset email: {e}")
-        return False
+    return enqueue_email(db, email, subject, text_body, html)
 
 def send_invite_email(email: str, display_name: str, invite_url: str, db: Session):
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    
-    rows = db.execute(text("SELECT key, value FROM site_settings WHERE key LIKE 'smtp_%'")).fetchall()
-    settings = {row[0]: row[1] for row in rows}
+    subject = "Fun Kanban - You've been invited!"
     
-    if not settings.get('smtp_host'):
-        print("SMTP not configured - invite email not sent")
-        return False
+    # Get company name from app settings
+    from config import get_settings
+    app_settings = get_settings()
+    company_line = f", created by {app_settings.email_company_name}" if app_settings.email_company_name else ""
     
-    try:
-        from_email = get_from_email(settings)
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = "Fun Kanban - You've been invited!"
-        msg['From'] = f"{settings.get('smtp_from_name', 'Fun Kanban')} <{from_email}>"
-        msg['To'] = email
-        
-        # Get company name from app settings
-        from config import get_settings
-        app_settings = get_settings()
-        company_line = f", created by {app_settings.email_company_name}" if app_settings.email_company_name else ""
-        
-        text_body = f"""
+    text_body = f"""
 Hi {display_name}!
 
 You've been invited to join Fun Kanban{company_line} — an easy way to organize tasks and track progress together.
@@ -1403,7 +1407,7 @@ This link expires in 48 hours.
 
 See you there!
 """
-        html = f"""
+    html = f"""
 <html>
 <body style="font-family: sans-serif; padding: 20px;">
     <h2 style="color: #22c55e;">Welcome to Fun Kanban! 🎉</h2>
@@ -1420,48 +1424,14 @@ See you there!
 </body>
 </html>
 """
-        msg.attach(MIMEText(text_body, 'plain'))
-        msg.attach(MIMEText(html, 'html'))
-        
-        if settings.get('smtp_use_tls', 'true').lower() == 'true':
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-            server.starttls()
-        else:
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-        
-        if settings.get('smtp_user') and settings.get('smtp_password'):
-            server.login(settings['smtp_user'], settings['smtp_password'])
-        
-        server.sendmail(from_email, [email], msg.as_string())
-        server.quit()
-        print(f"Invite email sent to {email}")
-        return True
-    except Exception as e:
-        print(f"Failed to send invite email: {e}")
-        return False
+    return enqueue_email(db, email, subject, text_body, html)
 
 def send_workspace_added_email(email: str, display_name: str, workspace_name: str, role: str, added_by: str, workspace_url: str, db: Session):
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    
-    rows = db.execute(text("SELECT key, value FROM site_settings WHERE key LIKE 'smtp_%'")).fetchall()
-    settings = {row[0]: row[1] for row in rows}
+    subject = f"Fun Kanban - You've been added to {workspace_name}!"
     
-    if not settings.get('smtp_host'):
-        print("SMTP not configured - workspace added email not sent")
-        return False
+    role_display = "an Editor" if role == "editor" else "a Viewer"
     
-    try:
-        from_email = get_from_email(settings)
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"Fun Kanban - You've been added to {workspace_name}!"
-        msg['From'] = f"{settings.get('smtp_from_name', 'Fun Kanban')} <{from_email}>"
-        msg['To'] = email
-        
-        role_display = "an Editor" if role == "editor" else "a Viewer"
-        
-        text_body = f"""
+    text_body = f"""
 Hi {display_name}!
 
 Great news! {added_by} has added you to the workspace "{workspace_name}" as {role_display}.
@@ -1471,7 +1441,7 @@ You can access the workspace here:
 
 See you there!
 """
-        html = f"""
+    html = f"""
 <html>
 <body style="font-family: sans-serif; padding: 20px;">
     <h2 style="color: #22c55e;">You've been added to a workspace! 🎉</h2>
@@ -1486,25 +1456,7 @@ See you there!
 </body>
 </html>
 """
-        msg.attach(MIMEText(text_body, 'plain'))
-        msg.attach(MIMEText(html, 'html'))
-        
-        if settings.get('smtp_use_tls', 'true').lower() == 'true':
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-            server.starttls()
-        else:
-            server = smtplib.SMTP(settings['smtp_host'], int(settings.get('smtp_port', 587)))
-        
-        if settings.get('smtp_user') and settings.get('smtp_password'):
-            server.login(settings['smtp_user'], settings['smtp_password'])
-        
-        server.sendmail(from_email, [email], msg.as_string())
-        server.quit()
-        print(f"Workspace added email sent to {email}")
-        return True
-    except Exception as e:
-        print(f"Failed to send workspace added email: {e}")
-        return False
+    return enqueue_email(db, email, subject, text_body, html)
 
 @app.post("/api/auth/forgot-password")
 def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
@@ -1526,14 +1478,14 @@ def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db
         INSERT INTO password_reset_tokens (user_id, token, expires_at)
         VALUES (:uid, :token, :expires)
     """), {"uid": user.id, "token": token, "expires": expires_at})
-    db.commit()
     
     # Build reset URL (frontend route)
     base_url = get_base_url(db)
     reset_url = f"{base_url}/reset-password?token={token}"
     
-    # Send email
+    # Queue email with the token
     send_reset_email(user.email, reset_url, db)
+    db.commit()
     
     return {"message": "If the email exists, a reset link has been sent."}
 
@@ -1578,6 +1530,136 @@ def get_client_features():
 def health_check():
     return {"status": "healthy", "service": "pip-kanban-v2"}
 
+# ==================== ASYNC ROUTES ====================
+# With DB_ASYNC=true the hot routes below take the place of their sync twins and
+# wait on Postgres without holding a threadpool thread. Task writes and board
+# reads run the existing ORM code through AsyncSession.run_sync (greenlet, no
+# thread); notifications are written against the AsyncSession directly.
+
+def async_route(method: str, path: str, **kwargs):
+    """Register the endpoint in place of the sync route with the same method and path."""
+    def decorator(endpoint):
+        routes = app.router.routes
+        index = next(i for i, route in enumerate(routes)
+                     if isinstance(route, APIRoute) and route.path == path and method in route.methods)
+        app.add_api_route(path, endpoint, methods=[method], **kwargs)
+        routes[index] = routes.pop()
+        return endpoint
+    return decorator
+
+if settings.db_async:
+    @async_route("GET", "/api/workspaces/{workspace_id}/tasks", response_model=List[TaskResponse])
+    async def get_tasks_async(workspace_id: uuid.UUID, request: Request, response: Response,
+                              current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+        await db.run_sync(check_workspace_access, current_user, workspace_id)
+        cached = not_modified(request, response, await db.run_sync(workspace_etag, workspace_id, "tasks"))
+        if cached:
+            return cached
+        return await db.run_sync(load_board, workspace_id)
+    
+    @async_route("GET", "/api/workspaces/{workspace_id}/board", response_model=BoardResponse)
+    async def get_board_async(workspace_id: uuid.UUID, request: Request, response: Response, limit: Optional[int] = None,
+                              current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+        await db.run_sync(check_workspace_access, current_user, workspace_id)
+        limit = limit or settings.board_page_size
+        version = await db.run_sync(workspace_version, workspace_id)
+        cached = not_modified(request, response, make_etag("board", workspace_id, version, limit))
+        if cached:
+            return cached
+        columns = await db.run_sync(load_board_page, workspace_id, limit)
+        return BoardResponse(columns=columns, version=version)
+    
+    @async_route("GET", "/api/workspaces/{workspace_id}/changes", response_model=WorkspaceChanges)
+    async def get_workspace_changes_async(workspace_id: uuid.UUID, since: int,
+                                          current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+        await db.run_sync(check_workspace_access, current_user, workspace_id)
+        return await db.run_sync(load_changes, workspace_id, since)
+    
+    @async_route("GET", "/api/workspaces/{workspace_id}/columns/{status}/tasks", response_model=TaskPage)
+    async def get_column_tasks_async(workspace_id: uuid.UUID, status: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                     current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+        await db.run_sync(check_workspace_access, current_user, workspace_id)
+        return await db.run_sync(lambda session: get_column_tasks(workspace_id, status, cursor, limit, session))
+    
+    @async_route("POST", "/api/tasks", response_model=TaskResponse)
+    async def create_task_async(task: TaskCreate, current_user: User = Depends(get_current_user_async),
+                                db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: create_task(task, current_user, session))
+    
+    @async_route("PUT", "/api/tasks/{task_id}", response_model=TaskResponse)
+    async def update_task_async(task_id: uuid.UUID, update: TaskUpdatePayload, current_user: User = Depends(get_current_user_async),
+                                db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: update_task(task_id, update, current_user, session))
+    
+    @async_route("POST", "/api/tasks/batch", response_model=List[TaskResponse])
+    async def batch_update_tasks_async(batch: TaskBatchPayload, current_user: User = Depends(get_current_user_async),
+                                       db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: batch_update_tasks(batch, current_user, session))
+    
+    @async_route("PUT", "/api/workspaces/{workspace_id}/tasks/reorder", response_model=List[TaskResponse])
+    async def reorder_tasks_async(workspace_id: uuid.UUID, reorder: TaskReorderPayload,
+                                  current_user: User = Depends(get_current_user_async),
+                                  db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: reorder_tasks(workspace_id, reorder, current_user, session))
+    
+    @async_route("DELETE", "/api/tasks/{task_id}")
+    async def delete_task_async(task_id: uuid.UUID, current_user: User = Depends(get_current_user_async),
+                                db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: delete_task(task_id, current_user, session))
+    
+    @async_route("GET", "/api/search", response_model=SearchPage)
+    async def search_tasks_async(q: str, workspace_id: Optional[uuid.UUID] = None, cursor: Optional[str] = None,
+                                 limit: Optional[int] = None, current_user: User = Depends(get_current_user_async),
+                                 db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: search_tasks(q, workspace_id, cursor, limit, current_user, session))
+    
+    @async_route("GET", "/api/notifications", response_model=List[NotificationResponse])
+    async def get_notifications_async(limit: int = 50, current_user: User = Depends(get_current_user_async),
+                                      db: AsyncSession = Depends(get_async_db)):
+        result = await db.execute(
+            select(Notification)
+            .where(Notification.user_id == current_user.id)
+            .order_by(Notification.created_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+    
+    @async_route("GET", "/api/notifications/count", response_model=NotificationCountResponse)
+    async def get_notification_count_async(current_user: User = Depends(get_current_user_async),
+                                           db: AsyncSession = Depends(get_async_db)):
+        return NotificationCountResponse(unread_count=await db.run_sync(get_unread, current_user.id))
+    
+    @async_route("POST", "/api/notifications/mark-read")
+    async def mark_notifications_read_async(current_user: User = Depends(get_current_user_async),
+                                            db: AsyncSession = Depends(get_async_db)):
+        marked = (await db.execute(
+            sql_update(Notification)
+            .where(Notification.user_id == current_user.id, Notification.read_at == None)
+            .values(read_at=datetime.utcnow())
+        )).rowcount
+        await db.run_sync(adjust_unread, current_user.id, -marked)
+        emit_user(db.sync_session, current_user.id, "unread_count",
+                  unread_count=await db.run_sync(get_unread, current_user.id))
+        await db.commit()
+        return {"message": "Notifications marked as read"}
+    
+    @async_route("DELETE", "/api/notifications/{notification_id}")
+    async def delete_notification_async(notification_id: uuid.UUID, current_user: User = Depends(get_current_user_async),
+                                        db: AsyncSession = Depends(get_async_db)):
+        notification = await db.scalar(
+            select(Notification).where(Notification.id == notification_id, Notification.user_id == current_user.id)
+        )
+        if not notification:
+            raise HTTPException(status_code=404, detail="Notification not found")
+        
+        await db.delete(notification)
+        if notification.read_at is None:
+            await db.run_sync(adjust_unread, current_user.id, -1)
+            emit_user(db.sync_session, current_user.id, "unread_count",
+                      unread_count=await db.run_sync(get_unread, current_user.id))
+        await db.commit()
+        return {"message": "Notification deleted"}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
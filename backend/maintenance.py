@@ -0,0 +1,253 @@
+"""
+Scheduled maintenance: retention purges and counter repair.
+
+A background thread per worker runs each Job when it is due. Purges delete in
+bounded batches of maintenance_batch_size rows, committing after every batch and
+pausing briefly in between, so no transaction holds many row locks or runs long.
+Batches are picked with FOR UPDATE SKIP LOCKED, so workers running the same job
+at the same time split the rows instead of waiting on each other.
+
+Retention rules:
+  notifications   read more than notification_read_retention_days ago, or
+                  created more than notification_unread_retention_days ago
+  sessions        past expires_at
+  reset_tokens    used or past expires_at
+  tombstones      delete records older than tombstone_retention_days; clients
+                  that last synced before them get a full reload instead
+  activity_partitions  drop activity_log months older than
+                  activity_retention_days and create the coming months
+                  (PostgreSQL; counts partitions rather than rows)
+  unread_counters recount drifted notification_counters rows (not a purge)
+  task_ranks      renumber task columns whose ranks got too dense (not a purge;
+                  columns are queued by ranking.place_task)
+
+Each run records rows affected, batches and time taken per job; the admin
+maintenance endpoint shows the last run and can trigger a job.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import select, delete, update, text, or_, and_
+from sqlalchemy.orm import Session
+
+import activity
+from config import get_settings
+from database import SessionLocal
+from models import Notification, Session as DBSession, Tombstone, WorkspaceVersion
+from notifications import adjust_unread_many, reconcile_unread_counts
+from ranking import rebalance_column, take_dense_columns
+from realtime import emit, user_channel, workspace_channel, RESYNC
+
+settings = get_settings()
+
+
+def delete_in_batches(db: Session, delete_batch: Callable[[Session, int], int]) -> Dict[str, int]:
+    """Call delete_batch(db, limit) and commit until it deletes less than a full batch."""
+    rows = batches = 0
+    while True:
+        deleted = delete_batch(db, settings.maintenance_batch_size)
+        db.commit()
+        rows += deleted
+        batches += 1
+        if deleted < settings.maintenance_batch_size:
+            return {"rows": rows, "batches": batches}
+        time.sleep(settings.maintenance_batch_pause_seconds)
+
+
+def purge_notifications(db: Session) -> Dict[str, int]:
+    now = datetime.utcnow()
+    expired = or_(
+        and_(Notification.read_at != None,
+             Notification.read_at < now - timedelta(days=settings.notification_read_retention_days)),
+        Notification.created_at < now - timedelta(days=settings.notification_unread_retention_days),
+    )
+
+    def delete_batch(db: Session, limit: int) -> int:
+        ids = select(Notification.id).where(expired).limit(limit).with_for_update(skip_locked=True)
+        rows = db.execute(
+            delete(Notification).where(Notification.id.in_(ids))
+            .returning(Notification.user_id, Notification.read_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        unread = Counter(row.user_id for row in rows if row.read_at is None)
+        adjust_unread_many(db, {user_id: -count for user_id, count in unread.items()})
+        for user_id in unread:
+            # Their badge count changed; open streams refetch it
+            emit(db, user_channel(user_id), RESYNC)
+        return len(rows)
+
+    return delete_in_batches(db, delete_batch)
+
+
+def purge_sessions(db: Session) -> Dict[str, int]:
+    now = datetime.utcnow()
+
+    def delete_batch(db: Session, limit: int) -> int:
+        ids = select(DBSession.id).where(DBSession.expires_at < now).limit(limit).with_for_update(skip_locked=True)
+        return db.execute(
+            delete(DBSession).where(DBSession.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    return delete_in_batches(db, delete_batch)
+
+
+def purge_reset_tokens(db: Session) -> Dict[str, int]:
+    # password_reset_tokens isn't mapped; batch by ctid since its key isn't ours to assume
+    def delete_batch(db: Session, limit: int) -> int:
+        return db.execute(text("""
+            DELETE FROM password_reset_tokens WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM password_reset_tokens
+                WHERE used = TRUE OR expires_at < NOW()
+                LIMIT :limit FOR UPDATE SKIP LOCKED
+            ))
+        """), {"limit": limit}).rowcount
+
+    return delete_in_batches(db, delete_batch)
+
+
+def purge_tombstones(db: Session) -> Dict[str, int]:
+    cutoff = datetime.utcnow() - timedelta(days=settings.tombstone_retention_days)
+
+    def delete_batch(db: Session, limit: int) -> int:
+        ids = select(Tombstone.id).where(Tombstone.deleted_at < cutoff).limit(limit).with_for_update(skip_locked=True)
+        rows = db.execute(
+            delete(Tombstone).where(Tombstone.id.in_(ids))
+            .returning(Tombstone.workspace_id, Tombstone.change_seq)
+            .execution_options(synchronize_session=False)
+        ).all()
+        purged = {}
+        for row in rows:
+            purged[row.workspace_id] = max(purged.get(row.workspace_id, 0), row.change_seq)
+        # Changes since anything older can no longer be replayed (see changes.py)
+        for workspace_id in sorted(purged, key=str):
+            db.execute(
+                update(WorkspaceVersion)
+                .where(WorkspaceVersion.workspace_id == workspace_id, WorkspaceVersion.purged_seq < purged[workspace_id])
+                .values(purged_seq=purged[workspace_id])
+            )
+        return len(rows)
+
+    return delete_in_batches(db, delete_batch)
+
+
+def maintain_activity_partitions(db: Session) -> Dict[str, int]:
+    if db.get_bind().dialect.name != "postgresql":
+        return {"rows": 0, "batches": 0}
+    # Partition DDL locks activity_log; give up rather than queue writers behind a long read
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    today = datetime.utcnow().date()
+    changed = activity.create_partitions(db, today, activity.add_months(today, settings.activity_partition_months_ahead))
+    if settings.activity_retention_days:
+        changed += activity.drop_partitions_before(db, datetime.utcnow() - timedelta(days=settings.activity_retention_days))
+    db.commit()
+    return {"rows": changed, "batches": 1}
+
+
+def reconcile_counters(db: Session) -> Dict[str, int]:
+    fixed = reconcile_unread_counts(db)
+    db.commit()
+    return {"rows": fixed, "batches": 1}
+
+
+def rebalance_task_ranks(db: Session) -> Dict[str, int]:
+    rows = 0
+    columns = take_dense_columns()
+    for workspace_id, status in columns:
+        rows += rebalance_column(db, workspace_id, status)
+        # Every card in the column has a new rank; open boards reload
+        emit(db, workspace_channel(workspace_id), RESYNC)
+        db.commit()
+    return {"rows": rows, "batches": len(columns)}
+
+
+class Job:
+    def __init__(self, name: str, run: Callable[[Session], Dict[str, int]], interval_seconds: float):
+        self.name = name
+        self.run = run
+        self.interval_seconds = interval_seconds
+        self.next_run = 0.0  # monotonic; 0 = due at startup
+        self.last_run: Optional[dict] = None
+        self.total_rows = 0
+
+
+class MaintenanceScheduler:
+    def __init__(self, jobs: List[Job]):
+        self.jobs = {job.name: job for job in jobs}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # one job at a time, whether scheduled or triggered
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for job in self.jobs.values():
+                if self._stop.is_set():
+                    return
+                if time.monotonic() >= job.next_run:
+                    self.run_job(job.name)
+            next_due = min(job.next_run for job in self.jobs.values())
+            self._stop.wait(max(next_due - time.monotonic(), 1))
+
+    def run_job(self, name: str) -> dict:
+        job = self.jobs[name]
+        with self._lock:
+            started_at = datetime.utcnow()
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                result = job.run(db)
+                error = None
+            except Exception as e:
+                db.rollback()
+                result = {"rows": 0, "batches": 0}
+                error = str(e)[:1000]
+            finally:
+                db.close()
+            job.next_run = time.monotonic() + job.interval_seconds
+            job.total_rows += result["rows"]
+            job.last_run = {
+                **result,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": error,
+            }
+        if error:
+            print(f"Maintenance job {name} failed: {error}")
+        elif result["rows"]:
+            print(f"Maintenance job {name}: {result['rows']} rows in {job.last_run['duration_ms']} ms")
+        return job.last_run
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None,
+            "jobs": {
+                job.name: {"interval_seconds": job.interval_seconds, "total_rows": job.total_rows, "last_run": job.last_run}
+                for job in self.jobs.values()
+            },
+        }
+
+
+scheduler = MaintenanceScheduler([
+    Job("notifications", purge_notifications, settings.maintenance_interval_seconds),
+    Job("sessions", purge_sessions, settings.maintenance_interval_seconds),
+    Job("reset_tokens", purge_reset_tokens, settings.maintenance_interval_seconds),
+    Job("tombstones", purge_tombstones, settings.maintenance_interval_seconds),
+    Job("activity_partitions", maintain_activity_partitions, settings.maintenance_interval_seconds),
+    Job("unread_counters", reconcile_counters, settings.notification_reconcile_seconds),
+    Job("task_ranks", rebalance_task_ranks, settings.task_rank_rebalance_seconds),
+])
@@ -0,0 +1,103 @@
+"""
+Workspace member listing - one join of workspace_members and users per page.
+
+The owner's entry comes from the workspace's owner join rather than from
+workspace_members, where the owner has no row or only the role="owner" row
+that reorder_workspaces creates to hold their sidebar order (that row is
+skipped). On the first page it is UNION ALLed in and sorted first, and a window
+count over the same statement gives the total. The owner entry's id is derived
+from the workspace and owner ids, which keeps it stable across calls (and ETag
+revalidations) without it ever colliding with a real member id.
+
+Members are keyset-paginated on (display_name, member id), optionally narrowed
+by a name / email search that matches like the admin user list (admin_lists.py).
+A page reads the workspace's members through uq_workspace_members_workspace_user
+and sorts them by name, which stays cheap at thousands of members.
+"""
+import uuid
+from typing import Optional
+
+from sqlalchemy import select, func, or_, tuple_, literal, union_all
+from sqlalchemy.orm import Session
+
+from models import User, Workspace, WorkspaceMember
+from board import encode_cursor, decode_cursor
+from schemas import WorkspaceMemberResponse, WorkspaceMemberPage
+from workspaces import Owner
+from admin_lists import search_pattern
+
+MAX_MEMBER_PAGE_SIZE = 200
+
+
+def owner_member_id(workspace_id, owner_id) -> uuid.UUID:
+    """Stable id of the owner's entry in the member list."""
+    return uuid.uuid5(workspace_id, str(owner_id))
+
+
+def name_matches(user, q: Optional[str]) -> list:
+    """WHERE clauses matching q against a users alias's email or display name."""
+    if not q or not q.strip():
+        return []
+    pattern = search_pattern(q.strip())
+    return [or_(user.email.ilike(pattern, escape="\\"), user.display_name.ilike(pattern, escape="\\"))]
+
+
+def load_member_page(db: Session, workspace_id, limit: int, cursor: Optional[str] = None,
+                     q: Optional[str] = None) -> WorkspaceMemberPage:
+    """One page of members, owner first, in one query. Raises ValueError on a bad cursor."""
+    limit = max(1, min(limit, MAX_MEMBER_PAGE_SIZE))
+    members = (
+        select(WorkspaceMember.id, WorkspaceMember.user_id, User.email, User.display_name,
+               WorkspaceMember.role, WorkspaceMember.created_at, literal(1).label("sort_group"))
+        .join(User, User.id == WorkspaceMember.user_id)
+        .join(Workspace, Workspace.id == WorkspaceMember.workspace_id)
+        .where(WorkspaceMember.workspace_id == workspace_id, WorkspaceMember.user_id != Workspace.owner_id,
+               *name_matches(User, q))
+    )
+    if cursor:
+        name, member_id = decode_cursor(cursor)
+        try:
+            member_id = uuid.UUID(member_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(name, str):
+            raise ValueError("Invalid cursor")
+        page = members.where(tuple_(User.display_name, WorkspaceMember.id) > tuple_(name, member_id)).subquery()
+        stmt = select(page)
+    else:
+        # The owner's row stands in for the member row they don't have; its
+        # id is replaced with owner_member_id() below
+        owner = (
+            select(Workspace.id, Workspace.owner_id.label("user_id"), Owner.email, Owner.display_name,
+                   literal("owner").label("role"), Workspace.created_at, literal(0).label("sort_group"))
+            .join(Owner, Owner.id == Workspace.owner_id)
+            .where(Workspace.id == workspace_id, *name_matches(Owner, q))
+        )
+        page = union_all(owner, members).subquery()
+        stmt = select(page, func.count().over().label("total"))
+    rows = db.execute(
+        stmt.order_by(page.c.sort_group, page.c.display_name, page.c.id).limit(limit + 1)
+    ).all()
+
+    total = None if cursor else (rows[0].total if rows else 0)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        # A page that ends on the owner resumes at the first member
+        next_cursor = encode_cursor([last.display_name, last.id] if last.sort_group else ["", uuid.UUID(int=0)])
+    return WorkspaceMemberPage(
+        items=[
+            WorkspaceMemberResponse(
+                id=row.id if row.sort_group else owner_member_id(workspace_id, row.user_id),
+                user_id=row.user_id,
+                user_email=row.email,
+                user_name=row.display_name,
+                role=row.role,
+                created_at=row.created_at
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+        total=total
+    )
@@ -0,0 +1,68 @@
+"""
+Schema migrations (Alembic, see migrations/).
+
+upgrade_database() brings the database to the latest revision. The app calls it
+at startup unless DB_AUTO_MIGRATE=false; `alembic upgrade head` from backend/
+does the same by hand. On Postgres a session advisory lock makes concurrent
+workers take turns, so only the first one to start actually migrates. The
+others poll for the lock without holding a transaction open, since the
+migrations build indexes CONCURRENTLY. On large databases, prefer running
+`alembic upgrade head` as a deploy step with DB_AUTO_MIGRATE=false.
+"""
+import os
+import time
+
+from alembic import command, op
+from alembic.config import Config
+from sqlalchemy import text
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_LOCK_KEY = 4_617_320  # arbitrary, shared by every worker
+MIGRATION_LOCK_POLL_SECONDS = 1
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+
+def _upgrade(config: Config, connection, revision: str) -> None:
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+    connection.commit()
+
+
+def upgrade_database(engine, revision: str = "head") -> None:
+    config = alembic_config()
+    config.attributes["configure_logging"] = False  # leave uvicorn's logging alone
+    if engine.dialect.name != "postgresql":
+        with engine.connect() as connection:
+            _upgrade(config, connection, revision)
+        return
+
+    # Wait by polling on an autocommit connection. A worker blocked in
+    # pg_advisory_lock sits in an open transaction, and CREATE INDEX
+    # CONCURRENTLY in the migrating worker waits for every older snapshot,
+    # which would deadlock the two.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+        while not lock_connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}):
+            time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+        try:
+            with engine.connect() as connection:
+                _upgrade(config, connection, revision)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop index `name` if a failed CREATE INDEX CONCURRENTLY left it INVALID.
+    Call before an IF NOT EXISTS create, which would otherwise skip it."""
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_index WHERE indexrelid = to_regclass('{name}') AND NOT indisvalid) THEN
+                EXECUTE 'DROP INDEX {name}';
+            END IF;
+        END $$
+    """)
@@ -0,0 +1,186 @@
+"""Baseline schema
+
+The schema as Base.metadata.create_all() used to build it, plus the two tables
+that only existed in deployed databases (site_settings, password_reset_tokens).
+Databases created before migrations existed already have most of these tables,
+so each one is only created if it is missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def create_table(name, *columns, **kwargs):
+    # Offline (--sql) runs have no database to inspect
+    if context.is_offline_mode() or not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns, **kwargs)
+
+
+def uuid_pk():
+    return sa.Column("id", UUID(as_uuid=True), primary_key=True)
+
+
+def created_at():
+    return sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+
+
+def updated_at():
+    return sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+
+
+def upgrade() -> None:
+    create_table(
+        "users",
+        uuid_pk(),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("display_name", sa.String(100), nullable=False),
+        sa.Column("is_admin", sa.Boolean()),
+        sa.Column("is_guest", sa.Boolean()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("theme", sa.String(20)),
+        created_at(),
+        updated_at(),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    create_table(
+        "workspaces",
+        uuid_pk(),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("owner_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("color", sa.String(7)),
+        created_at(),
+        updated_at(),
+    )
+    create_table(
+        "workspace_members",
+        uuid_pk(),
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("invited_by", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("display_order", sa.Integer()),
+        created_at(),
+    )
+    create_table(
+        "projects",
+        uuid_pk(),
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("color", sa.String(7)),
+        created_at(),
+        updated_at(),
+    )
+    create_table(
+        "tasks",
+        uuid_pk(),
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("project_id", UUID(as_uuid=True), sa.ForeignKey("projects.id", ondelete="SET NULL")),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("priority", sa.String(20)),
+        sa.Column("blocked", sa.Boolean()),
+        sa.Column("block_reason", sa.Text()),
+        sa.Column("on_hold", sa.Boolean()),
+        sa.Column("hold_reason", sa.Text()),
+        sa.Column("due_date", sa.Date()),
+        sa.Column("position", sa.Integer()),
+        sa.Column("created_by", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("assigned_to", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        created_at(),
+        updated_at(),
+    )
+    create_table(
+        "task_updates",
+        uuid_pk(),
+        sa.Column("task_id", UUID(as_uuid=True), sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("content", sa.Text(), nullable=False),
+        created_at(),
+    )
+    create_table(
+        "activity_log",
+        uuid_pk(),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE")),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("entity_type", sa.String(50)),
+        sa.Column("entity_id", UUID(as_uuid=True)),
+        sa.Column("details", sa.JSON()),
+        created_at(),
+    )
+    create_table(
+        "sessions",
+        uuid_pk(),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("refresh_token", sa.String(255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        created_at(),
+    )
+    create_table(
+        "notifications",
+        uuid_pk(),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("type", sa.String(50), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("data", sa.JSON()),
+        sa.Column("read_at", sa.DateTime(timezone=True)),
+        created_at(),
+    )
+    create_table(
+        "notification_counters",
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    create_table(
+        "email_outbox",
+        uuid_pk(),
+        sa.Column("to_email", sa.String(255), nullable=False),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("text_body", sa.Text(), nullable=False),
+        sa.Column("html_body", sa.Text()),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_error", sa.Text()),
+        created_at(),
+        sa.Column("sent_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_email_outbox_due", "email_outbox", ["status", "next_attempt_at"], if_not_exists=True)
+
+    # Not mapped in models.py; main.py reads and writes them with raw SQL
+    create_table(
+        "site_settings",
+        sa.Column("key", sa.String(100), primary_key=True),
+        sa.Column("value", sa.Text()),
+        updated_at(),
+    )
+    create_table(
+        "password_reset_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("token", sa.String(255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("used", sa.Boolean(), nullable=False, server_default=sa.false()),
+        created_at(),
+    )
+
+
+def downgrade() -> None:
+    for table in ("password_reset_tokens", "site_settings", "email_outbox", "notification_counters",
+                  "notifications", "sessions", "activity_log", "task_updates", "tasks", "projects",
+                  "workspace_members", "workspaces", "users"):
+        op.drop_table(table)
@@ -0,0 +1,85 @@
+"""Indexes for the hot queries, unique workspace membership
+
+Each index is matched to the filter and ORDER BY of the queries that use it:
+
+  tasks             (workspace_id, status, position, id)  board columns, column counts, keyset pages
+                    (project_id)                          ON DELETE SET NULL when a project goes
+  task_updates      (task_id, created_at DESC, id DESC)   comment pages, latest-comment previews
+  notifications     (user_id, created_at DESC)            the bell's list
+                    (user_id) WHERE read_at IS NULL       mark-read, unread recounts
+                    (read_at) WHERE read_at IS NOT NULL   retention purge of read notifications
+                    (created_at)                          retention purge of old notifications
+  activity_log      (created_at DESC)                     admin activity log
+                    (workspace_id, created_at DESC)       per-workspace history, cascade deletes
+  workspace_members UNIQUE (workspace_id, user_id)        role lookups, is-member checks
+                    (user_id)                             a user's workspaces
+  workspaces        (owner_id)                            owned workspaces
+  projects          (workspace_id)                        project lists
+  sessions          (refresh_token), (user_id), (expires_at)
+  password_reset_tokens (token)
+
+Indexes are built CONCURRENTLY so a live database keeps taking writes.
+Duplicate memberships are removed first (the earliest row wins), because the
+unique constraint can't be added while any exist.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrate import drop_invalid_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_tasks_workspace_status_position", "tasks", ["workspace_id", "status", "position", "id"], {}),
+    ("ix_tasks_project_id", "tasks", ["project_id"], {}),
+    ("ix_task_updates_task_created", "task_updates", ["task_id", sa.text("created_at DESC"), sa.text("id DESC")], {}),
+    ("ix_notifications_user_created", "notifications", ["user_id", sa.text("created_at DESC")], {}),
+    ("ix_notifications_user_unread", "notifications", ["user_id"], {"postgresql_where": sa.text("read_at IS NULL")}),
+    ("ix_notifications_read_at", "notifications", ["read_at"], {"postgresql_where": sa.text("read_at IS NOT NULL")}),
+    ("ix_notifications_created_at", "notifications", ["created_at"], {}),
+    ("ix_activity_log_created_at", "activity_log", [sa.text("created_at DESC")], {}),
+    ("ix_activity_log_workspace_created", "activity_log", ["workspace_id", sa.text("created_at DESC")], {}),
+    ("ix_workspace_members_user_id", "workspace_members", ["user_id"], {}),
+    ("ix_workspaces_owner_id", "workspaces", ["owner_id"], {}),
+    ("ix_projects_workspace_id", "projects", ["workspace_id"], {}),
+    ("ix_sessions_refresh_token", "sessions", ["refresh_token"], {}),
+    ("ix_sessions_user_id", "sessions", ["user_id"], {}),
+    ("ix_sessions_expires_at", "sessions", ["expires_at"], {}),
+    ("ix_password_reset_tokens_token", "password_reset_tokens", ["token"], {}),
+]
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM workspace_members a
+        USING workspace_members b
+        WHERE a.workspace_id = b.workspace_id AND a.user_id = b.user_id
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+    """)
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            drop_invalid_index(name)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+        drop_invalid_index("uq_workspace_members_workspace_user")
+        op.create_index("uq_workspace_members_workspace_user", "workspace_members", ["workspace_id", "user_id"],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+    op.execute("""
+        ALTER TABLE workspace_members
+        ADD CONSTRAINT uq_workspace_members_workspace_user UNIQUE USING INDEX uq_workspace_members_workspace_user
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_workspace_members_workspace_user", "workspace_members", type_="unique")
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,48 @@
+"""Fractional task ranks
+
+tasks.position becomes a double precision rank (ranking.py), and every column
+is renumbered to RANK_STEP spacing in its current order. Existing positions
+were max+1 integers, often with duplicates, so ties are broken by created_at
+and then id. ix_tasks_workspace_status_position is rebuilt by the type change.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+RANK_STEP = 1024
+
+
+def upgrade() -> None:
+    op.alter_column("tasks", "position", type_=sa.Float(), existing_type=sa.Integer(),
+                    postgresql_using="position::double precision")
+    op.execute(f"""
+        UPDATE tasks SET position = ranked.rank
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY workspace_id, status ORDER BY position, created_at, id
+            ) * {RANK_STEP} AS rank
+            FROM tasks
+        ) ranked
+        WHERE tasks.id = ranked.id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE tasks SET position = ranked.rank
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY workspace_id, status ORDER BY position, id) AS rank
+            FROM tasks
+        ) ranked
+        WHERE tasks.id = ranked.id
+    """)
+    op.alter_column("tasks", "position", type_=sa.Integer(), existing_type=sa.Float(),
+                    postgresql_using="position::integer")
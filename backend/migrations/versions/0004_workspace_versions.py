@@ -0,0 +1,31 @@
+"""Per-workspace change counters
+
+workspace_versions backs the ETags on the board, project, member and workspace
+list routes (versions.py). Existing workspaces start at version 1.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workspace_versions",
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO workspace_versions (workspace_id, version) SELECT id, 1 FROM workspaces")
+
+
+def downgrade() -> None:
+    op.drop_table("workspace_versions")
@@ -0,0 +1,62 @@
+"""Change sequence and tombstones for delta sync
+
+tasks, projects and task_updates get change_seq, the workspace version
+(workspace_versions.version) of the transaction that last wrote them. Existing
+rows get 0, which every client's `since` is past. tombstones records deletes.
+workspace_versions.purged_seq marks how far tombstones have been purged.
+
+The new columns have constant defaults, so adding them doesn't rewrite the
+tables. The tasks index is built CONCURRENTLY.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from migrate import drop_invalid_index
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def change_seq():
+    return sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    op.add_column("tasks", change_seq())
+    op.add_column("projects", change_seq())
+    op.add_column("task_updates", change_seq())
+    op.add_column("workspace_versions", sa.Column("purged_seq", sa.BigInteger(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "tombstones",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("workspace_id", UUID(as_uuid=True), sa.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("entity_type", sa.String(20), nullable=False),
+        sa.Column("entity_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_tombstones_workspace_seq", "tombstones", ["workspace_id", "change_seq"])
+    op.create_index("ix_tombstones_deleted_at", "tombstones", ["deleted_at"])
+
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_tasks_workspace_change_seq")
+        op.create_index("ix_tasks_workspace_change_seq", "tasks", ["workspace_id", "change_seq"],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_workspace_change_seq", table_name="tasks", postgresql_concurrently=True, if_exists=True)
+    op.drop_table("tombstones")
+    op.drop_column("workspace_versions", "purged_seq")
+    op.drop_column("task_updates", "change_seq")
+    op.drop_column("projects", "change_seq")
+    op.drop_column("tasks", "change_seq")
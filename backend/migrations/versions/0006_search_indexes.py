@@ -0,0 +1,40 @@
+"""GIN indexes for full-text search over tasks and comments
+
+Expression indexes rather than stored tsvector columns, so nothing is added to
+the tables and writes only pay for the index update. The expressions must stay
+identical to task_search_document() and comment_search_document() in
+models.py, or search stops using them. Built CONCURRENTLY so a live database
+keeps taking writes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+from migrate import drop_invalid_index
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_tasks_search", "tasks",
+     "(setweight(to_tsvector('english'::regconfig, title), 'A') || "
+     "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B'))"),
+    ("ix_task_updates_search", "task_updates", "to_tsvector('english'::regconfig, content)"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, expression in INDEXES:
+            drop_invalid_index(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({expression})")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
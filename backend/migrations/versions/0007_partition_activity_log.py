@@ -0,0 +1,118 @@
+"""Partition activity_log by month
+
+activity_log becomes a table range-partitioned on created_at, with one
+partition per month and a DEFAULT partition for anything outside them. Old
+months can then be dropped whole (activity.py, maintenance job
+activity_partitions) instead of deleted row by row. The primary key becomes
+(id, created_at), since a partitioned table's unique keys must include the
+partition key. created_at becomes NOT NULL; rows without one get the migration
+time.
+
+Existing rows are copied into the new table once, under an exclusive lock on
+the old one. On a very large log, prune it first or expect writes to wait for
+the copy. Partitions are created from the oldest row's month through
+PARTITIONS_AHEAD months from now; the maintenance job keeps extending them.
+Indexes are declared on the parent, so every partition gets them. They now end
+in id to match the admin log's (created_at, id) keyset, and
+ix_activity_log_user_created serves its user filter.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from datetime import date, datetime, timezone
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+PARTITIONS_AHEAD = 3
+COLUMNS = "id, user_id, workspace_id, action, entity_type, entity_id, details, created_at"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_indexes() -> None:
+    # id breaks created_at ties in the admin log's keyset order
+    op.execute("CREATE INDEX ix_activity_log_created_at ON activity_log (created_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_activity_log_workspace_created ON activity_log (workspace_id, created_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_activity_log_user_created ON activity_log (user_id, created_at DESC, id DESC)")
+
+
+def drop_old_table_names() -> None:
+    # Free the names the new table's constraints and indexes take
+    op.execute("ALTER TABLE activity_log RENAME TO activity_log_old")
+    op.execute("ALTER TABLE activity_log_old RENAME CONSTRAINT activity_log_pkey TO activity_log_old_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_activity_log_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_activity_log_workspace_created")
+    op.execute("DROP INDEX IF EXISTS ix_activity_log_user_created")
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE activity_log IN EXCLUSIVE MODE")
+    drop_old_table_names()
+    op.execute("""
+        CREATE TABLE activity_log (
+            id uuid NOT NULL,
+            user_id uuid REFERENCES users (id),
+            workspace_id uuid REFERENCES workspaces (id) ON DELETE CASCADE,
+            action varchar(50) NOT NULL,
+            entity_type varchar(50),
+            entity_id uuid,
+            details json,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE activity_log_default PARTITION OF activity_log DEFAULT")
+
+    today = datetime.now(timezone.utc).date()
+    # Offline (--sql) runs have no rows to inspect; start from the current month
+    oldest = None
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM activity_log_old")).scalar()
+    month = (oldest.astimezone(timezone.utc).date() if oldest else today).replace(day=1)
+    last = add_months(today, PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE activity_log_p{month:%Y_%m} PARTITION OF activity_log "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00+00')"
+        )
+        month = add_months(month, 1)
+    create_indexes()
+
+    op.execute(f"""
+        INSERT INTO activity_log ({COLUMNS})
+        SELECT id, user_id, workspace_id, action, entity_type, entity_id, details, coalesce(created_at, now())
+        FROM activity_log_old
+    """)
+    op.execute("DROP TABLE activity_log_old")
+    op.execute("ANALYZE activity_log")
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE activity_log IN EXCLUSIVE MODE")
+    drop_old_table_names()
+    op.execute("""
+        CREATE TABLE activity_log (
+            id uuid PRIMARY KEY,
+            user_id uuid REFERENCES users (id),
+            workspace_id uuid REFERENCES workspaces (id) ON DELETE CASCADE,
+            action varchar(50) NOT NULL,
+            entity_type varchar(50),
+            entity_id uuid,
+            details json,
+            created_at timestamptz DEFAULT now()
+        )
+    """)
+    op.execute(f"INSERT INTO activity_log ({COLUMNS}) SELECT {COLUMNS} FROM activity_log_old")
+    op.execute("CREATE INDEX ix_activity_log_created_at ON activity_log (created_at DESC)")
+    op.execute("CREATE INDEX ix_activity_log_workspace_created ON activity_log (workspace_id, created_at DESC)")
+    op.execute("DROP TABLE activity_log_old")
@@ -0,0 +1,44 @@
+"""Indexes for the paginated admin user and workspace lists
+
+B-tree indexes on (display_name, id) and (created_at, id) serve the user list's
+keyset sorts; email sorts use the existing unique email index. pg_trgm GIN
+indexes on users.email, users.display_name and workspaces.name serve the
+lists' ILIKE search, both the prefix form used for one- and two-character
+queries and the substring form. CREATE EXTENSION needs a role allowed to create
+pg_trgm (it is a trusted extension, so database owners can). Indexes are built
+CONCURRENTLY so a live database keeps taking writes.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+from migrate import drop_invalid_index
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_users_display_name_id", "users", "(display_name, id)"),
+    ("ix_users_created_at_id", "users", "(created_at, id)"),
+    ("ix_users_email_trgm", "users", "USING gin (email gin_trgm_ops)"),
+    ("ix_users_display_name_trgm", "users", "USING gin (display_name gin_trgm_ops)"),
+    ("ix_workspaces_name_trgm", "workspaces", "USING gin (name gin_trgm_ops)"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, table, definition in INDEXES:
+            drop_invalid_index(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -1,11 +1,24 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, Date, Text, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, BigInteger, Float, Date, Text, JSON, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 import uuid
 
 Base = declarative_base()
 
+# Full-text search documents (see search.py). Searches must use these exact
+# expressions, inlined as constants, to match the GIN expression indexes below.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+def task_search_document(title, description):
+    """Title (weight A) and description (weight B) of a task as a tsvector."""
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, title), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(description, literal_column("''"))), literal_column("'B'"))
+    )
+
+def comment_search_document(content):
+    return func.to_tsvector(SEARCH_CONFIG, content)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -20,6 +33,16 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Admin user list: keyset sorts and ILIKE search (pg_trgm, migration 0008)
+        Index("ix_users_display_name_id", "display_name", "id"),
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_email_trgm", "email", postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_users_display_name_trgm", "display_name", postgresql_using="gin",
+              postgresql_ops={"display_name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
     owned_workspaces = relationship("Workspace", back_populates="owner", cascade="all, delete-orphan")
     workspace_memberships = relationship("WorkspaceMember", back_populates="user", cascade="all, delete-orphan", foreign_keys="[WorkspaceMember.user_id]")
@@ -27,6 +50,11 @@ class User(Base):
 
 class Workspace(Base):
     __tablename__ = "workspaces"
+    __table_args__ = (
+        Index("ix_workspaces_owner_id", "owner_id"),
+        Index("ix_workspaces_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
@@ -45,6 +73,10 @@ class Workspace(Base):
 
 class WorkspaceMember(Base):
     __tablename__ = "workspace_members"
+    __table_args__ = (
+        UniqueConstraint("workspace_id", "user_id", name="uq_workspace_members_workspace_user"),
+        Index("ix_workspace_members_user_id", "user_id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
@@ -60,11 +92,13 @@ class WorkspaceMember(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_workspace_id", "workspace_id"),)
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
     color = Column(String(7), default="#3b82f6")
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")  # Workspace version of the last change
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -87,12 +121,20 @@ class Task(Base):
     on_hold = Column(Boolean, default=False)
     hold_reason = Column(Text)
     due_date = Column(Date)
-    position = Column(Integer, default=0)
+    position = Column(Float, default=0)  # Fractional rank within the status column (see ranking.py)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     assigned_to = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")  # Workspace version of the last change
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_tasks_workspace_status_position", "workspace_id", "status", "position", "id"),
+        Index("ix_tasks_project_id", "project_id"),
+        Index("ix_tasks_workspace_change_seq", "workspace_id", "change_seq"),
+        Index("ix_tasks_search", task_search_document(title, description), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
     workspace = relationship("Workspace", back_populates="tasks")
     project = relationship("Project", back_populates="tasks")
@@ -105,8 +147,14 @@ class TaskUpdate(Base):
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     content = Column(Text, nullable=False)
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")  # Workspace version when written
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_task_updates_task_created", task_id, created_at.desc(), id.desc()),
+        Index("ix_task_updates_search", comment_search_document(content), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
     task = relationship("Task", back_populates="updates")
 
@@ -120,13 +168,26 @@ class ActivityLog(Base):
     entity_type = Column(String(50))
     entity_id = Column(UUID(as_uuid=True))
     details = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL, where the table is partitioned by month (see
+    # activity.py) and its primary key is (id, created_at)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_activity_log_created_at", created_at.desc(), id.desc()),
+        Index("ix_activity_log_workspace_created", workspace_id, created_at.desc(), id.desc()),
+        Index("ix_activity_log_user_created", user_id, created_at.desc(), id.desc()),
+    )
     
     # Relationships
     workspace = relationship("Workspace", back_populates="activity_logs")
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_refresh_token", "refresh_token"),
+        Index("ix_sessions_user_id", "user_id"),
+        Index("ix_sessions_expires_at", "expires_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -149,5 +210,58 @@ class Notification(Base):
     read_at = Column(DateTime(timezone=True), nullable=True)  # null = unread
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_notifications_user_created", user_id, created_at.desc()),
+        Index("ix_notifications_user_unread", user_id, postgresql_where=text("read_at IS NULL")),
+        Index("ix_notifications_read_at", read_at, postgresql_where=text("read_at IS NOT NULL")),
+        Index("ix_notifications_created_at", created_at),
+    )
+    
     # Relationships
     user = relationship("User")
+
+class NotificationCounter(Base):
+    """Unread notifications per user, maintained alongside the notifications table"""
+    __tablename__ = "notification_counters"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    text_body = Column(Text, nullable=False)
+    html_body = Column(Text)
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+class WorkspaceVersion(Base):
+    """Change counter per workspace, bumped by every write its readers can see (versions.py)"""
+    __tablename__ = "workspace_versions"
+    
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    purged_seq = Column(BigInteger, nullable=False, default=0, server_default="0")  # Newest tombstone purged so far
+
+class Tombstone(Base):
+    """A deleted task, project or comment, kept so delta sync can report the delete"""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_workspace_seq", "workspace_id", "change_seq"),
+        Index("ix_tombstones_deleted_at", "deleted_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(20), nullable=False)  # task, project, comment
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
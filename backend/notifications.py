@@ -0,0 +1,156 @@
+"""
+Notification fan-out and per-user unread counters.
+
+fan_out() writes one notification per recipient with a single INSERT ... SELECT,
+so notifying a large workspace costs two statements (the insert and the counter
+upsert) rather than an ORM object and a flush per member. notify_many() does the
+same for a list of notifications that each have their own text.
+
+notification_counters keeps one row per user with the number of unread
+notifications, so the bell's count is a primary-key lookup instead of a COUNT(*)
+over the user's notifications. Every write that changes the unread set adjusts
+the counter in the same transaction: adjust_unread() when notifications are
+created, read or deleted while unread. Marking everything read subtracts the
+number of rows it updated rather than zeroing the counter, which would wipe the
++1 of a notification committed concurrently.
+
+Counters can still drift (rows removed by hand, a crash between deploys that
+changed the rules), so reconcile_unread_counts() recomputes them from the
+notifications table. It runs as a maintenance job (see maintenance.py) at startup,
+which also backfills counters for notifications that predate the table, and then
+every notification_reconcile_seconds.
+"""
+import uuid
+from collections import Counter
+from typing import Dict, List, Union
+
+from sqlalchemy import select, update, func, exists, literal, JSON, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement, Subquery
+
+from models import Notification, NotificationCounter
+from realtime import emit_user
+
+
+def get_unread(db: Session, user_id) -> int:
+    count = db.scalar(select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id))
+    return max(count or 0, 0)
+
+
+def adjust_unread(db: Session, user_id, delta: int) -> None:
+    """Add `delta` to a user's unread count, creating the counter row if needed."""
+    if not delta:
+        return
+    stmt = insert(NotificationCounter).values(user_id=user_id, unread_count=delta)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count},
+    ))
+
+
+def adjust_unread_many(db: Session, deltas: Dict) -> None:
+    """adjust_unread() for many users at once: `deltas` maps user id -> delta (one upsert)."""
+    if not deltas:
+        return
+    # Rows in user id order, so concurrent upserts lock shared counters in the same order
+    stmt = insert(NotificationCounter).values([
+        {"user_id": user_id, "unread_count": delta}
+        for user_id, delta in sorted(deltas.items(), key=lambda item: str(item[0]))
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count},
+    ))
+
+
+def fan_out(db: Session, recipients: Subquery, notification_type: Union[str, ColumnElement],
+            title: Union[str, ColumnElement], message: str, data: dict = None) -> int:
+    """Notify every user id in `recipients` (a subquery with a user_id column)
+    with one INSERT ... SELECT. `notification_type` and `title` may be SQL
+    expressions over recipients.c.user_id to vary them per recipient. Bumps the
+    unread counters and queues a stream event per recipient; doesn't commit.
+    Returns the number of notifications created."""
+    if isinstance(notification_type, str):
+        notification_type = literal(notification_type, String)
+    if isinstance(title, str):
+        title = literal(title, String)
+    rows = db.execute(
+        insert(Notification)
+        .from_select(
+            ["id", "user_id", "type", "title", "message", "data"],
+            select(func.gen_random_uuid(), recipients.c.user_id, notification_type, title,
+                   literal(message, String), literal(data, JSON))
+        )
+        .returning(Notification.id, Notification.user_id, Notification.type, Notification.title, Notification.created_at)
+    ).all()
+    adjust_unread_many(db, Counter(row.user_id for row in rows))
+    for row in rows:
+        emit_user(db, row.user_id, "notification", notification={
+            "id": row.id, "type": row.type, "title": row.title, "message": message,
+            "data": data, "read_at": None, "created_at": row.created_at,
+        })
+    return len(rows)
+
+
+def notify_many(db: Session, notifications: List[dict]) -> int:
+    """Insert notifications given as dicts (user_id, type, title, message, data)
+    with one multi-row INSERT, then bump counters and queue stream events like
+    fan_out(). Doesn't commit. Returns the number of notifications created."""
+    if not notifications:
+        return 0
+    notifications = {uuid.uuid4(): notification for notification in notifications}
+    rows = db.execute(
+        insert(Notification)
+        .values([{"id": notification_id, **notification} for notification_id, notification in notifications.items()])
+        .returning(Notification.id, Notification.user_id, Notification.created_at)
+    ).all()
+    adjust_unread_many(db, Counter(row.user_id for row in rows))
+    for row in rows:
+        emit_user(db, row.user_id, "notification", notification={
+            "data": None, **notifications[row.id], "id": row.id, "read_at": None, "created_at": row.created_at,
+        })
+    return len(rows)
+
+
+def reconcile_unread_counts(db: Session) -> int:
+    """Rewrite counters that disagree with the notifications table; returns how
+    many were fixed. Doesn't commit.
+
+    The counter rows are locked (in user id order, like adjust_unread_many)
+    before anything is counted. adjust_unread() calls that were in flight then
+    have committed, and the UPDATE - a new statement with a new snapshot under
+    READ COMMITTED - counts their notifications too instead of overwriting
+    their increments with a stale total."""
+    db.execute(
+        select(NotificationCounter.user_id)
+        .order_by(NotificationCounter.user_id)
+        .with_for_update()
+    )
+    actual = (
+        select(func.count(Notification.id))
+        .where(Notification.user_id == NotificationCounter.user_id, Notification.read_at == None)
+        .scalar_subquery()
+    )
+    fixed = db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.unread_count != actual)
+        .values(unread_count=actual)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # Users with unread notifications but no counter row yet
+    missing = (
+        select(Notification.user_id, func.count(Notification.id))
+        .where(
+            Notification.read_at == None,
+            ~exists().where(NotificationCounter.user_id == Notification.user_id)
+        )
+        .group_by(Notification.user_id)
+    )
+    fixed += db.execute(
+        insert(NotificationCounter)
+        .from_select(["user_id", "unread_count"], missing)
+        .on_conflict_do_nothing(index_elements=[NotificationCounter.user_id])
+    ).rowcount
+    return fixed
+
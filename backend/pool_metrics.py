@@ -0,0 +1,159 @@
+"""
+Connection pool instrumentation.
+
+Engines are built with InstrumentedQueuePool (or the asyncio variant) so that
+every checkout is timed, and pool events record connects, checkins, hold times
+and invalidations. pool_snapshot() combines those counters with the pool's own
+size/overflow figures for the admin pool endpoint. Numbers are per worker.
+"""
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+HOLD_BUCKETS_MS = (5, 25, 100, 250, 1000, 5000, 30000)
+
+
+class Histogram:
+    def __init__(self, buckets_ms):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        index = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS_MS)
+        self.hold = Histogram(HOLD_BUCKETS_MS)
+
+    def record(self, **counters) -> None:
+        with self._lock:
+            for name, delta in counters.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def observe(self, histogram: Histogram, ms: float) -> None:
+        with self._lock:
+            histogram.observe(ms)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait": self.wait.to_dict(),
+                "connection_hold": self.hold.to_dict(),
+            }
+
+
+class _InstrumentedPool:
+    """Times Pool.connect(), i.e. how long a request waits for a connection
+    (queueing, pre-ping and opening new connections included)."""
+    metrics: PoolMetrics
+
+    def connect(self):
+        metrics = self.metrics
+        metrics.record(waiting=1)
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.record(timeouts=1)
+            raise
+        finally:
+            metrics.record(waiting=-1)
+            metrics.observe(metrics.wait, (time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine) -> None:
+    """Attach a PoolMetrics to an engine built with one of the pools above."""
+    pool = engine.pool
+    metrics = pool.metrics = PoolMetrics()
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, record):
+        metrics.record(connects=1)
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        metrics.record(checkouts=1)
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, record):
+        started = record.info.pop("checked_out_at", None)
+        metrics.record(checkins=1)
+        if started is not None:
+            metrics.observe(metrics.hold, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, record, exception):
+        metrics.record(invalidations=1)
+
+
+def pool_snapshot(engine, name: str) -> Optional[dict]:
+    if engine is None:
+        return None
+    pool = engine.pool
+    snapshot = {
+        "name": name,
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        snapshot.update(metrics.to_dict())
+    return snapshot
+
+
+def pool_snapshots(engines) -> List[dict]:
+    return [snapshot for snapshot in (pool_snapshot(engine, name) for name, engine in engines) if snapshot]
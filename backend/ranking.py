@@ -0,0 +1,162 @@
+"""
+Task ordering with fractional ranks.
+
+Task.position is a float rank within the task's (workspace, status) column. A
+new card is appended RANK_STEP after the column's last card, and a moved card
+gets the midpoint of its new neighbours, so a move writes only the moved row.
+
+Repeated moves into the same gap halve it each time. Once a move leaves two
+cards closer than MIN_RANK_GAP, the column is queued for the maintenance
+scheduler's task_ranks job, which renumbers it to RANK_STEP spacing in one
+UPDATE. If no float fits between two neighbours before that happens, the column
+is renumbered inline before the move.
+
+On PostgreSQL every writer takes a transaction-level advisory lock on the
+column first. Concurrent creates therefore can't pick the same rank, and a
+rebalance can't interleave with a move computed from the old spacing.
+
+Every rewritten row is stamped with the transaction's workspace version for
+delta sync. The version bump row-locks the workspace until commit, so it is
+always taken before any column lock; taking them the other way round could
+deadlock against another writer.
+"""
+import threading
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select, update, func, and_, tuple_
+from sqlalchemy.orm import Session
+
+from models import Task
+from versions import touch_workspace
+
+RANK_STEP = 1024.0
+MIN_RANK_GAP = 1e-3
+
+_dense: Set[Tuple] = set()
+_dense_lock = threading.Lock()
+
+
+def lock_column(db: Session, workspace_id, status: str) -> None:
+    """Serialize rank writers on one column until the transaction ends (PostgreSQL only)."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(
+            func.hashtextextended(f"tasks:{workspace_id}:{status}", 0)
+        )))
+
+
+def rank_between(lower: Optional[float], upper: Optional[float]) -> Optional[float]:
+    """A rank strictly between two neighbours (None = column edge), or None if no float fits."""
+    if lower is None and upper is None:
+        return RANK_STEP
+    if lower is None:
+        return upper - RANK_STEP
+    if upper is None:
+        return lower + RANK_STEP
+    middle = (lower + upper) / 2
+    return middle if lower < middle < upper else None
+
+
+def next_rank(db: Session, workspace_id, status: str) -> float:
+    """Rank for a card appended to a column. Locks the column until commit."""
+    lock_column(db, workspace_id, status)
+    last = db.scalar(select(func.max(Task.position)).where(Task.workspace_id == workspace_id, Task.status == status))
+    return rank_between(last, None)
+
+
+def append_tasks(db: Session, workspace_id, status: str, task_ids: List) -> None:
+    """Move tasks from other columns to the end of status's column in one UPDATE,
+    keeping their current relative order. Locks the column until commit."""
+    seq = touch_workspace(db, workspace_id)
+    start = next_rank(db, workspace_id, status)
+    ranked = (
+        select(
+            Task.id,
+            (start + (func.row_number().over(order_by=(Task.position, Task.id)) - 1) * RANK_STEP).label("rank"),
+        )
+        .where(Task.id.in_(task_ids))
+        .subquery()
+    )
+    db.execute(
+        update(Task)
+        .where(Task.id == ranked.c.id)
+        .values(status=status, position=ranked.c.rank, change_seq=seq)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def neighbour_ranks(db: Session, task: Task, status: str, after_id=None, before_id=None):
+    """(lower, upper) ranks of the slot right after after_id, or right before before_id.
+
+    Without an anchor the slot is the end of the column. The task being moved is
+    never its own neighbour. Raises ValueError if the anchor isn't in the column.
+    """
+    column = and_(Task.workspace_id == task.workspace_id, Task.status == status, Task.id != task.id)
+    anchor_id = after_id or before_id
+    if anchor_id is None:
+        return db.scalar(select(func.max(Task.position)).where(column)), None
+
+    anchor = db.execute(select(Task.position, Task.id).where(column, Task.id == anchor_id)).first()
+    if anchor is None:
+        raise ValueError("Anchor task is not in the target column")
+    key, anchor_key = tuple_(Task.position, Task.id), tuple_(anchor.position, anchor.id)
+    if after_id:
+        upper = db.scalar(
+            select(Task.position).where(column, key > anchor_key).order_by(Task.position, Task.id).limit(1)
+        )
+        return anchor.position, upper
+    lower = db.scalar(
+        select(Task.position).where(column, key < anchor_key)
+        .order_by(Task.position.desc(), Task.id.desc()).limit(1)
+    )
+    return lower, anchor.position
+
+
+def place_task(db: Session, task: Task, status: str, after_id=None, before_id=None) -> None:
+    """Move task into status's column after after_id / before before_id (default: the end).
+
+    Only task's row is written, unless the gap is exhausted and the column has to
+    be renumbered first. Flush earlier moves before placing a card next to them.
+    """
+    seq = touch_workspace(db, task.workspace_id)
+    lock_column(db, task.workspace_id, status)
+    lower, upper = neighbour_ranks(db, task, status, after_id, before_id)
+    rank = rank_between(lower, upper)
+    if rank is None:
+        rebalance_column(db, task.workspace_id, status)
+        lower, upper = neighbour_ranks(db, task, status, after_id, before_id)
+        rank = rank_between(lower, upper)
+    elif lower is not None and upper is not None and rank - lower < MIN_RANK_GAP:
+        with _dense_lock:
+            _dense.add((task.workspace_id, status))
+    task.status = status
+    task.position = rank
+    task.change_seq = seq
+
+
+def rebalance_column(db: Session, workspace_id, status: str) -> int:
+    """Renumber a column to RANK_STEP spacing, keeping its order. Returns the rows changed."""
+    seq = touch_workspace(db, workspace_id)
+    lock_column(db, workspace_id, status)
+    db.flush()
+    ranked = (
+        select(
+            Task.id,
+            (func.row_number().over(order_by=(Task.position, Task.id)) * RANK_STEP).label("rank"),
+        )
+        .where(Task.workspace_id == workspace_id, Task.status == status)
+        .subquery()
+    )
+    return db.execute(
+        update(Task)
+        .where(Task.id == ranked.c.id, Task.position.is_distinct_from(ranked.c.rank))
+        .values(position=ranked.c.rank, change_seq=seq)
+        .execution_options(synchronize_session="fetch")
+    ).rowcount
+
+
+def take_dense_columns() -> List[Tuple]:
+    """(workspace_id, status) of every column queued for a rebalance, clearing the queue."""
+    with _dense_lock:
+        columns = list(_dense)
+        _dense.clear()
+    return columns
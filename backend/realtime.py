@@ -0,0 +1,253 @@
+"""
+Realtime fan-out for WebSocket / SSE subscribers.
+
+Routes call emit(db, channel, message) while they build a change; messages are
+held on the session and only published once that session commits (and dropped
+on rollback), so subscribers never see changes that didn't happen.
+
+Channels are plain strings: "workspace:<id>" carries board deltas and
+"user:<id>" carries a user's notifications. Each worker keeps its own
+subscribers in `hub`. With REALTIME_BACKEND=postgres the messages travel as
+pg_notify() inside the committing transaction and every worker LISTENs, so
+subscribers connected to other workers receive them too; the default "local"
+backend only reaches subscribers of the worker that made the change.
+"""
+import asyncio
+import json
+import select
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from config import get_settings
+
+settings = get_settings()
+
+PG_CHANNEL = "kanban_realtime"
+PG_PAYLOAD_LIMIT = 7900  # NOTIFY payloads must stay under 8000 bytes
+RESYNC = {"type": "resync"}
+
+
+def workspace_channel(workspace_id) -> str:
+    return f"workspace:{workspace_id}"
+
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
+
+
+class Hub:
+    """Per-worker subscriber registry. Subscribers are asyncio queues owned by
+    the event loop; publish() may be called from any thread."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(channel)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[channel]
+
+    def publish(self, channel: str, message: dict) -> None:
+        if self.loop is None or channel not in self.subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._deliver(channel, message)
+        else:
+            self.loop.call_soon_threadsafe(self._deliver, channel, message)
+
+    def _deliver(self, channel: str, message: dict) -> None:
+        for queue in list(self.subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self.subscribers.values())
+
+
+hub = Hub(queue_size=settings.realtime_queue_size)
+
+
+async def pump_websocket(websocket, channel: str) -> None:
+    """Forward `channel` to an accepted WebSocket until the client goes away,
+    with a ping every realtime_ping_seconds to keep proxies from timing out."""
+    queue = hub.subscribe(channel)
+
+    async def send():
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.realtime_ping_seconds)
+            except asyncio.TimeoutError:
+                message = {"type": "ping"}
+            await websocket.send_json(message)
+
+    async def receive():
+        # Clients don't send anything; this only notices the disconnect
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(send()), asyncio.ensure_future(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(channel, queue)
+
+
+async def stream_events(channel: str, initial: Optional[dict] = None):
+    """Server-Sent Events body for `channel`: one `data:` line per message and a
+    comment line every realtime_ping_seconds so proxies keep the stream open.
+    Starlette cancels the generator when the client disconnects."""
+    queue = hub.subscribe(channel)
+    try:
+        yield f"retry: {settings.realtime_retry_ms}\n\n"
+        if initial is not None:
+            yield f"data: {json.dumps(initial, default=_json_default)}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.realtime_ping_seconds)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"data: {json.dumps(message)}\n\n"
+    finally:
+        hub.unsubscribe(channel, queue)
+
+
+def emit(db: Session, channel: str, message: dict) -> None:
+    """Queue a message to publish when `db` commits."""
+    db.info.setdefault("realtime_messages", []).append((channel, message))
+
+
+def emit_workspace(db: Session, workspace_id, event_type: str, actor_id=None, **data) -> None:
+    emit(db, workspace_channel(workspace_id), {
+        "type": event_type,
+        "workspace_id": str(workspace_id),
+        "actor_id": str(actor_id) if actor_id else None,
+        **data,
+    })
+
+
+def emit_user(db: Session, user_id, event_type: str, **data) -> None:
+    emit(db, user_channel(user_id), {"type": event_type, **data})
+
+
+def _encode(message: dict) -> dict:
+    """JSON-safe copy (UUIDs, datetimes, pydantic models) of a message."""
+    return json.loads(json.dumps(message, default=_json_default))
+
+
+def _json_default(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_postgres(session):
+    if settings.realtime_backend != "postgres" or not session.info.get("realtime_messages"):
+        return
+    payloads = []
+    for channel, message in session.info.pop("realtime_messages"):
+        payload = json.dumps({"channel": channel, "message": message}, default=_json_default)
+        if len(payload.encode()) > PG_PAYLOAD_LIMIT:
+            payload = json.dumps({"channel": channel, "message": RESYNC})
+        payloads.append(payload)
+    # One round trip however many messages (a notification fan-out emits one per recipient)
+    session.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": PG_CHANNEL, "payloads": payloads}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_local(session):
+    for channel, message in session.info.pop("realtime_messages", ()):
+        hub.publish(channel, _encode(message))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop("realtime_messages", None)
+
+
+class PostgresListener:
+    """LISTENs on PG_CHANNEL on a dedicated connection and hands every
+    notification to the local hub (REALTIME_BACKEND=postgres)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="realtime-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"Realtime listener error: {e}")
+                self._stop.wait(2)
+
+    def _listen(self) -> None:
+        # Raw DBAPI connection outside the pool: it blocks in select() for its whole life
+        conn = self.engine.raw_connection()
+        conn.detach()
+        try:
+            dbapi = conn.driver_connection
+            dbapi.rollback()  # pre-ping may have opened a transaction
+            dbapi.autocommit = True
+            with dbapi.cursor() as cursor:
+                cursor.execute(f"LISTEN {PG_CHANNEL}")
+            while not self._stop.is_set():
+                if select.select([dbapi], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    notify = dbapi.notifies.pop(0)
+                    try:
+                        data = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    hub.publish(data["channel"], data["message"])
+        finally:
+            conn.close()
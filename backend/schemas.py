@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime, date
 from uuid import UUID
 
@@ -47,6 +47,11 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+    total: Optional[int] = None  # matching users (first page only)
+
 # Workspace schemas
 class WorkspaceBase(BaseModel):
     name: str
@@ -73,6 +78,11 @@ class WorkspaceMemberResponse(BaseModel):
     role: str
     created_at: datetime
 
+class WorkspaceMemberPage(BaseModel):
+    items: List[WorkspaceMemberResponse]  # the owner comes first, on the first page
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+    total: Optional[int] = None  # matching members including the owner (first page only)
+
 class WorkspaceResponse(BaseModel):
     id: UUID
     name: str
@@ -88,6 +98,11 @@ class WorkspaceResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WorkspacePage(BaseModel):
+    items: List[WorkspaceResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+    total: Optional[int] = None  # matching workspaces (first page only)
+
 # Project schemas
 class ProjectBase(BaseModel):
     name: str
@@ -133,9 +148,26 @@ class TaskUpdatePayload(BaseModel):
     hold_reason: Optional[str] = None
     due_date: Optional[date] = None
     project_id: Optional[UUID] = None
-    position: Optional[int] = None
+    position: Optional[float] = None  # Raw rank; prefer after_id / before_id
+    after_id: Optional[UUID] = None  # Place the task right after this one (in its new column)
+    before_id: Optional[UUID] = None  # ... or right before this one
     assigned_to: Optional[UUID] = None
 
+class TaskBatchItem(TaskUpdatePayload):
+    task_id: UUID
+
+class TaskBatchPayload(BaseModel):
+    updates: List[TaskBatchItem]
+
+class TaskMove(BaseModel):
+    task_id: UUID
+    status: Optional[str] = None  # Defaults to the task's current column
+    after_id: Optional[UUID] = None
+    before_id: Optional[UUID] = None
+
+class TaskReorderPayload(BaseModel):
+    moves: List[TaskMove]  # Applied in order, so a move can be anchored to a card moved earlier
+
 class TaskUpdateCreate(BaseModel):
     content: str
 
@@ -146,6 +178,10 @@ class TaskUpdateResponse(BaseModel):
     content: str
     created_at: datetime
 
+class TaskUpdatePage(BaseModel):
+    items: List[TaskUpdateResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get older comments
+
 class TaskResponse(BaseModel):
     id: UUID
     workspace_id: UUID
@@ -161,17 +197,62 @@ class TaskResponse(BaseModel):
     on_hold: bool = False
     hold_reason: Optional[str] = None
     due_date: Optional[date] = None
-    position: int
+    position: float
     created_by: Optional[UUID]
     assigned_to: Optional[UUID]
     assigned_to_name: Optional[str]
-    updates: List[TaskUpdateResponse] = []
+    comment_count: int = 0
+    latest_update: Optional[TaskUpdateResponse] = None  # newest comment, content truncated
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class TaskPage(BaseModel):
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+    total: Optional[int] = None  # column total (first page only)
+
+class BoardResponse(BaseModel):
+    columns: Dict[str, TaskPage]
+    version: int = 0  # pass to /changes?since= to catch up without reloading the board
+
+# Delta sync schemas
+class CommentChange(TaskUpdateResponse):
+    task_id: UUID
+
+class DeletedEntity(BaseModel):
+    entity_type: str  # task, project or comment
+    id: UUID
+
+class WorkspaceChanges(BaseModel):
+    version: int
+    reset: bool = False  # too old or too much to replay - reload the board instead
+    tasks: List[TaskResponse] = []
+    projects: List[ProjectResponse] = []
+    comments: List[CommentChange] = []
+    deleted: List[DeletedEntity] = []
+    totals: Dict[str, int] = {}  # tasks per status column, when anything changed
+
+# Search schemas
+class SearchHit(BaseModel):
+    kind: str  # task (title/description matched) or comment
+    task_id: UUID
+    comment_id: Optional[UUID] = None
+    workspace_id: UUID
+    workspace_name: str
+    title: str  # the task's title, for either kind
+    status: str
+    author_name: Optional[str] = None  # comment hits only
+    commented_at: Optional[datetime] = None  # comment hits only
+    snippet: str  # matched words wrapped in \x02 ... \x03
+    rank: float
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+
 # Activity log schemas
 class ActivityLogResponse(BaseModel):
     id: UUID
@@ -184,16 +265,28 @@ class ActivityLogResponse(BaseModel):
     details: Optional[dict]
     created_at: datetime
 
+class ActivityLogPage(BaseModel):
+    items: List[ActivityLogResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get older entries
+
     class Config:
         from_attributes = True
 
 # Admin stats
+class WorkspaceTaskStats(BaseModel):
+    workspace_id: UUID
+    name: str
+    total_tasks: int
+    tasks_by_status: Dict[str, int]
+
 class AdminStats(BaseModel):
     total_users: int
     active_users: int
     total_workspaces: int
     total_tasks: int
     tasks_by_status: dict
+    top_workspaces: List[WorkspaceTaskStats] = []  # Largest workspaces by task count
+    computed_at: Optional[datetime] = None  # When this snapshot was taken
 
 # SMTP Settings
 class SMTPSettings(BaseModel):
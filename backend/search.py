@@ -0,0 +1,104 @@
+"""
+Full-text search over task titles, descriptions and comments.
+
+Matching uses the GIN expression indexes on tasks and task_updates (see
+task_search_document() in models.py), scoped to the workspaces in the caller's
+sidebar, or to one workspace. The query is parsed with websearch_to_tsquery,
+so "quoted phrases", `or` and -exclusions work as in a web search box.
+
+Task hits and comment hits are ranked together with ts_rank: title words weigh
+most, then the description, then comments. Pages are keyset-paginated on
+(rank, id). ts_headline re-parses the text it highlights, which is the
+expensive part, so snippets are built in an outer query over the final page
+only.
+"""
+import uuid
+from typing import Optional
+
+from sqlalchemy import select, func, literal, case, and_, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from models import Task, TaskUpdate, Workspace, SEARCH_CONFIG, task_search_document, comment_search_document
+from board import Author, encode_cursor, decode_cursor
+from schemas import SearchHit, SearchPage
+from workspaces import user_workspaces_filter
+
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_QUERY_LENGTH = 200
+
+# Snippet highlight markers. Control characters can't clash with user text, and
+# the client escapes the snippet before wrapping the marked runs
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = (f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", '
+                    "MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=\" … \"")
+
+
+def search_hits_query(user, query, workspace_id=None):
+    """(kind, id, task_id, rank) of every matching task and comment the user can see."""
+    if workspace_id is not None:
+        in_scope = Task.workspace_id == workspace_id
+    else:
+        visible, _ = user_workspaces_filter(user)
+        in_scope = Task.workspace_id.in_(select(Workspace.id).where(visible))
+    task_document = task_search_document(Task.title, Task.description)
+    comment_document = comment_search_document(TaskUpdate.content)
+    return union_all(
+        select(literal("task").label("kind"), Task.id.label("id"), Task.id.label("task_id"),
+               func.ts_rank(task_document, query).label("rank"))
+        .where(in_scope, task_document.op("@@")(query)),
+        select(literal("comment"), TaskUpdate.id, TaskUpdate.task_id, func.ts_rank(comment_document, query))
+        .join(Task, Task.id == TaskUpdate.task_id)
+        .where(in_scope, comment_document.op("@@")(query)),
+    ).subquery()
+
+
+def search(db: Session, user, text: str, limit: int, cursor: Optional[str] = None,
+           workspace_id=None) -> SearchPage:
+    """One page of hits, best first. Raises ValueError on an empty query or bad cursor."""
+    text = text.strip()[:MAX_QUERY_LENGTH]
+    if not text:
+        raise ValueError("Search query is empty")
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+
+    hits = search_hits_query(user, query, workspace_id)
+    stmt = select(hits)
+    if cursor:
+        rank, hit_id = decode_cursor(cursor)
+        try:
+            rank, hit_id = float(rank), uuid.UUID(hit_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        stmt = stmt.where(tuple_(hits.c.rank, hits.c.id) < tuple_(rank, hit_id))
+    page = stmt.order_by(hits.c.rank.desc(), hits.c.id.desc()).limit(limit + 1).subquery()
+
+    is_task = page.c.kind == "task"
+    snippet = case(
+        (is_task, func.ts_headline(
+            SEARCH_CONFIG, Task.title + " — " + func.coalesce(Task.description, ""),
+            query, HEADLINE_OPTIONS
+        )),
+        else_=func.ts_headline(SEARCH_CONFIG, TaskUpdate.content, query, HEADLINE_OPTIONS),
+    )
+    rows = db.execute(
+        select(page.c.kind, page.c.id, page.c.rank, page.c.task_id, Task.workspace_id,
+               Workspace.name.label("workspace_name"), Task.title, Task.status,
+               Author.display_name.label("author_name"), TaskUpdate.created_at.label("commented_at"),
+               snippet.label("snippet"))
+        .join(Task, Task.id == page.c.task_id)
+        .join(Workspace, Workspace.id == Task.workspace_id)
+        .outerjoin(TaskUpdate, and_(~is_task, TaskUpdate.id == page.c.id))
+        .outerjoin(Author, Author.id == TaskUpdate.user_id)
+        .order_by(page.c.rank.desc(), page.c.id.desc())
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].rank, rows[-1].id])
+
+    return SearchPage(items=[
+        SearchHit(comment_id=row.id if row.kind == "comment" else None, **row._mapping)
+        for row in rows
+    ], next_cursor=next_cursor)
@@ -0,0 +1,96 @@
+"""
+Admin-editable settings stored in the site_settings table (key/value rows).
+
+site_settings.get(db) returns a typed, immutable snapshot that is loaded once and
+then reused. Every `site_settings_check_seconds` a worker compares a cheap
+version stamp (row count + newest updated_at) with the one it loaded, so changes
+written by another worker are picked up within that interval; the worker that
+writes calls invalidate() and sees its own change immediately.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import get_settings
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class SMTPConfig:
+    host: str = ""
+    port: int = 587
+    user: str = ""
+    password: str = ""
+    from_email: str = ""
+    from_name: str = "Fun Kanban"
+    use_tls: bool = True
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.host)
+
+    @property
+    def sender(self) -> str:
+        """Envelope sender - from_email falls back to the SMTP user."""
+        return self.from_email or self.user
+
+
+@dataclass(frozen=True)
+class SiteSettings:
+    smtp: SMTPConfig
+    app_base_url: str = ""
+
+    @classmethod
+    def from_rows(cls, values: dict) -> "SiteSettings":
+        try:
+            port = int(values.get('smtp_port') or 587)
+        except ValueError:
+            port = 587
+        return cls(
+            smtp=SMTPConfig(
+                host=values.get('smtp_host') or "",
+                port=port,
+                user=values.get('smtp_user') or "",
+                password=values.get('smtp_password') or "",
+                from_email=values.get('smtp_from_email') or "",
+                from_name=values.get('smtp_from_name') or "Fun Kanban",
+                use_tls=(values.get('smtp_use_tls') or 'true').lower() == 'true',
+            ),
+            app_base_url=values.get('app_base_url') or "",
+        )
+
+
+class SiteSettingsStore:
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[SiteSettings] = None
+        self._version = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def get(self, db: Session) -> SiteSettings:
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            version = tuple(db.execute(text("SELECT COUNT(*), MAX(updated_at) FROM site_settings")).one())
+            if self._snapshot is None or version != self._version:
+                rows = db.execute(text("SELECT key, value FROM site_settings")).fetchall()
+                self._snapshot = SiteSettings.from_rows({row[0]: row[1] for row in rows})
+                self._version = version
+                self.loads += 1
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+
+site_settings = SiteSettingsStore(check_interval=settings.site_settings_check_seconds)
@@ -0,0 +1,113 @@
+"""
+Per-workspace change counters and the ETags built from them.
+
+workspace_versions holds one counter per workspace. Every write that changes
+what the workspace's readers see (tasks, comments, projects, members, the
+workspace itself, a member's name or email) calls touch_workspace() or
+touch_user_workspaces() in the same transaction, so the counter moves
+whenever the board, project list or member list could have changed.
+
+The counter is also the workspace's change sequence for delta sync
+(changes.py). touch_workspace() bumps it once per transaction and returns the
+new value, which the transaction stamps on the tasks, projects and comments it
+writes (change_seq) and on tombstones for what it deletes. The row lock the bump
+takes is held until commit, so a workspace's sequence numbers become visible in
+order and a client that has seen version N can ask for everything after N.
+
+GET routes derive their ETag from the counter plus the route's own parameters.
+If the client's If-None-Match matches, not_modified() returns a 304 after one
+primary-key lookup, before anything else is loaded or serialized.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, select, update, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import Task, Workspace, WorkspaceMember, WorkspaceVersion
+
+# Part of every ETag; bump it when a tagged response changes shape so clients
+# don't keep replaying bodies cached by an older release
+ETAG_SCHEMA = 1
+
+
+def touch_workspace(db: Session, workspace_id) -> int:
+    """Bump a workspace's change counter (creating it if needed) the first time
+    it's called in a transaction; returns the transaction's version."""
+    bumped = db.info.setdefault("workspace_versions", {})
+    if workspace_id not in bumped:
+        stmt = insert(WorkspaceVersion).values(workspace_id=workspace_id, version=1)
+        bumped[workspace_id] = db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[WorkspaceVersion.workspace_id],
+                set_={"version": WorkspaceVersion.version + 1},
+            ).returning(WorkspaceVersion.version)
+        ).scalar()
+    return bumped[workspace_id]
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_versions(session):
+    session.info.pop("workspace_versions", None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_versions(session, previous_transaction):
+    session.info.pop("workspace_versions", None)
+
+
+def touch_user_workspaces(db: Session, user_id) -> None:
+    """Bump every workspace the user owns or belongs to, e.g. after a profile edit,
+    and stamp the tasks assigned to them (their assignee name is in the response)."""
+    workspace_ids = union(
+        select(Workspace.id).where(Workspace.owner_id == user_id),
+        select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == user_id),
+    )
+    db.execute(
+        update(WorkspaceVersion)
+        .where(WorkspaceVersion.workspace_id.in_(workspace_ids))
+        .values(version=WorkspaceVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Task)
+        .where(Task.assigned_to == user_id)
+        .values(change_seq=select(WorkspaceVersion.version)
+                .where(WorkspaceVersion.workspace_id == Task.workspace_id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def workspace_version(db: Session, workspace_id) -> int:
+    return db.scalar(select(WorkspaceVersion.version).where(WorkspaceVersion.workspace_id == workspace_id)) or 0
+
+
+def make_etag(*parts) -> str:
+    raw = ":".join(str(part) for part in (ETAG_SCHEMA, *parts))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:24]}"'
+
+
+def workspace_etag(db: Session, workspace_id, resource: str, *params) -> str:
+    """ETag for one of a workspace's resources at its current version."""
+    return make_etag(resource, workspace_id, workspace_version(db, workspace_id), *params)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110) against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag the response with etag, or return a 304 to send instead if the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,105 @@
+"""
+Workspace summaries - WorkspaceResponse rows with owner name, member count and
+task count computed in the same SELECT (correlated subqueries), instead of
+three follow-up queries per workspace.
+"""
+from typing import List, Optional
+
+from sqlalchemy import select, func, exists, or_
+from sqlalchemy.orm import Session, aliased
+
+from models import User, Workspace, WorkspaceMember, WorkspaceVersion, Task
+from schemas import WorkspaceResponse
+from versions import make_etag
+
+Owner = aliased(User)
+
+member_count_col = (
+    select(func.count(WorkspaceMember.id))
+    .where(WorkspaceMember.workspace_id == Workspace.id)
+    .correlate(Workspace)
+    .scalar_subquery()
+    + 1  # owner
+).label("member_count")
+
+task_count_col = (
+    select(func.count(Task.id))
+    .where(Task.workspace_id == Workspace.id)
+    .correlate(Workspace)
+    .scalar_subquery()
+).label("task_count")
+
+
+def workspace_summary_query():
+    """SELECT Workspace, owner_name, member_count, task_count."""
+    return (
+        select(Workspace, Owner.display_name, member_count_col, task_count_col)
+        .outerjoin(Owner, Owner.id == Workspace.owner_id)
+    )
+
+
+def build_workspace_response(workspace: Workspace, owner_name: Optional[str], member_count: int,
+                             task_count: int, display_order: int = 0) -> WorkspaceResponse:
+    return WorkspaceResponse(
+        id=workspace.id,
+        name=workspace.name,
+        description=workspace.description,
+        color=workspace.color,
+        owner_id=workspace.owner_id,
+        owner_name=owner_name or "Unknown",
+        member_count=member_count,
+        task_count=task_count,
+        display_order=display_order or 0,
+        created_at=workspace.created_at
+    )
+
+
+def load_workspace_summary(db: Session, workspace_id) -> Optional[WorkspaceResponse]:
+    row = db.execute(workspace_summary_query().where(Workspace.id == workspace_id)).first()
+    return build_workspace_response(*row) if row else None
+
+
+def user_workspaces_filter(user: User):
+    """(WHERE clause, display_order column) selecting the workspaces in a user's sidebar.
+
+    Guests only see workspaces they were explicitly added to.
+    """
+    is_member = exists().where(
+        WorkspaceMember.workspace_id == Workspace.id,
+        WorkspaceMember.user_id == user.id
+    )
+    display_order = func.coalesce(
+        select(WorkspaceMember.display_order)
+        .where(WorkspaceMember.workspace_id == Workspace.id, WorkspaceMember.user_id == user.id)
+        .correlate(Workspace)
+        .limit(1)
+        .scalar_subquery(),
+        0
+    ).label("display_order")
+    visible = is_member if user.is_guest else or_(Workspace.owner_id == user.id, is_member)
+    return visible, display_order
+
+
+def load_user_workspaces(db: Session, user: User) -> List[WorkspaceResponse]:
+    """Sidebar listing: every workspace the user owns or belongs to, sorted by
+    the user's display_order, in a single query."""
+    visible, display_order = user_workspaces_filter(user)
+    stmt = (
+        workspace_summary_query().add_columns(display_order)
+        .where(visible)
+        .order_by(display_order, Workspace.created_at, Workspace.id)
+    )
+    return [build_workspace_response(*row) for row in db.execute(stmt).all()]
+
+
+def user_workspaces_etag(db: Session, user: User) -> str:
+    """ETag for load_user_workspaces: the visible workspaces with their versions and
+    the user's ordering, read without the per-workspace counts."""
+    visible, display_order = user_workspaces_filter(user)
+    rows = db.execute(
+        select(Workspace.id, func.coalesce(WorkspaceVersion.version, 0), display_order)
+        .outerjoin(WorkspaceVersion, WorkspaceVersion.workspace_id == Workspace.id)
+        .where(visible)
+        .order_by(Workspace.id)
+    ).all()
+    return make_etag("workspaces", user.id, *(tuple(row) for row in rows))
@@ -8,6 +8,8 @@ class ApiClient {
   constructor() {
     this.accessToken = localStorage.getItem('accessToken');
     this.refreshToken = localStorage.getItem('refreshToken');
+    // GET bodies by URL with their ETag, replayed when the server answers 304
+    this.etagCache = new Map();
   }
 
   setTokens(accessToken, refreshToken) {
@@ -22,6 +24,7 @@ class ApiClient {
     this.refreshToken = null;
     localStorage.removeItem('accessToken');
     localStorage.removeItem('refreshToken');
+    this.etagCache.clear();
   }
 
   async request(endpoint, options = {}) {
@@ -32,6 +35,10 @@ class ApiClient {
       headers['Authorization'] = `Bearer ${this.accessToken}`;
     }
 
+    const isGet = !options.method || options.method === 'GET';
+    const cached = isGet ? this.etagCache.get(url) : undefined;
+    if (cached) headers['If-None-Match'] = cached.etag;
+
     let response = await fetch(url, { ...options, headers });
 
     // 401 → try refresh
@@ -43,12 +50,17 @@ class ApiClient {
       }
     }
 
+    if (response.status === 304 && cached) return cached.body;
+
     if (!response.ok) {
       const err = await response.json().catch(() => ({ detail: 'Request failed' }));
       throw new Error(err.detail || 'Request failed');
     }
 
-    return response.json();
+    const body = await response.json();
+    const etag = response.headers.get('ETag');
+    if (isGet && etag) this.etagCache.set(url, { etag, body });
+    return body;
   }
 
   async refreshAccessToken() {
@@ -119,7 +131,12 @@ class ApiClient {
     return this.request('/workspaces/reorder', { method: 'PUT', body: JSON.stringify(workspaceIds) });
   }
 
-  async getWorkspaceMembers(wsId) { return this.request(`/workspaces/${wsId}/members`); }
+  // params: { limit, cursor, q }; returns { items (owner first), next_cursor, total }
+  async getWorkspaceMembers(wsId, params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => value && query.set(key, value));
+    return this.request(`/workspaces/${wsId}/members?${query}`);
+  }
 
   async addWorkspaceMember(wsId, userId, role) {
     return this.request(`/workspaces/${wsId}/members`, {
@@ -154,6 +171,27 @@ class ApiClient {
   // ─── Tasks ─────────────────────────────────────────────
   async getTasks(wsId) { return this.request(`/workspaces/${wsId}/tasks`); }
 
+  async getBoard(wsId, limit) {
+    return this.request(`/workspaces/${wsId}/board${limit ? `?limit=${limit}` : ''}`);
+  }
+
+  // Tasks, projects and comments changed, and ids deleted, since a board version
+  async getChanges(wsId, since) {
+    return this.request(`/workspaces/${wsId}/changes?since=${since}`);
+  }
+
+  workspaceSocketUrl(wsId) {
+    const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const token = encodeURIComponent(this.accessToken || '');
+    return `${proto}://${window.location.host}${API_BASE}/workspaces/${wsId}/ws?token=${token}`;
+  }
+
+  async getColumnTasks(wsId, status, cursor, limit) {
+    const params = new URLSearchParams({ cursor });
+    if (limit) params.set('limit', limit);
+    return this.request(`/workspaces/${wsId}/columns/${status}/tasks?${params}`);
+  }
+
   async createTask(data) {
     return this.request('/tasks', { method: 'POST', body: JSON.stringify(data) });
   }
@@ -166,6 +204,10 @@ class ApiClient {
     return this.request(`/tasks/${id}`, { method: 'DELETE' });
   }
 
+  async getTaskUpdates(taskId, cursor) {
+    return this.request(`/tasks/${taskId}/updates${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
+  }
+
   async addTaskUpdate(taskId, content) {
     return this.request(`/tasks/${taskId}/updates`, {
       method: 'POST',
@@ -177,9 +219,21 @@ class ApiClient {
     return this.request(`/tasks/${taskId}/updates/${updateId}`, { method: 'DELETE' });
   }
 
+  // ─── Search ────────────────────────────────────────────
+  async search(q, cursor) {
+    const params = new URLSearchParams({ q });
+    if (cursor) params.set('cursor', cursor);
+    return this.request(`/search?${params}`);
+  }
+
   // ─── Admin ─────────────────────────────────────────────
   async getAdminStats() { return this.request('/admin/stats'); }
-  async getAdminUsers() { return this.request('/admin/users'); }
+  // params: { limit, cursor, sort, direction, q }; returns { items, next_cursor, total }
+  async getAdminUsers(params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => value && query.set(key, value));
+    return this.request(`/admin/users?${query}`);
+  }
 
   async createUser(data) {
     return this.request('/admin/users', { method: 'POST', body: JSON.stringify(data) });
@@ -200,10 +254,19 @@ class ApiClient {
     return this.request(`/admin/users/${id}`, { method: 'DELETE' });
   }
 
-  async getAdminWorkspaces() { return this.request('/admin/workspaces'); }
+  // params: { limit, cursor, sort, direction, q }; sort is name, created_at, tasks or members
+  async getAdminWorkspaces(params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => value && query.set(key, value));
+    return this.request(`/admin/workspaces?${query}`);
+  }
 
-  async getActivityLog(limit = 100) {
-    return this.request(`/admin/activity?limit=${limit}`);
+  // filters: { user_id, workspace_id, action, since, until }; returns { items, next_cursor }
+  async getActivityLog(limit = 100, cursor, filters = {}) {
+    const params = new URLSearchParams({ limit });
+    if (cursor) params.set('cursor', cursor);
+    Object.entries(filters).forEach(([key, value]) => value && params.set(key, value));
+    return this.request(`/admin/activity?${params}`);
   }
 
   // ─── Settings ──────────────────────────────────────────
@@ -227,6 +290,11 @@ class ApiClient {
   async getNotifications(limit = 50) { return this.request(`/notifications?limit=${limit}`); }
   async getNotificationCount() { return this.request('/notifications/count'); }
 
+  notificationStreamUrl() {
+    // EventSource can't send headers; the token goes in the query string
+    return `${API_BASE}/notifications/stream?token=${encodeURIComponent(this.accessToken || '')}`;
+  }
+
   async markNotificationsRead() {
     return this.request('/notifications/mark-read', { method: 'POST' });
   }
@@ -18,6 +18,7 @@ import {
   Shield, Users, Settings, GripVertical,
 } from 'lucide-react';
 import NotificationBell from './NotificationBell';
+import SearchBox from './SearchBox';
 
 // Bridge configuration (env vars)
 const BRIDGE_URL = import.meta.env.VITE_BRIDGE_URL || '';
@@ -234,6 +235,7 @@ export default function Layout() {
                 </button>
               </>
             )}
+            <SearchBox />
             <NotificationBell />
             <button className="btn btn-ghost btn-icon" onClick={toggleTheme} title={`Switch to ${theme === 'dark' ? 'light' : 'dark'} theme`}>
               {theme === 'dark' ? <Sun size={20} /> : <Moon size={20} />}
@@ -6,7 +6,10 @@ import { useAuth } from '../context/AuthContext';
 export default function MembersModal({ workspaceId, onClose }) {
   const { user: currentUser } = useAuth();
   const [members, setMembers] = useState([]);
-  const [allUsers, setAllUsers] = useState([]);
+  const [membersPage, setMembersPage] = useState({ next_cursor: null, total: 0 });
+  const [memberQuery, setMemberQuery] = useState('');
+  const [userQuery, setUserQuery] = useState('');
+  const [candidates, setCandidates] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [selectedUserId, setSelectedUserId] = useState('');
@@ -15,19 +18,35 @@ export default function MembersModal({ workspaceId, onClose }) {
 
   useEffect(() => { loadData(); }, [workspaceId]);
 
-  const loadData = async () => {
+  // Filter the member list on the server once typing pauses
+  useEffect(() => {
+    if (loading) return;
+    const timer = setTimeout(() => loadData(), 250);
+    return () => clearTimeout(timer);
+  }, [memberQuery]);
+
+  // Admins pick new members from a server-side search rather than the whole user table
+  useEffect(() => {
+    if (!currentUser?.is_admin) return;
+    const timer = setTimeout(async () => {
+      try {
+        const page = await api.getAdminUsers({ q: userQuery.trim(), limit: 20 });
+        setCandidates(page.items);
+      } catch { setCandidates([]); }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [userQuery, currentUser?.is_admin]);
+
+  const loadData = async (cursor = null) => {
     try {
-      const [m, u] = await Promise.all([
-        api.getWorkspaceMembers(workspaceId),
-        currentUser?.is_admin ? api.getAdminUsers().catch(() => []) : Promise.resolve([]),
-      ]);
-      setMembers(m);
-      setAllUsers(u);
+      const page = await api.getWorkspaceMembers(workspaceId, { q: memberQuery.trim(), cursor });
+      setMembers(prev => cursor ? [...prev, ...page.items] : page.items);
+      setMembersPage(prev => ({ next_cursor: page.next_cursor, total: cursor ? prev.total : page.total }));
     } catch { setError('Failed to load members'); }
     finally { setLoading(false); }
   };
 
-  const available = allUsers.filter(u => !members.some(m => m.user_id === u.id));
+  const available = candidates.filter(u => !members.some(m => m.user_id === u.id));
 
   const handleAdd = async (e) => {
     e.preventDefault();
@@ -66,6 +85,9 @@ export default function MembersModal({ workspaceId, onClose }) {
             <div className="flex items-center justify-center" style={{ padding: '2rem' }}><Loader2 size={24} className="animate-spin" /></div>
           ) : (
             <>
+              {(membersPage.total > members.length || memberQuery) && (
+                <input className="form-input mb-4" type="search" placeholder="Filter members" value={memberQuery} onChange={e => setMemberQuery(e.target.value)} />
+              )}
               <div className="members-list">
                 {members.map(m => (
                   <div key={m.id} className="member-item">
@@ -87,13 +109,17 @@ export default function MembersModal({ workspaceId, onClose }) {
                   </div>
                 ))}
               </div>
+              {membersPage.next_cursor && (
+                <button className="btn btn-ghost btn-sm" onClick={() => loadData(membersPage.next_cursor)}>Load more</button>
+              )}
 
-              {currentUser?.is_admin && available.length > 0 && (
+              {currentUser?.is_admin && (
                 <div className="task-modal-section">
                   <div className="task-modal-section-title">Add Member</div>
+                  <input className="form-input mb-4" type="search" placeholder="Search name or email" value={userQuery} onChange={e => { setUserQuery(e.target.value); setSelectedUserId(''); }} />
                   <form className="add-member-form" onSubmit={handleAdd}>
                     <select className="form-select" value={selectedUserId} onChange={e => setSelectedUserId(e.target.value)} required style={{ flex: 1 }}>
-                      <option value="">Select user...</option>
+                      <option value="">{available.length ? 'Select user...' : 'No matching users'}</option>
                       {available.map(u => <option key={u.id} value={u.id}>{u.display_name} ({u.email})</option>)}
                     </select>
                     <select className="form-select" value={addRole} onChange={e => setAddRole(e.target.value)} style={{ width: 'auto' }}>
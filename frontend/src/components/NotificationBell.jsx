@@ -12,11 +12,48 @@ export default function NotificationBell() {
   const dropdownRef = useRef(null);
   const markReadTimer = useRef(null);
 
-  // Poll unread count
+  const isOpenRef = useRef(isOpen);
+  isOpenRef.current = isOpen;
+
+  // Live unread count + new notifications (Server-Sent Events). Each (re)connect
+  // starts with the current unread count, so nothing needs polling.
   useEffect(() => {
-    loadCount();
-    const iv = setInterval(loadCount, 30000);
-    return () => clearInterval(iv);
+    let source = null;
+    let retryTimer = null;
+    let attempts = 0;
+    let stopped = false;
+
+    const connect = () => {
+      source = new EventSource(api.notificationStreamUrl());
+      source.onopen = () => { attempts = 0; };
+      source.onmessage = (e) => {
+        const evt = JSON.parse(e.data);
+        if (evt.type === 'unread_count') {
+          setUnreadCount(evt.unread_count);
+        } else if (evt.type === 'notification') {
+          setUnreadCount(c => c + 1);
+          setNotifications(prev => [evt.notification, ...prev]);
+        } else if (evt.type === 'resync') {
+          loadCount();
+          if (isOpenRef.current) loadNotifications();
+        }
+      };
+      source.onerror = async () => {
+        // The browser retries dropped streams itself; CLOSED means it was
+        // refused (usually an expired token), so refresh and reconnect
+        if (stopped || source.readyState !== EventSource.CLOSED) return;
+        await api.refreshAccessToken();
+        attempts += 1;
+        retryTimer = setTimeout(connect, Math.min(30000, 1000 * 2 ** Math.min(attempts, 5)));
+      };
+    };
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
   }, []);
 
   // Load full list + mark-read timer when open
@@ -0,0 +1,116 @@
+import { useState, useEffect, useRef } from 'react';
+import { useNavigate } from 'react-router-dom';
+import api from '../api/client';
+import { Search, MessageSquare, FileText } from 'lucide-react';
+
+// The server marks matched words with \x02 ... \x03
+const renderSnippet = (snippet) => snippet.split('\x02').map((part, i) => {
+  if (i === 0) return part;
+  const [match, rest] = part.split('\x03');
+  return <span key={i}><mark>{match}</mark>{rest}</span>;
+});
+
+export default function SearchBox() {
+  const navigate = useNavigate();
+  const [query, setQuery] = useState('');
+  const [hits, setHits] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isOpen, setIsOpen] = useState(false);
+  const [loading, setLoading] = useState(false);
+  const dropdownRef = useRef(null);
+  const latestQuery = useRef('');
+
+  // Search as you type, once typing pauses
+  useEffect(() => {
+    const q = query.trim();
+    latestQuery.current = q;
+    if (!q) { setHits([]); setNextCursor(null); return; }
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      try {
+        const page = await api.search(q);
+        if (latestQuery.current !== q) return; // a newer search is under way
+        setHits(page.items);
+        setNextCursor(page.next_cursor);
+        setIsOpen(true);
+      } catch (e) {
+        console.error('Search failed:', e);
+      } finally {
+        setLoading(false);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  // Close on outside click
+  useEffect(() => {
+    const handler = (e) => {
+      if (dropdownRef.current && !dropdownRef.current.contains(e.target)) setIsOpen(false);
+    };
+    document.addEventListener('mousedown', handler);
+    return () => document.removeEventListener('mousedown', handler);
+  }, []);
+
+  const loadMore = async () => {
+    const q = latestQuery.current;
+    try {
+      const page = await api.search(q, nextCursor);
+      if (latestQuery.current !== q) return;
+      setHits(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (e) { console.error('Search failed:', e); }
+  };
+
+  const handleClick = (hit) => {
+    navigate(`/workspace/${hit.workspace_id}`, { state: { openTaskId: hit.task_id } });
+    setIsOpen(false);
+  };
+
+  return (
+    <div className="search-box" ref={dropdownRef}>
+      <div className="search-input-wrapper">
+        <Search size={16} />
+        <input
+          className="search-input"
+          type="search"
+          placeholder="Search tasks and comments"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          onFocus={() => hits.length && setIsOpen(true)}
+          onKeyDown={(e) => e.key === 'Escape' && setIsOpen(false)}
+        />
+      </div>
+
+      {isOpen && query.trim() && (
+        <div className="notification-dropdown">
+          <div className="notification-list">
+            {hits.length === 0 ? (
+              <div className="notification-empty">{loading ? 'Searching...' : 'No matches'}</div>
+            ) : (
+              <>
+                {hits.map(hit => (
+                  <div key={hit.comment_id || hit.task_id} className="notification-item" onClick={() => handleClick(hit)}>
+                    <div className="notification-icon">
+                      {hit.kind === 'comment' ? <MessageSquare size={16} /> : <FileText size={16} />}
+                    </div>
+                    <div className="notification-content">
+                      <div className="notification-title">{hit.title}</div>
+                      <div className="notification-message search-snippet">
+                        {hit.kind === 'comment' && <strong>{hit.author_name || 'Unknown'}: </strong>}
+                        {renderSnippet(hit.snippet)}
+                      </div>
+                      <div className="notification-time">{hit.workspace_name}</div>
+                    </div>
+                  </div>
+                ))}
+                {nextCursor && (
+                  <button className="btn btn-ghost btn-sm search-more" onClick={loadMore}>More results</button>
+                )}
+              </>
+            )}
+          </div>
+        </div>
+      )}
+    </div>
+  );
+}
@@ -80,6 +80,11 @@ export default function TaskCard({ task, onClick, project, onMove, onLongPress,
         {task.due_date ? (
           <span className="task-due">{'\u{1F4C5}'} Due: {new Date(task.due_date).toLocaleDateString('en-US', { day: 'numeric', month: 'short', year: 'numeric' })}</span>
         ) : <span className="task-spacer" />}
+        {task.comment_count > 0 && (
+          <span className="task-comments" title={task.latest_update ? `${task.latest_update.user_name || 'Unknown'}: ${task.latest_update.content}` : undefined}>
+            {'\u{1F4AC}'} {task.comment_count}
+          </span>
+        )}
         <span className="task-last-update">Last update: {fmtTime(task.updated_at)}</span>
       </div>
     </div>
@@ -18,7 +18,7 @@ const PRIORITIES = [
   { id: 'low', label: 'Low', color: '#22c55e' },
 ];
 
-export default function TaskModal({ task, projects, onClose, onSave, onDelete }) {
+export default function TaskModal({ task, projects, onClose, onSave, onDelete, onCommentsChange }) {
   const { theme } = useTheme();
   const { user } = useAuth();
 
@@ -36,13 +36,40 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
   });
 
   const [saving, setSaving] = useState(false);
-  const [updates, setUpdates] = useState(task?.updates || []);
+  const [updates, setUpdates] = useState([]);
+  const [updatesCursor, setUpdatesCursor] = useState(null);
+  const [loadingUpdates, setLoadingUpdates] = useState(false);
+  const [commentCount, setCommentCount] = useState(task?.comment_count || 0);
   const [newUpdate, setNewUpdate] = useState('');
   const [sendingUpdate, setSendingUpdate] = useState(false);
   const updateListRef = useRef(null);
 
   const isNew = !task?.id;
 
+  // Comments are not part of the board payload — fetch them when the modal opens
+  useEffect(() => {
+    if (!isNew) loadUpdates();
+  }, [task?.id]);
+
+  const loadUpdates = async (cursor = null) => {
+    setLoadingUpdates(true);
+    try {
+      const page = await api.getTaskUpdates(task.id, cursor);
+      setUpdates(prev => cursor ? [...prev, ...page.items] : page.items);
+      setUpdatesCursor(page.next_cursor);
+    } catch (err) {
+      console.error('Failed to load updates:', err);
+    } finally {
+      setLoadingUpdates(false);
+    }
+  };
+
+  const changeCommentCount = (delta, latest) => {
+    const next = Math.max(0, commentCount + delta);
+    setCommentCount(next);
+    onCommentsChange?.(task.id, next, latest);
+  };
+
   const handleChange = (field, value) => setForm(prev => ({ ...prev, [field]: value }));
 
   const handleSubmit = async (e) => {
@@ -72,6 +99,7 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
       const created = await api.addTaskUpdate(task.id, newUpdate.trim());
       setUpdates(prev => [created, ...prev]);
       setNewUpdate('');
+      changeCommentCount(1, created);
     } catch (err) {
       console.error('Failed to add update:', err);
     } finally {
@@ -83,7 +111,9 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
     if (!task?.id) return;
     try {
       await api.deleteTaskUpdate(task.id, updateId);
-      setUpdates(prev => prev.filter(u => u.id !== updateId));
+      const remaining = updates.filter(u => u.id !== updateId);
+      setUpdates(remaining);
+      changeCommentCount(-1, remaining[0] || null);
     } catch (err) {
       console.error('Failed to delete update:', err);
     }
@@ -172,7 +202,7 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
             {/* Updates section (only for existing tasks) */}
             {!isNew && (
               <div className="task-modal-section">
-                <div className="task-modal-section-title">Updates</div>
+                <div className="task-modal-section-title">Updates{commentCount > 0 ? ` (${commentCount})` : ''}</div>
                 <form className="task-update-form" onSubmit={handleAddUpdate}>
                   <input type="text" className="form-input" value={newUpdate} onChange={e => setNewUpdate(e.target.value)} placeholder="Add an update..." />
                   <button type="submit" className="btn btn-primary btn-icon" disabled={sendingUpdate || !newUpdate.trim()}>
@@ -181,7 +211,7 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
                 </form>
                 <div className="task-updates-list" ref={updateListRef}>
                   {updates.length === 0 ? (
-                    <div className="task-update-empty">No updates yet</div>
+                    <div className="task-update-empty">{loadingUpdates ? 'Loading...' : 'No updates yet'}</div>
                   ) : (
                     updates.map(u => (
                       <div key={u.id} className="task-update-item">
@@ -194,6 +224,11 @@ export default function TaskModal({ task, projects, onClose, onSave, onDelete })
                       </div>
                     ))
                   )}
+                  {updatesCursor && (
+                    <button type="button" className="btn btn-ghost btn-sm" onClick={() => loadUpdates(updatesCursor)} disabled={loadingUpdates}>
+                      {loadingUpdates ? <Loader2 size={14} className="animate-spin" /> : 'Show older updates'}
+                    </button>
+                  )}
                 </div>
               </div>
             )}
@@ -5,14 +5,38 @@ import { useTheme } from '../context/ThemeContext';
 import { getDisplayColor } from '../utils/themeColors';
 import { Users, FolderKanban, CheckSquare, Activity, Plus, Loader2, X, Key, UserX, UserCheck, Trash2, Pencil } from 'lucide-react';
 
+const USER_SORTS = [
+  ['name:asc', 'Name'], ['email:asc', 'Email'], ['created_at:desc', 'Newest'], ['created_at:asc', 'Oldest'],
+];
+const WORKSPACE_SORTS = [
+  ['name:asc', 'Name'], ['created_at:desc', 'Newest'], ['tasks:desc', 'Most tasks'], ['members:desc', 'Most members'],
+];
+
+// { q, sort: 'name:asc' } -> getAdminUsers / getAdminWorkspaces params
+const listParams = ({ q, sort }, cursor) => {
+  const [field, direction] = sort.split(':');
+  return { q: q.trim(), sort: field, direction, cursor };
+};
+
+const ACTIVITY_ACTIONS = [
+  'workspace_created', 'workspace_updated', 'member_added', 'member_role_changed', 'member_removed',
+  'project_created', 'project_updated', 'project_deleted', 'task_created', 'task_updated', 'task_moved', 'task_deleted',
+];
+
 export default function AdminPage() {
   const { user: currentUser } = useAuth();
   const { theme } = useTheme();
   const [activeTab, setActiveTab] = useState('overview');
   const [stats, setStats] = useState(null);
   const [users, setUsers] = useState([]);
+  const [usersPage, setUsersPage] = useState({ next_cursor: null, total: 0 });
+  const [userFilters, setUserFilters] = useState({ q: '', sort: 'name:asc' });
   const [workspaces, setWorkspaces] = useState([]);
+  const [workspacesPage, setWorkspacesPage] = useState({ next_cursor: null, total: 0 });
+  const [workspaceFilters, setWorkspaceFilters] = useState({ q: '', sort: 'name:asc' });
   const [activity, setActivity] = useState([]);
+  const [activityCursor, setActivityCursor] = useState(null);
+  const [activityFilters, setActivityFilters] = useState({ user_id: '', action: '' });
   const [loading, setLoading] = useState(true);
   const [showCreateUser, setShowCreateUser] = useState(false);
   const [resetPwUser, setResetPwUser] = useState(null);
@@ -20,20 +44,65 @@ export default function AdminPage() {
 
   useEffect(() => { loadData(); }, []);
 
+  // Re-query a list once typing in its search box pauses (loadData covers the first load)
+  useEffect(() => {
+    if (loading) return;
+    const timer = setTimeout(() => loadUsers(userFilters), 250);
+    return () => clearTimeout(timer);
+  }, [userFilters]);
+
+  useEffect(() => {
+    if (loading) return;
+    const timer = setTimeout(() => loadWorkspaces(workspaceFilters), 250);
+    return () => clearTimeout(timer);
+  }, [workspaceFilters]);
+
   const loadData = async () => {
     setLoading(true);
     try {
       const [s, u, w, a] = await Promise.all([
         api.getAdminStats().catch(() => ({})),
-        api.getAdminUsers().catch(() => []),
-        api.getAdminWorkspaces().catch(() => []),
-        api.getActivityLog(50).catch(() => []),
+        api.getAdminUsers(listParams(userFilters)).catch(() => ({ items: [], next_cursor: null, total: 0 })),
+        api.getAdminWorkspaces(listParams(workspaceFilters)).catch(() => ({ items: [], next_cursor: null, total: 0 })),
+        api.getActivityLog(50, null, activityFilters).catch(() => ({ items: [], next_cursor: null })),
       ]);
-      setStats(s); setUsers(u); setWorkspaces(w); setActivity(a);
+      setStats(s); setActivity(a.items); setActivityCursor(a.next_cursor);
+      setUsers(u.items); setUsersPage({ next_cursor: u.next_cursor, total: u.total });
+      setWorkspaces(w.items); setWorkspacesPage({ next_cursor: w.next_cursor, total: w.total });
     } catch (e) { console.error('Admin load failed:', e); }
     finally { setLoading(false); }
   };
 
+  const loadUsers = async (filters, cursor = null) => {
+    try {
+      const page = await api.getAdminUsers(listParams(filters, cursor));
+      setUsers(prev => cursor ? [...prev, ...page.items] : page.items);
+      setUsersPage(prev => ({ next_cursor: page.next_cursor, total: cursor ? prev.total : page.total }));
+    } catch (e) { console.error('Failed to load users:', e); }
+  };
+
+  const loadWorkspaces = async (filters, cursor = null) => {
+    try {
+      const page = await api.getAdminWorkspaces(listParams(filters, cursor));
+      setWorkspaces(prev => cursor ? [...prev, ...page.items] : page.items);
+      setWorkspacesPage(prev => ({ next_cursor: page.next_cursor, total: cursor ? prev.total : page.total }));
+    } catch (e) { console.error('Failed to load workspaces:', e); }
+  };
+
+  const loadActivity = async (filters, cursor = null) => {
+    try {
+      const page = await api.getActivityLog(50, cursor, filters);
+      setActivity(prev => cursor ? [...prev, ...page.items] : page.items);
+      setActivityCursor(page.next_cursor);
+    } catch (e) { console.error('Failed to load activity:', e); }
+  };
+
+  const filterActivity = (key, value) => {
+    const filters = { ...activityFilters, [key]: value };
+    setActivityFilters(filters);
+    loadActivity(filters);
+  };
+
   const toggleUserStatus = async (u) => {
     try { await api.updateUser(u.id, { is_active: !u.is_active }); loadData(); }
     catch (e) { alert(e.message || 'Failed'); }
@@ -52,10 +121,10 @@ export default function AdminPage() {
   return (
     <div className="admin-page">
       <div className="admin-stats">
-        <div className="stat-card"><div className="stat-label">Total Users</div><div className="stat-value">{stats?.users || users.length}</div></div>
-        <div className="stat-card"><div className="stat-label">Workspaces</div><div className="stat-value">{stats?.workspaces || workspaces.length}</div></div>
-        <div className="stat-card"><div className="stat-label">Total Tasks</div><div className="stat-value">{stats?.tasks || 0}</div></div>
-        <div className="stat-card"><div className="stat-label">Active (7d)</div><div className="stat-value">{stats?.active_users_7d || '-'}</div></div>
+        <div className="stat-card"><div className="stat-label">Total Users</div><div className="stat-value">{stats?.total_users ?? usersPage.total}</div></div>
+        <div className="stat-card"><div className="stat-label">Workspaces</div><div className="stat-value">{stats?.total_workspaces ?? workspacesPage.total}</div></div>
+        <div className="stat-card"><div className="stat-label">Total Tasks</div><div className="stat-value">{stats?.total_tasks ?? 0}</div></div>
+        <div className="stat-card"><div className="stat-label">Active Users</div><div className="stat-value">{stats?.active_users ?? '-'}</div></div>
       </div>
 
       <div className="tabs">
@@ -64,6 +133,27 @@ export default function AdminPage() {
         ))}
       </div>
 
+      {activeTab === 'overview' && stats?.top_workspaces?.length > 0 && (
+        <div className="admin-section">
+          <div className="admin-section-header">
+            <h3 className="admin-section-title">Largest Workspaces</h3>
+            <span className="activity-time">As of {fmtDate(stats.computed_at)}</span>
+          </div>
+          <div className="admin-section-body">
+            <div className="table-wrapper"><table className="table"><thead><tr><th>Name</th><th>To Do</th><th>In Progress</th><th>Done</th><th>Archived</th><th>Total</th></tr></thead><tbody>
+              {stats.top_workspaces.map(ws => (
+                <tr key={ws.workspace_id}>
+                  <td>{ws.name}</td>
+                  <td>{ws.tasks_by_status.todo}</td><td>{ws.tasks_by_status.in_progress}</td>
+                  <td>{ws.tasks_by_status.done}</td><td>{ws.tasks_by_status.archived}</td>
+                  <td>{ws.total_tasks}</td>
+                </tr>
+              ))}
+            </tbody></table></div>
+          </div>
+        </div>
+      )}
+
       {activeTab === 'overview' && (
         <div className="admin-section">
           <div className="admin-section-header"><h3 className="admin-section-title">Recent Activity</h3></div>
@@ -88,8 +178,14 @@ export default function AdminPage() {
       {activeTab === 'users' && (
         <div className="admin-section">
           <div className="admin-section-header">
-            <h3 className="admin-section-title">User Management</h3>
-            <button className="btn btn-primary btn-sm" onClick={() => setShowCreateUser(true)}><Plus size={16} /> Invite User</button>
+            <h3 className="admin-section-title">User Management ({usersPage.total})</h3>
+            <div className="flex gap-2">
+              <input className="form-input" type="search" placeholder="Search name or email" value={userFilters.q} onChange={e => setUserFilters({ ...userFilters, q: e.target.value })} />
+              <select className="form-select" value={userFilters.sort} onChange={e => setUserFilters({ ...userFilters, sort: e.target.value })}>
+                {USER_SORTS.map(([value, label]) => <option key={value} value={value}>{label}</option>)}
+              </select>
+              <button className="btn btn-primary btn-sm" onClick={() => setShowCreateUser(true)}><Plus size={16} /> Invite User</button>
+            </div>
           </div>
           <div className="admin-section-body">
             <div className="table-wrapper"><table className="table"><thead><tr><th>Name</th><th>Email</th><th>Role</th><th>Status</th><th>Last Login</th><th>Actions</th></tr></thead><tbody>
@@ -108,13 +204,24 @@ export default function AdminPage() {
                 </tr>
               ))}
             </tbody></table></div>
+            {usersPage.next_cursor && (
+              <button className="btn btn-ghost btn-sm" onClick={() => loadUsers(userFilters, usersPage.next_cursor)}>Load more</button>
+            )}
           </div>
         </div>
       )}
 
       {activeTab === 'workspaces' && (
         <div className="admin-section">
-          <div className="admin-section-header"><h3 className="admin-section-title">All Workspaces</h3></div>
+          <div className="admin-section-header">
+            <h3 className="admin-section-title">All Workspaces ({workspacesPage.total})</h3>
+            <div className="flex gap-2">
+              <input className="form-input" type="search" placeholder="Search workspaces" value={workspaceFilters.q} onChange={e => setWorkspaceFilters({ ...workspaceFilters, q: e.target.value })} />
+              <select className="form-select" value={workspaceFilters.sort} onChange={e => setWorkspaceFilters({ ...workspaceFilters, sort: e.target.value })}>
+                {WORKSPACE_SORTS.map(([value, label]) => <option key={value} value={value}>{label}</option>)}
+              </select>
+            </div>
+          </div>
           <div className="admin-section-body">
             <div className="table-wrapper"><table className="table"><thead><tr><th>Name</th><th>Owner</th><th>Members</th><th>Tasks</th><th>Created</th></tr></thead><tbody>
               {workspaces.map(ws => (
@@ -124,13 +231,28 @@ export default function AdminPage() {
                 </tr>
               ))}
             </tbody></table></div>
+            {workspacesPage.next_cursor && (
+              <button className="btn btn-ghost btn-sm" onClick={() => loadWorkspaces(workspaceFilters, workspacesPage.next_cursor)}>Load more</button>
+            )}
           </div>
         </div>
       )}
 
       {activeTab === 'activity' && (
         <div className="admin-section">
-          <div className="admin-section-header"><h3 className="admin-section-title">Activity Log</h3></div>
+          <div className="admin-section-header">
+            <h3 className="admin-section-title">Activity Log</h3>
+            <div className="flex gap-2">
+              <select className="form-select" value={activityFilters.user_id} onChange={e => filterActivity('user_id', e.target.value)}>
+                <option value="">All users</option>
+                {users.map(u => <option key={u.id} value={u.id}>{u.display_name}</option>)}
+              </select>
+              <select className="form-select" value={activityFilters.action} onChange={e => filterActivity('action', e.target.value)}>
+                <option value="">All actions</option>
+                {ACTIVITY_ACTIONS.map(a => <option key={a} value={a}>{a.replace(/_/g, ' ')}</option>)}
+              </select>
+            </div>
+          </div>
           <div className="admin-section-body">
             <div className="activity-log">
               {activity.length === 0 ? <div className="empty-state"><Activity size={32} /><p className="empty-state-text">No activity</p></div> : (
@@ -145,6 +267,9 @@ export default function AdminPage() {
                 ))
               )}
             </div>
+            {activityCursor && (
+              <button className="btn btn-ghost btn-sm" onClick={() => loadActivity(activityFilters, activityCursor)}>Load more</button>
+            )}
           </div>
         </div>
       )}
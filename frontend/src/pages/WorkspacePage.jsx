@@ -1,5 +1,5 @@
-import { useState, useEffect, useCallback, useMemo } from 'react';
-import { useParams, useOutletContext } from 'react-router-dom';
+import { useState, useEffect, useCallback, useMemo, useRef } from 'react';
+import { useParams, useOutletContext, useLocation, useNavigate } from 'react-router-dom';
 import api from '../api/client';
 import { useTheme } from '../context/ThemeContext';
 import { useAuth } from '../context/AuthContext';
@@ -39,11 +39,18 @@ function DroppableColumn({ id, children, className }) {
 
 export default function WorkspacePage() {
   const { workspaceId } = useParams();
+  const location = useLocation();
+  const navigate = useNavigate();
   const { reloadWorkspaces, setHeaderActions } = useOutletContext();
   const { theme } = useTheme();
   const { user } = useAuth();
 
   const [tasks, setTasks] = useState([]);
+  const tasksRef = useRef([]); // latest tasks, readable outside render (live updates)
+  const removedRef = useRef(new Set()); // ids already removed locally
+  const versionRef = useRef(null); // board version the local state is current to (delta sync)
+  const [columnMeta, setColumnMeta] = useState({}); // { [status]: { next_cursor, total } }
+  const [loadingMore, setLoadingMore] = useState({});
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeColumn, setActiveColumn] = useState('todo');
@@ -99,11 +106,21 @@ export default function WorkspacePage() {
   const loadData = async () => {
     setLoading(true);
     try {
-      const [t, p] = await Promise.all([
-        api.getTasks(workspaceId),
+      const [board, p] = await Promise.all([
+        api.getBoard(workspaceId),
         api.getProjects(workspaceId),
       ]);
-      setTasks(t);
+      const meta = {};
+      const t = [];
+      COLUMNS.forEach(c => {
+        const page = board.columns[c.id] || { items: [], next_cursor: null, total: 0 };
+        meta[c.id] = { next_cursor: page.next_cursor, total: page.total ?? page.items.length };
+        t.push(...page.items);
+      });
+      updateTasks(() => t);
+      removedRef.current.clear();
+      versionRef.current = board.version;
+      setColumnMeta(meta);
       setProjects(p);
     } catch (e) {
       console.error('Failed to load workspace:', e);
@@ -112,6 +129,193 @@ export default function WorkspacePage() {
     }
   };
 
+  // Open a task picked from search once the board is loaded (if it's on a loaded page)
+  const openTaskId = location.state?.openTaskId;
+  useEffect(() => {
+    if (loading || !openTaskId) return;
+    const task = tasksRef.current.find(t => t.id === openTaskId);
+    if (task) setSelectedTask(task);
+    navigate(location.pathname, { replace: true, state: null });
+  }, [loading, openTaskId]);
+
+  // ─── Column paging (fetch more on scroll) ───────────────
+  const loadMore = async (status) => {
+    const cursor = columnMeta[status]?.next_cursor;
+    if (!cursor || loadingMore[status]) return;
+    setLoadingMore(prev => ({ ...prev, [status]: true }));
+    try {
+      const page = await api.getColumnTasks(workspaceId, status, cursor);
+      updateTasks(prev => {
+        const known = new Set(prev.map(t => t.id));
+        return [...prev, ...page.items.filter(t => !known.has(t.id))];
+      });
+      setColumnMeta(prev => ({ ...prev, [status]: { ...prev[status], next_cursor: page.next_cursor } }));
+    } catch (e) {
+      console.error('Failed to load more tasks:', e);
+    } finally {
+      setLoadingMore(prev => ({ ...prev, [status]: false }));
+    }
+  };
+
+  const handleColumnScroll = (status) => (e) => {
+    const el = e.currentTarget;
+    if (el.scrollHeight - el.scrollTop - el.clientHeight < 200) loadMore(status);
+  };
+
+  // Column totals come from the server; adjust them locally when a card changes column
+  const shiftColumnTotal = (from, to) => {
+    if (from === to) return;
+    setColumnMeta(prev => ({
+      ...prev,
+      [from]: { ...prev[from], total: Math.max(0, (prev[from]?.total || 1) - 1) },
+      [to]: { ...prev[to], total: (prev[to]?.total || 0) + 1 },
+    }));
+  };
+
+  const adjustColumnTotal = (status, delta) => {
+    setColumnMeta(prev => ({
+      ...prev,
+      [status]: { ...prev[status], total: Math.max(0, (prev[status]?.total || 0) + delta) },
+    }));
+  };
+
+  // ─── Applying changes (own responses and live events) ──
+  // Both paths go through these helpers, which compare against the current
+  // list, so applying the same change twice (response + event) is harmless.
+  const updateTasks = (fn) => {
+    tasksRef.current = fn(tasksRef.current);
+    setTasks(tasksRef.current);
+  };
+
+  const applyTask = (task, oldStatus) => {
+    if (removedRef.current.has(task.id)) return;
+    const existing = tasksRef.current.find(t => t.id === task.id);
+    const fromStatus = existing ? existing.status : oldStatus;
+    if (fromStatus === undefined) adjustColumnTotal(task.status, 1);
+    else shiftColumnTotal(fromStatus, task.status);
+    updateTasks(prev => existing
+      ? prev.map(t => t.id === task.id ? { ...t, ...task } : t)
+      : [...prev, task]);
+  };
+
+  const removeTask = (taskId, status) => {
+    if (removedRef.current.has(taskId)) return;
+    removedRef.current.add(taskId);
+    const existing = tasksRef.current.find(t => t.id === taskId);
+    adjustColumnTotal(existing ? existing.status : status, -1);
+    if (existing) updateTasks(prev => prev.filter(t => t.id !== taskId));
+  };
+
+  const applyProject = (project) => {
+    setProjects(prev => prev.some(p => p.id === project.id)
+      ? prev.map(p => p.id === project.id ? project : p)
+      : [...prev, project]);
+    updateTasks(prev => prev.map(t => t.project_id === project.id
+      ? { ...t, project_name: project.name, project_color: project.color }
+      : t));
+  };
+
+  // ─── Catching up (delta sync) ──────────────────────────
+  // After missed events, fetch only what changed since the loaded version;
+  // the server answers reset when a full reload is cheaper or required.
+  const catchUp = async () => {
+    if (versionRef.current === null) return loadData();
+    try {
+      const changes = await api.getChanges(workspaceId, versionRef.current);
+      if (changes.reset) return loadData();
+      changes.deleted.forEach(d => {
+        if (d.entity_type === 'task' && tasksRef.current.some(t => t.id === d.id)) removeTask(d.id);
+        if (d.entity_type === 'project') setProjects(prev => prev.filter(p => p.id !== d.id));
+      });
+      changes.projects.forEach(applyProject);
+      changes.tasks.forEach(task => applyTask(task));
+      if (changes.version !== versionRef.current) {
+        setColumnMeta(prev => Object.fromEntries(COLUMNS.map(c => [c.id, { ...prev[c.id], total: changes.totals[c.id] ?? 0 }])));
+      }
+      versionRef.current = changes.version;
+    } catch (e) {
+      console.error('Failed to catch up, reloading:', e);
+      loadData();
+    }
+  };
+
+  const applyEvent = (evt) => {
+    const mine = evt.actor_id && String(evt.actor_id) === String(user?.id);
+    switch (evt.type) {
+      case 'task.created':
+        applyTask(evt.task);
+        break;
+      case 'task.updated':
+        applyTask(evt.task, evt.old_status);
+        break;
+      case 'task.deleted':
+        removeTask(evt.task_id, evt.status);
+        break;
+      case 'comment.created':
+        updateTasks(prev => prev.map(t => (t.id === evt.task_id && t.latest_update?.id !== evt.update.id)
+          ? { ...t, comment_count: (t.comment_count || 0) + 1, latest_update: evt.update }
+          : t));
+        break;
+      case 'comment.deleted':
+        // The author's open modal already adjusted the count
+        if (mine) break;
+        updateTasks(prev => prev.map(t => t.id === evt.task_id
+          ? { ...t, comment_count: Math.max(0, (t.comment_count || 1) - 1), latest_update: t.latest_update?.id === evt.update_id ? null : t.latest_update }
+          : t));
+        break;
+      case 'project.created':
+      case 'project.updated':
+        applyProject(evt.project);
+        break;
+      case 'project.deleted':
+        // Its tasks were deleted server-side, including ones not loaded here
+        if (!mine) catchUp();
+        break;
+      case 'resync':
+        catchUp();
+        break;
+      default:
+        break;
+    }
+  };
+  const applyEventRef = useRef(applyEvent);
+  applyEventRef.current = applyEvent;
+
+  // ─── Live updates (WebSocket per workspace) ────────────
+  useEffect(() => {
+    let socket = null;
+    let retryTimer = null;
+    let attempts = 0;
+    let stopped = false;
+
+    const connect = () => {
+      socket = new WebSocket(api.workspaceSocketUrl(workspaceId));
+      socket.onopen = () => {
+        // Anything that happened while disconnected was missed
+        if (attempts > 0) catchUp();
+        attempts = 0;
+      };
+      socket.onmessage = (e) => {
+        const evt = JSON.parse(e.data);
+        if (evt.type !== 'ping') applyEventRef.current(evt);
+      };
+      socket.onclose = async (e) => {
+        if (stopped) return;
+        // 4403: token expired (or access revoked) — refresh before retrying
+        if (e.code === 4403) await api.refreshAccessToken();
+        attempts += 1;
+        retryTimer = setTimeout(connect, Math.min(30000, 1000 * 2 ** Math.min(attempts, 5)));
+      };
+    };
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      socket?.close();
+    };
+  }, [workspaceId]);
+
   // ─── Filtering ──────────────────────────────────────────
   const filteredTasks = useMemo(() => {
     if (filterProject === 'all') return tasks;
@@ -176,18 +380,23 @@ export default function WorkspacePage() {
     filteredTasks.forEach(t => {
       if (map[t.status]) map[t.status].push(t);
     });
-    // Apply sorting to each column
+    // Apply sorting to each column (default: manual order by rank)
     if (sortField) {
       COLUMNS.forEach(c => { map[c.id] = sortTasks(map[c.id]); });
+    } else {
+      COLUMNS.forEach(c => { map[c.id].sort((a, b) => a.position - b.position); });
     }
     return map;
   }, [filteredTasks, sortField, sortDir, projectLock, sortTasks]);
 
   const taskCounts = useMemo(() => {
     const c = {};
-    COLUMNS.forEach(col => { c[col.id] = (columnTasks[col.id] || []).length; });
+    COLUMNS.forEach(col => {
+      const loaded = (columnTasks[col.id] || []).length;
+      c[col.id] = filterProject === 'all' ? Math.max(loaded, columnMeta[col.id]?.total || 0) : loaded;
+    });
     return c;
-  }, [columnTasks]);
+  }, [columnTasks, columnMeta, filterProject]);
 
   // ─── Sort toggle handlers ──────────────────────────────
   const toggleSort = (field) => {
@@ -203,26 +412,24 @@ export default function WorkspacePage() {
   // ─── Task CRUD ──────────────────────────────────────────
   const handleSaveTask = async (payload) => {
     if (selectedTask?.id) {
-      await api.updateTask(selectedTask.id, payload);
+      applyTask(await api.updateTask(selectedTask.id, payload));
     } else {
-      await api.createTask({ ...payload, workspace_id: workspaceId });
+      applyTask(await api.createTask({ ...payload, workspace_id: workspaceId }));
     }
     setSelectedTask(null);
     setShowNewTask(false);
-    loadData();
   };
 
   const handleDeleteTask = async (task) => {
     if (!confirm(`Delete "${task.title}"?`)) return;
     await api.deleteTask(task.id);
+    removeTask(task.id, task.status);
     setSelectedTask(null);
-    loadData();
   };
 
   const handleQuickAdd = async (data) => {
     try {
-      await api.createTask({ ...data, workspace_id: workspaceId });
-      loadData();
+      applyTask(await api.createTask({ ...data, workspace_id: workspaceId }));
     } catch (e) {
       console.error('Quick add failed:', e);
     }
@@ -230,19 +437,21 @@ export default function WorkspacePage() {
 
   const handlePriorityChange = async (taskId, newPriority) => {
     try {
-      await api.updateTask(taskId, { priority: newPriority });
-      setTasks(prev => prev.map(t => t.id === taskId ? { ...t, priority: newPriority } : t));
+      applyTask(await api.updateTask(taskId, { priority: newPriority }));
     } catch (e) { console.error('Priority change failed:', e); }
   };
 
   const handleMoveTask = async (taskId, newStatus) => {
     try {
-      await api.updateTask(taskId, { status: newStatus });
-      setTasks(prev => prev.map(t => t.id === taskId ? { ...t, status: newStatus } : t));
+      applyTask(await api.updateTask(taskId, { status: newStatus }));
       setMoveMenuState(null);
     } catch (e) { console.error('Move failed:', e); }
   };
 
+  const handleCommentsChange = (taskId, commentCount, latestUpdate) => {
+    updateTasks(prev => prev.map(t => t.id === taskId ? { ...t, comment_count: commentCount, latest_update: latestUpdate } : t));
+  };
+
   // ─── Mobile handlers ───────────────────────────────────
   const handleLongPress = useCallback((task, position) => {
     setMoveMenuState({ task, position });
@@ -255,7 +464,7 @@ export default function WorkspacePage() {
   // ─── DnD (desktop only) — supports cross-column ───────
   const handleDragEnd = async (event) => {
     const { active, over } = event;
-    if (!over) return;
+    if (!over || active.id === over.id) return;
 
     const taskId = active.id;
     const task = tasks.find(t => t.id === taskId);
@@ -264,8 +473,19 @@ export default function WorkspacePage() {
     // over.id could be a task ID or a column ID (from useDroppable)
     const overTask = tasks.find(t => t.id === over.id);
     const targetCol = overTask ? overTask.status : over.id;
-
-    if (task.status !== targetCol && COLUMNS.some(c => c.id === targetCol)) {
+    if (!COLUMNS.some(c => c.id === targetCol)) return;
+
+    // Dropped on a card: send the card it lands next to, so only the dragged
+    // card gets a new rank. Sorted views have no manual order to change.
+    if (overTask && !sortField) {
+      const col = columnTasks[targetCol] || [];
+      const movingDown = task.status === targetCol
+        && col.findIndex(t => t.id === taskId) < col.findIndex(t => t.id === overTask.id);
+      const anchor = movingDown ? { after_id: overTask.id } : { before_id: overTask.id };
+      try {
+        applyTask(await api.updateTask(taskId, { status: targetCol, ...anchor }));
+      } catch (e) { console.error('Reorder failed:', e); }
+    } else if (task.status !== targetCol) {
       await handleMoveTask(taskId, targetCol);
     }
   };
@@ -310,7 +530,7 @@ export default function WorkspacePage() {
         <div className="kanban-board">
           {COLUMNS.map(col => (
             <div key={col.id} className={`kanban-column ${activeColumn === col.id ? 'mobile-active' : ''}`}>
-              <div className="column-tasks">
+              <div className="column-tasks" onScroll={handleColumnScroll(col.id)}>
                 {(columnTasks[col.id] || []).map(task => (
                   <MobileTaskCard
                     key={task.id}
@@ -324,6 +544,11 @@ export default function WorkspacePage() {
                 {(columnTasks[col.id] || []).length === 0 && (
                   <div className="column-empty">No tasks</div>
                 )}
+                {columnMeta[col.id]?.next_cursor && (
+                  <button className="btn btn-ghost btn-sm column-load-more" onClick={() => loadMore(col.id)} disabled={loadingMore[col.id]}>
+                    {loadingMore[col.id] ? <Loader2 size={14} className="animate-spin" /> : 'Load more'}
+                  </button>
+                )}
               </div>
             </div>
           ))}
@@ -355,7 +580,7 @@ export default function WorkspacePage() {
           />
         )}
         {selectedTask && (
-          <TaskModal task={selectedTask} projects={projects} onClose={() => setSelectedTask(null)} onSave={handleSaveTask} onDelete={handleDeleteTask} />
+          <TaskModal task={selectedTask} projects={projects} onClose={() => setSelectedTask(null)} onSave={handleSaveTask} onDelete={handleDeleteTask} onCommentsChange={handleCommentsChange} />
         )}
         {showNewProject && <NewProjectModal workspaceId={workspaceId} onClose={() => setShowNewProject(false)} onCreated={handleProjectCreated} />}
         {showManageProjects && <ManageProjectsModal projects={projects} onClose={() => setShowManageProjects(false)} onUpdate={handleProjectsUpdated} />}
@@ -421,7 +646,7 @@ export default function WorkspacePage() {
                   <div className="collapsed-column-inner" onClick={() => setArchivedCollapsed(false)} title="Expand Archived">
                     <span className="column-icon">{col.icon}</span>
                     <span className="collapsed-column-title">{col.title}</span>
-                    <span className="column-count">{colTasks.length}</span>
+                    <span className="column-count">{taskCounts[col.id]}</span>
                   </div>
                 </DroppableColumn>
               );
@@ -432,7 +657,7 @@ export default function WorkspacePage() {
                 <div className="column-header">
                   <span className="column-icon">{col.icon}</span>
                   <h3 className="column-title">{col.title}</h3>
-                  <span className="column-count">{colTasks.length}</span>
+                  <span className="column-count">{taskCounts[col.id]}</span>
                   {isArchived && (
                     <button className="btn btn-ghost btn-icon btn-sm" onClick={() => setArchivedCollapsed(true)} title="Collapse" style={{ marginLeft: 'auto' }}>
                       {'«'}
@@ -443,7 +668,7 @@ export default function WorkspacePage() {
                   </button>
                 </div>
                 <SortableContext items={colTasks.map(t => t.id)} strategy={verticalListSortingStrategy}>
-                  <div className="column-tasks">
+                  <div className="column-tasks" onScroll={handleColumnScroll(col.id)}>
                     {colTasks.map(task => (
                       <TaskCard
                         key={task.id}
@@ -455,6 +680,11 @@ export default function WorkspacePage() {
                       />
                     ))}
                     {colTasks.length === 0 && <div className="column-empty">No tasks</div>}
+                    {columnMeta[col.id]?.next_cursor && (
+                      <button className="btn btn-ghost btn-sm column-load-more" onClick={() => loadMore(col.id)} disabled={loadingMore[col.id]}>
+                        {loadingMore[col.id] ? <Loader2 size={14} className="animate-spin" /> : 'Load more'}
+                      </button>
+                    )}
                   </div>
                 </SortableContext>
               </DroppableColumn>
@@ -465,7 +695,7 @@ export default function WorkspacePage() {
 
       {/* Modals */}
       {selectedTask && (
-        <TaskModal task={selectedTask} projects={projects} onClose={() => setSelectedTask(null)} onSave={handleSaveTask} onDelete={handleDeleteTask} />
+        <TaskModal task={selectedTask} projects={projects} onClose={() => setSelectedTask(null)} onSave={handleSaveTask} onDelete={handleDeleteTask} onCommentsChange={handleCommentsChange} />
       )}
       {showNewTask && (
         <TaskModal task={{ status: newTaskColumn }} projects={projects} onClose={() => setShowNewTask(false)} onSave={handleSaveTask} />
@@ -8,6 +8,7 @@ export default defineConfig({
       '/api': {
         target: 'http://api:8000',
         changeOrigin: true,
+        ws: true,
       },
     },
   },